@@ -0,0 +1,106 @@
+"""
+Benchmark of the chunked (out-of-core) mode of pipeline 02_intermediate.
+
+Writes a synthetic minute-level stock history (390 bars per business day, with
+overlapping downloads repeating 1% of the rows) as one raw parquet partition, then runs
+`ingest_transformed_data` and saves the output with `ManifestPartitionedDataset`, once
+loading the whole partition (lazy mode) and once streaming it with `chunk_size`. Every
+run happens in a fresh process, so the peak resident memory (RSS) of each mode is
+measured separately. Both outputs must be equal.
+
+Usage:
+    python benchmarks/bench_02_streaming.py --years 10 --chunk-size 250000
+"""
+import argparse
+import multiprocessing
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from project001.config.transform_config import TransformConfig
+from project001.datasets import ManifestPartitionedDataset
+from project001.pipelines._02_intermediate.nodes import ingest_transformed_data
+
+TICKERS = {"TICK3.SA": "Synthetic"}
+
+
+def _dataset(path: Path) -> ManifestPartitionedDataset:
+    return ManifestPartitionedDataset(
+        path=str(path), dataset={"type": "pandas.ParquetDataset", "save_args": {"index": False}},
+        filename_suffix=".parquet",
+    )
+
+def make_history(years: int, rng: np.random.Generator) -> pd.DataFrame:
+    """Minute bars of the B3 session, in download order, with 1% of the rows repeated."""
+    days = pd.bdate_range("2000-01-03", periods=years * 252) + pd.Timedelta("13h") # 10h in Sao Paulo, in UTC
+    dates = (days.values[:, None] + pd.to_timedelta(np.arange(390), unit="min").values).ravel()
+    rows = len(dates)
+    close = 100 + rng.standard_normal(rows).cumsum() * 0.01
+    df = pd.DataFrame({
+        "Date": pd.DatetimeIndex(dates, tz="UTC").tz_convert("America/Sao_Paulo"),
+        "Open": close + rng.standard_normal(rows) * 0.01,
+        "High": close + 0.05,
+        "Low": close - 0.05,
+        "Close": close,
+        "Volume": rng.integers(100, 10_000, rows),
+        "Dividends": 0.0,
+        "Stock Splits": 0.0,
+    })
+    repeated = rng.choice(rows, rows // 100, replace=False)
+    return pd.concat([df, df.iloc[np.sort(repeated)]], ignore_index=True)
+
+def peak_rss_mb() -> int:
+    """Peak resident memory of the current process in MB (VmHWM on Linux, which restarts at exec)."""
+    status = Path("/proc/self/status")
+    if status.exists():
+        line = next(line for line in status.read_text().splitlines() if line.startswith("VmHWM:"))
+        return int(line.split()[1]) // 1024
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // (1 << 20) if sys.platform == "darwin" else peak // 1024
+
+def run(root: str, chunk_size: int) -> tuple[float, int]:
+    """Transform and save the raw partition. Returns (seconds, peak RSS in MB)."""
+    start = time.perf_counter()
+    config = TransformConfig(lazy=True, chunk_size=chunk_size or None)
+    stock, _ = ingest_transformed_data(TICKERS, _dataset(Path(root) / "raw").load(), {}, config=config)
+    _dataset(Path(root) / f"out_{chunk_size}").save(stock)
+    return time.perf_counter() - start, peak_rss_mb()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--chunk-size", type=int, default=250_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        raw = make_history(args.years, np.random.default_rng(0))
+        _dataset(Path(root) / "raw").save({"TICK3_SA": raw})
+        rows, raw_mb = len(raw), raw.memory_usage(deep=True).sum() / 2**20
+        del raw
+
+        context = multiprocessing.get_context("spawn") # Fresh process per mode, so peaks are not shared
+        results = {}
+        for chunk_size in (0, args.chunk_size):
+            with context.Pool(1) as pool:
+                results[chunk_size] = pool.apply(run, (root, chunk_size))
+
+        whole = _dataset(Path(root) / "out_0").load()["TICK3_SA"]()
+        chunked = _dataset(Path(root) / f"out_{args.chunk_size}").load()["TICK3_SA"]()
+        pd.testing.assert_frame_equal(whole, chunked)
+
+        (whole_time, whole_peak), (chunked_time, chunked_peak) = results[0], results[args.chunk_size]
+        print( # noqa: T201
+            f"{args.years} years of minute bars ({rows:,} rows, {raw_mb:,.0f} MB in memory): "
+            f"whole={whole_time:.1f}s ({rows / whole_time:,.0f} rows/s) peak_rss={whole_peak:,} MB "
+            f"chunked[{args.chunk_size:,}]={chunked_time:.1f}s ({rows / chunked_time:,.0f} rows/s) "
+            f"peak_rss={chunked_peak:,} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
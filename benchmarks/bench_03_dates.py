@@ -0,0 +1,85 @@
+"""
+Benchmark of the date columns written by pipeline 03_primary.
+
+Compares '%Y-%m-%d' strings (`date_format`) with native columns (`typed_dates`):
+conversion time, parquet size (total and of the date columns), full read time and the read time of a one-month
+date-range filter. 'typed_days' has the granularity of the strings (Arrow date32 for
+both columns). 'typed' is the default of `typed_dates`: `published_at` becomes a UTC
+datetime and keeps its time of day, so it holds more information than the strings
+and is larger on disk.
+
+Usage:
+    python benchmarks/bench_03_dates.py --rows 1000000
+"""
+import argparse
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from project001.pipelines._03_primary.plan import TransformerPlan
+
+ROW_GROUP_SIZE = 100_000
+
+
+def make_frame(rows: int, rng: np.random.Generator) -> pd.DataFrame:
+    """Sorted stock-like dates (local time zone) and news-like UTC publication times."""
+    published = pd.Timestamp("2015-01-01", tz="UTC") + pd.to_timedelta(np.sort(rng.integers(0, 10 * 365 * 86400, rows)), unit="s")
+    return pd.DataFrame({
+        "date": published.tz_convert("America/Sao_Paulo"),
+        "published_at": published.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "close": rng.random(rows) * 100,
+    })
+
+def date_columns_size(path: Path) -> int:
+    """Compressed bytes of the date columns in a parquet file."""
+    metadata = pq.ParquetFile(path).metadata
+    return sum(
+        metadata.row_group(i).column(j).total_compressed_size
+        for i in range(metadata.num_row_groups)
+        for j in range(metadata.num_columns)
+        if metadata.row_group(i).column(j).path_in_schema in ("date", "published_at")
+    )
+
+def _timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    df = make_frame(args.rows, np.random.default_rng(0))
+    plans = {
+        "strings": TransformerPlan(),
+        "typed_days": TransformerPlan(typed_dates=True, timestamp_columns=()),
+        "typed": TransformerPlan(typed_dates=True),
+    }
+    filters = {
+        "strings": [("date", ">=", "2020-01-01"), ("date", "<", "2020-02-01")],
+        "typed": [("date", ">=", date(2020, 1, 1)), ("date", "<", date(2020, 2, 1))],
+    }
+    filters["typed_days"] = filters["typed"]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, plan in plans.items():
+            path = Path(tmp) / f"{name}.parquet"
+            convert, result = _timed(lambda plan=plan: plan.apply(df))
+            write, _ = _timed(lambda result=result, path=path: result.to_parquet(path, index=False, row_group_size=ROW_GROUP_SIZE))
+            read, _ = _timed(lambda path=path: pd.read_parquet(path))
+            filtered, month = _timed(lambda path=path, name=name: pd.read_parquet(path, filters=filters[name]))
+            print( # noqa: T201
+                f"{name:<10} convert={convert:.3f}s write={write:.3f}s size={path.stat().st_size / 2**20:.1f} MiB "
+                f"(dates {date_columns_size(path) / 2**20:.2f} MiB) "
+                f"read={read:.3f}s filtered_read={filtered:.3f}s ({len(month):,} rows)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Benchmark of the text lowercasing of pipeline 03_primary.
+
+Compares the lowercasing step of `TransformerPlan.apply` on news text columns stored as
+Python objects and as Arrow-backed strings ('string[pyarrow]'), reporting time and
+memory of the columns.
+
+Usage:
+    python benchmarks/bench_03_text.py --rows 1000000 --repeat 3
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from project001.pipelines._03_primary.plan import TransformerPlan
+from project001.utils.arrow import to_arrow_strings
+
+PLAN = TransformerPlan(date_format=None) # Only lowercases the text columns
+WORDS = np.array(["Embraer", "Vale", "Mercado", "Ações", "Bolsa", "Lucro", "Queda", "Alta", "Dólar", "Petróleo"])
+
+
+def make_news_text(rows: int, rng: np.random.Generator) -> pd.DataFrame:
+    """News frame with title, description and content columns of increasing length."""
+    def sentences(words: int) -> np.ndarray:
+        return np.array([" ".join(row) for row in WORDS[rng.integers(0, len(WORDS), (rows, words))]], dtype=object)
+
+    return pd.DataFrame({"title": sentences(8), "description": sentences(25), "content": sentences(40)})
+
+def _best_of(df: pd.DataFrame, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        PLAN.apply(df) # Does not modify the input
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    news = make_news_text(args.rows, np.random.default_rng(0))
+    arrow_news = to_arrow_strings(news)
+    for name, df in (("object", news), ("string[pyarrow]", arrow_news)):
+        elapsed = _best_of(df, args.repeat)
+        memory = df.memory_usage(deep=True).sum() / 2**20
+        print(f"{name:<16} rows={len(df):>9,} lower={elapsed:.3f}s memory={memory:,.0f} MiB") # noqa: T201
+
+    expected = PLAN.apply(news)
+    result = PLAN.apply(arrow_news).astype(object)
+    assert expected.equals(result), "Results differ"
+
+
+if __name__ == "__main__":
+    main()
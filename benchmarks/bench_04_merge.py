@@ -0,0 +1,95 @@
+"""
+Benchmark of the as-of merge of stock features with news sentiment in pipeline 04_feature.
+
+Compares `merge_news_features`, which assigns every article to its trading day with one
+`searchsorted` over all tickers and sums the trailing windows with cumulative sums, with
+a per-row lookup that selects the articles of every window of every trading day. The
+synthetic universe has business days and a random number of articles per day with
+random publication times. The lookup is slow, so it runs on the first
+--baseline-tickers tickers only and throughput is compared in rows/s.
+
+Usage:
+    python benchmarks/bench_04_merge.py --tickers 500 --years 10 --news-per-day 3
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from project001.pipelines._04_feature.merge import NewsMergeConfig, merge_news_features
+
+
+def make_universe(
+    tickers: int, years: int, news_per_day: float, rng: np.random.Generator,
+) -> tuple[dict[str, pd.DataFrame], dict[str, pd.DataFrame]]:
+    """Daily stock rows and scored news with UTC publication times, keyed by ticker."""
+    dates = pd.bdate_range("2015-01-01", periods=years * 252)
+    stock, news = {}, {}
+    for i in range(tickers):
+        ticker = f"TICK{i:03d}_SA"
+        stock[ticker] = pd.DataFrame({"date": dates.strftime("%Y-%m-%d"), "close": rng.random(len(dates))})
+        articles = rng.poisson(news_per_day * len(dates))
+        span = (dates[-1] - dates[0] + pd.Timedelta("3D")).total_seconds()
+        published = dates[0] + pd.to_timedelta(rng.random(articles) * span, unit="s")
+        news[ticker] = pd.DataFrame({
+            "published_at": published.tz_localize("UTC").sort_values(),
+            "sentiment_score": rng.uniform(-1, 1, articles),
+        })
+    return stock, news
+
+def per_row_lookup(
+    stock: dict[str, pd.DataFrame], news: dict[str, pd.DataFrame], config: NewsMergeConfig,
+) -> dict[str, pd.DataFrame]:
+    """Baseline: for every trading day and window, select the articles published in the window."""
+    cutoff = pd.Timedelta(config.cutoff)
+    merged = {}
+    for ticker, df in stock.items():
+        asof = pd.to_datetime(df["date"], utc=True) + cutoff
+        articles = news.get(ticker, pd.DataFrame(columns=["published_at", "sentiment_score"]))
+        features = {f"{name}_{w}d": [] for w in config.windows for name in ("news_count", "sentiment_mean")}
+        for row in range(len(df)):
+            for window in config.windows:
+                start = asof.iloc[row - window] if row >= window else pd.Timestamp.min.tz_localize("UTC")
+                published = articles["published_at"]
+                scores = articles["sentiment_score"][(published >= start) & (published < asof.iloc[row])]
+                features[f"news_count_{window}d"].append(len(scores))
+                features[f"sentiment_mean_{window}d"].append(scores.mean() if len(scores) else np.nan)
+        merged[ticker] = pd.concat([df, pd.DataFrame(features)], axis=1)
+    return merged
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tickers", type=int, default=500)
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--news-per-day", type=float, default=3.0)
+    parser.add_argument("--baseline-tickers", type=int, default=2)
+    args = parser.parse_args()
+
+    stock, news = make_universe(args.tickers, args.years, args.news_per_day, np.random.default_rng(0))
+    rows = sum(len(df) for df in stock.values())
+    articles = sum(len(df) for df in news.values())
+    config = NewsMergeConfig()
+
+    start = time.perf_counter()
+    merged = merge_news_features(stock, news, config)
+    vectorized_time = time.perf_counter() - start
+
+    subset = list(stock)[:args.baseline_tickers]
+    start = time.perf_counter()
+    baseline = per_row_lookup({t: stock[t] for t in subset}, news, config)
+    baseline_time = time.perf_counter() - start
+    baseline_rows = sum(len(stock[t]) for t in subset)
+
+    for ticker in subset:
+        pd.testing.assert_frame_equal(merged[ticker], baseline[ticker], check_dtype=False, rtol=1e-9)
+    print( # noqa: T201
+        f"{args.tickers} tickers x {args.years} years ({rows:,} rows, {articles:,} articles): "
+        f"vectorized={vectorized_time:.2f}s ({rows / vectorized_time:,.0f} rows/s) "
+        f"per_row_lookup={baseline_rows / baseline_time:,.0f} rows/s on {len(subset)} tickers "
+        f"speedup={(rows / vectorized_time) / (baseline_rows / baseline_time):,.0f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Benchmark of the news sentiment scoring of pipeline 04_feature.
+
+Compares `SentimentScorer`, which sorts the articles by token length and pads each batch
+to its longest article, with batches in input order padded to `max_length`, on synthetic
+articles of mixed length (short titles and title + description). Then compares the
+inference backends with the fp32 torch backend: throughput, largest probability
+difference and share of articles with the same predicted label. With --workers, also
+measures worker processes sharing the loaded model and scoring the news of different
+tickers (100 articles per synthetic ticker; the time includes starting the workers). Reports articles/s on
+CPU; the model is downloaded from the Hugging Face Hub unless a local directory is given.
+
+Usage:
+    python benchmarks/bench_04_sentiment.py --articles 2000 --model lucas-leme/FinBERT-PT-BR
+    python benchmarks/bench_04_sentiment.py --backends torch_int8 onnx onnx_int8 --threads 4
+    python benchmarks/bench_04_sentiment.py --backends --workers 4
+"""
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from project001.pipelines._04_feature.sentiment import (
+    INFERENCE_BACKENDS,
+    SentimentConfig,
+    SentimentScorer,
+    score_in_workers,
+)
+
+WORDS = np.array([
+    "embraer", "vale", "petrobras", "lucro", "prejuízo", "alta", "queda", "mercado", "bolsa", "dólar",
+    "ações", "trimestre", "receita", "investidores", "resultado", "dividendos", "juros", "inflação",
+])
+
+
+def make_articles(count: int, rng: np.random.Generator) -> list[str]:
+    """Titles of 6-15 words, half of them followed by a description of 20-60 words."""
+    articles = []
+    for _ in range(count):
+        text = " ".join(rng.choice(WORDS, rng.integers(6, 16)))
+        if rng.random() < 0.5:
+            text += ". " + " ".join(rng.choice(WORDS, rng.integers(20, 61)))
+        articles.append(text)
+    return articles
+
+def fixed_padding(scorer: SentimentScorer, texts: list[str]) -> np.ndarray:
+    """Baseline: batches in input order, padded to `max_length`."""
+    torch = scorer._torch
+    outputs = []
+    with torch.inference_mode():
+        for start in range(0, len(texts), scorer.batch_size):
+            features = scorer.tokenizer(
+                texts[start:start + scorer.batch_size],
+                truncation=True, max_length=scorer.max_length, padding="max_length", return_tensors="pt",
+            )
+            outputs.append(torch.softmax(scorer.model(**features).logits, dim=-1).numpy())
+    return np.concatenate(outputs)
+
+def timed_score(scorer: SentimentScorer, texts: list[str]) -> tuple[np.ndarray, float]:
+    """Score the texts after a warm-up batch. Returns (probabilities, seconds)."""
+    scorer.score(texts[:scorer.batch_size])
+    start = time.perf_counter()
+    probabilities = scorer.score(texts)
+    return probabilities, time.perf_counter() - start
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--articles", type=int, default=2000)
+    parser.add_argument("--model", default=SentimentConfig.model_name, help="Model id or local directory")
+    parser.add_argument("--batch-size", type=int, default=SentimentConfig.batch_size)
+    parser.add_argument("--max-length", type=int, default=SentimentConfig.max_length)
+    parser.add_argument("--threads", type=int, default=None, help="CPU threads (default: all cores)")
+    parser.add_argument(
+        "--backends", nargs="*", default=[b for b in INFERENCE_BACKENDS if b != "torch"], choices=INFERENCE_BACKENDS)
+    parser.add_argument("--workers", type=int, default=1, help="Also measure this many worker processes")
+    args = parser.parse_args()
+
+    texts = make_articles(args.articles, np.random.default_rng(0))
+    scorer = SentimentScorer(args.model, args.batch_size, args.max_length, args.threads)
+    reference, reference_time = timed_score(scorer, texts)
+
+    start = time.perf_counter()
+    fixed = fixed_padding(scorer, texts)
+    fixed_time = time.perf_counter() - start
+
+    print( # noqa: T201
+        f"{args.articles} articles, batch_size={args.batch_size}, max_length={args.max_length}: "
+        f"sorted+dynamic={args.articles / reference_time:,.1f} articles/s "
+        f"fixed_padding={args.articles / fixed_time:,.1f} articles/s "
+        f"speedup={fixed_time / reference_time:.1f}x max_abs_diff={np.abs(reference - fixed).max():.1e}"
+    )
+
+    if args.workers > 1:
+        texts_by_key = {str(i): text for i, text in enumerate(texts)}
+        keys_by_ticker = {}
+        for key in texts_by_key:
+            keys_by_ticker.setdefault(f"TICK{int(key) // 100:03d}_SA", []).append(key)
+        start = time.perf_counter()
+        results = score_in_workers(scorer, texts_by_key, keys_by_ticker, args.workers)
+        workers_time = time.perf_counter() - start
+        probabilities = np.stack([results[key] for key in texts_by_key])
+        print( # noqa: T201
+            f"  workers={args.workers}: {args.articles / workers_time:,.1f} articles/s "
+            f"speedup={reference_time / workers_time:.1f}x max_abs_diff={np.abs(probabilities - reference).max():.1e}"
+        )
+
+    print(f"  {'torch':<10} {args.articles / reference_time:8.1f} articles/s (fp32 reference)") # noqa: T201
+    with tempfile.TemporaryDirectory() as onnx_dir:
+        for backend in args.backends:
+            scorer = SentimentScorer(args.model, args.batch_size, args.max_length, args.threads, backend, onnx_dir)
+            probabilities, elapsed = timed_score(scorer, texts)
+            agreement = (probabilities.argmax(axis=1) == reference.argmax(axis=1)).mean()
+            print( # noqa: T201
+                f"  {backend:<10} {args.articles / elapsed:8.1f} articles/s speedup={reference_time / elapsed:.1f}x "
+                f"max_abs_diff={np.abs(probabilities - reference).max():.1e} label_agreement={agreement:.1%}"
+            )
+
+
+if __name__ == "__main__":
+    main()
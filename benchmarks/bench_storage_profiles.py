@@ -0,0 +1,111 @@
+"""
+Benchmark of the parquet storage profiles defined in conf/base/globals.yml.
+
+Every profile is used to write the partitions of each layer (e.g., data/01_raw/stock)
+to a temporary directory, reporting file size, write and read throughput, so a profile
+can be chosen per layer in the `storage` section of globals.yml. Throughput is measured
+on the in-memory size of the data.
+
+Usage:
+    python benchmarks/bench_storage_profiles.py --layers data/01_raw/stock data/03_primary/news
+    python benchmarks/bench_storage_profiles.py --synthetic 1000000
+    python benchmarks/bench_storage_profiles.py --synthetic 1000000 --typed-dates
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from kedro.config import OmegaConfigLoader
+
+from project001.pipelines._03_primary.plan import to_date32, to_utc_timestamp
+
+DEFAULT_LAYERS = ["data/01_raw/stock", "data/01_raw/news", "data/03_primary/stock", "data/03_primary/news"]
+
+
+def load_profiles(conf_source: str) -> dict[str, dict]:
+    """Read the storage profiles from the project configuration."""
+    loader = OmegaConfigLoader(conf_source, base_env="base", default_run_env="local")
+    return loader["globals"]["storage_profiles"]
+
+def load_layer(path: Path) -> list[pd.DataFrame]:
+    """Load every parquet partition of a layer."""
+    return [pd.read_parquet(file) for file in sorted(path.glob("*.parquet"))]
+
+def synthetic_layers(rows: int, typed_dates: bool = False) -> dict[str, list[pd.DataFrame]]:
+    """
+    Stock-like and news-like frames, split in 10 partitions.
+
+    Dates are '%Y-%m-%d' strings, or with `typed_dates` the columns written by
+    03_primary with `typed_dates` (date32 `date`, UTC timestamp `published_at`).
+    """
+    rng = np.random.default_rng(0)
+    dates = pd.date_range("2000-01-01", periods=rows, freq="min")
+    published = pd.date_range("2000-01-01", periods=rows, freq="s", tz="UTC")
+    stock = pd.DataFrame({
+        "date": to_date32(pd.Series(dates)) if typed_dates else dates.strftime("%Y-%m-%d"),
+        "open": (rng.random(rows) * 100).round(2),
+        "close": (rng.random(rows) * 100).round(2),
+        "volume": rng.integers(0, 1_000_000, rows),
+    })
+    words = np.array(["embraer", "vale", "mercado", "bolsa", "lucro", "queda", "alta", "dólar"])
+    news = pd.DataFrame({
+        "source": rng.choice(["source a", "source b", "source c"], rows),
+        "author": rng.choice(["author a", "author b", "author c", "author d", None], rows),
+        "title": [" ".join(row) for row in words[rng.integers(0, len(words), (rows, 8))]],
+        "published_at": to_utc_timestamp(pd.Series(published)) if typed_dates else published.strftime("%Y-%m-%d"),
+    })
+    bounds = np.linspace(0, rows, 11, dtype=int)
+    return {
+        f"synthetic/{name}": [df.iloc[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+        for name, df in (("stock", stock), ("news", news))
+    }
+
+def bench_profile(partitions: list[pd.DataFrame], save_args: dict, directory: Path) -> tuple[float, float, float]:
+    """Write and read the partitions with a profile. Returns (size MiB, write s, read s)."""
+    directory.mkdir(parents=True)
+    start = time.perf_counter()
+    for i, df in enumerate(partitions):
+        df.to_parquet(directory / f"{i}.parquet", **save_args)
+    write = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for file in directory.glob("*.parquet"):
+        pd.read_parquet(file)
+    read = time.perf_counter() - start
+
+    size = sum(file.stat().st_size for file in directory.glob("*.parquet")) / 2**20
+    return size, write, read
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--conf-source", default="conf")
+    parser.add_argument("--layers", nargs="+", default=DEFAULT_LAYERS, help="Partitioned layer directories")
+    parser.add_argument("--synthetic", type=int, default=0, help="Use synthetic data with this many rows")
+    parser.add_argument("--typed-dates", action="store_true", help="Synthetic dates as date32 / UTC timestamps")
+    args = parser.parse_args()
+
+    profiles = load_profiles(args.conf_source)
+    if args.synthetic:
+        layers = synthetic_layers(args.synthetic, args.typed_dates)
+    else:
+        layers = {layer: load_layer(Path(layer)) for layer in args.layers}
+        layers = {layer: partitions for layer, partitions in layers.items() if partitions}
+    if not layers:
+        parser.error("No parquet partitions found. Run the pipeline first or pass --synthetic ROWS.")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for layer, partitions in layers.items():
+            memory = sum(df.memory_usage(deep=True).sum() for df in partitions) / 2**20
+            print(f"{layer}: {len(partitions)} partitions, {memory:,.1f} MiB in memory") # noqa: T201
+            for name, save_args in profiles.items():
+                size, write, read = bench_profile(partitions, dict(save_args), Path(tmp) / layer.strip("/").replace("/", "_") / name)
+                print( # noqa: T201
+                    f"  {name:<11} size={size:8.2f} MiB write={memory / write:8.1f} MiB/s read={memory / read:8.1f} MiB/s"
+                )
+
+
+if __name__ == "__main__":
+    main()
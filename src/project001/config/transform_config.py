@@ -0,0 +1,39 @@
+from dataclasses import dataclass
+from typing import Optional
+
+BACKENDS = ("pandas", "polars")
+
+
+@dataclass
+class TransformConfig:
+    """
+    Configuration class for the transformation stages (02_intermediate and 03_primary).
+
+    Args:
+        only_changed (bool): Only transform partitions whose upstream content changed
+            since their output was saved.
+        max_workers (int): Worker processes loading and transforming partitions. 1 runs serially.
+        lazy (bool): Return a callable per partition, so partitions are transformed at
+            save time and written one at a time. With `max_workers` > 1, the pool
+            transforms the next partitions while one is written.
+        arrow_strings (bool): Load text columns with the Arrow-backed string dtype
+            ('string[pyarrow]'). Parquet partitions create them while reading.
+        backend (str): Engine of the transformations, 'pandas' or 'polars' (multi-threaded
+            lazy queries, same output). Polars runs partitions serially, ignoring `max_workers`.
+        chunk_size (Optional[int]): Stream partitions in chunks of this many rows, reading,
+            transforming and writing one chunk at a time, for histories that do not fit in
+            memory. Takes precedence over `lazy`, `max_workers` and `backend`. None loads
+            whole partitions.
+    """
+    only_changed: bool = False
+    max_workers: int = 1
+    lazy: bool = False
+    arrow_strings: bool = False
+    backend: str = "pandas"
+    chunk_size: Optional[int] = None
+
+    def __post_init__(self):
+        if self.backend not in BACKENDS:
+            raise ValueError(f"Unknown backend '{self.backend}', expected one of {BACKENDS}")
+        if self.chunk_size is not None and self.chunk_size <= 0:
+            raise ValueError(f"chunk_size must be positive, got {self.chunk_size}")
@@ -0,0 +1,14 @@
+"""Custom Kedro datasets for project001."""
+
+from .consolidated import ConsolidatedParquetDataset
+from .partitioned import ManifestPartitionedDataset, PartitionManifestDataset, SourcedPartitions
+from .query import DataQuery, DuckDBQueryDataset
+
+__all__ = [
+    "ConsolidatedParquetDataset",
+    "DataQuery",
+    "DuckDBQueryDataset",
+    "ManifestPartitionedDataset",
+    "PartitionManifestDataset",
+    "SourcedPartitions",
+]
@@ -0,0 +1,250 @@
+import hashlib
+import json
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Iterable, Iterator, Optional
+
+import fsspec
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from kedro.io.core import AbstractDataset, DatasetError, get_protocol_and_path
+
+from project001.config.logging_config import get_logging_config
+from project001.datasets.partitioned import MANIFEST_FILENAME, hash_partition, read_manifest, record_source
+
+logger = get_logging_config(pipeline_name="datasets")
+
+YEAR_COLUMN = "year" # Hive partition derived from `date_column`
+
+
+class ConsolidatedParquetDataset(AbstractDataset[dict[str, Any], pd.DataFrame]):
+    """
+    Single hive-partitioned parquet dataset holding every partition (ticker) of a stage.
+
+    Saving keeps the contract of `ManifestPartitionedDataset`: a dict of DataFrames (or
+    lazy callables) keyed by partition id, where None partitions are skipped and
+    partitions whose content hash is unchanged are not rewritten. Each partition is
+    written under `<partition_column>=<partition id>/` (and `year=<year>/` when
+    `date_column` is set), replacing only its own directory, so a run that returns a
+    subset of the tickers keeps the others. The manifest is compatible with
+    `PartitionManifestDataset`, including the upstream hashes of `SourcedPartitions`.
+    A partition given as an iterator of DataFrames (or a callable returning one, as
+    02_intermediate and 03_primary return with `chunk_size`) is written chunk by chunk
+    to a staging directory, which replaces the partition only when the combined hash of
+    the chunks changed.
+
+    Loading returns the whole universe as one DataFrame from a single vectorized scan,
+    with the partition column filled in. `load_args` accepts `columns` (projection) and
+    `filters` (DNF list of tuples, as in `pd.read_parquet`); filters on the partition
+    columns prune directories and filters on other columns use the row-group statistics.
+
+    Example catalog entry:
+        03_primary_stock:
+          type: project001.datasets.ConsolidatedParquetDataset
+          path: data/03_primary/stock_consolidated
+          date_column: date
+          load_args:
+            columns: [date, close]
+            filters: [[ticker, in, [EMBR3_SA, VALE3_SA]], [year, ">=", 2024]]
+
+    Args:
+        path (str): Root directory of the dataset.
+        partition_column (str): Hive partition column holding the partition id.
+        date_column (Optional[str]): Date column used to add a `year` hive partition.
+        row_group_size (int): Maximum rows per parquet row group.
+        load_args (Optional[dict[str, Any]]): `columns` and `filters` applied on load.
+        fs_args (Optional[dict[str, Any]]): Arguments of the fsspec filesystem.
+        metadata (Optional[dict[str, Any]]): Kedro metadata.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        partition_column: str = "ticker",
+        date_column: Optional[str] = None,
+        row_group_size: int = 128 * 1024,
+        load_args: Optional[dict[str, Any]] = None,
+        fs_args: Optional[dict[str, Any]] = None,
+        metadata: Optional[dict[str, Any]] = None,
+    ):
+        protocol, root = get_protocol_and_path(path)
+        self._protocol = protocol
+        self._root = root.rstrip("/")
+        self._fs = fsspec.filesystem(protocol, **(fs_args or {}))
+        self._path = path
+        self._partition_column = partition_column
+        self._date_column = date_column
+        self._row_group_size = row_group_size
+        self._load_args = load_args or {}
+        self.metadata = metadata
+
+    @property
+    def _manifest_path(self) -> str:
+        return f"{self._root}/{MANIFEST_FILENAME}"
+
+    @property
+    def _partitioning(self) -> ds.Partitioning:
+        fields = [(self._partition_column, pa.string())]
+        if self._date_column:
+            fields.append((YEAR_COLUMN, pa.int16()))
+        return ds.partitioning(pa.schema(fields), flavor="hive")
+
+    def _partition_dir(self, partition_id: str) -> str:
+        return f"{self._root}/{self._partition_column}={partition_id}"
+
+    def load_manifest(self) -> dict[str, dict[str, str]]:
+        """
+        Read the manifest of the dataset.
+
+        Returns:
+            dict[str, dict[str, str]]: Hash and last write time keyed by partition.
+        """
+        return read_manifest(self._fs, self._manifest_path)
+
+    def _partition_table(self, partition_id: str, df: pd.DataFrame) -> pa.Table:
+        """Table of the rows of a partition, with its hive partition columns."""
+        df = df.assign(**{self._partition_column: partition_id})
+        if self._date_column:
+            df[YEAR_COLUMN] = pd.to_datetime(df[self._date_column].astype("string")).dt.year.astype("int16")
+        return pa.Table.from_pandas(df, preserve_index=False)
+
+    def _write_table(self, root: str, table: pa.Table, basename_template: str) -> None:
+        """Write a table under the hive directories of `root`."""
+        pq.write_to_dataset(
+            table,
+            root,
+            partitioning=self._partitioning,
+            filesystem=self._fs,
+            basename_template=basename_template,
+            existing_data_behavior="overwrite_or_ignore",
+            max_rows_per_group=self._row_group_size,
+            min_rows_per_group=max(1, min(self._row_group_size, len(table))),
+        )
+
+    def _write_partition(self, partition_id: str, df: pd.DataFrame) -> None:
+        """Replace the directory of a partition with the rows of `df`."""
+        table = self._partition_table(partition_id, df)
+        if self._fs.exists(self._partition_dir(partition_id)):
+            self._fs.rm(self._partition_dir(partition_id), recursive=True)
+        self._write_table(self._root, table, "part-{i}.parquet")
+
+    def _save_chunks(self, partition_id: str, chunks: Iterable[pd.DataFrame], manifest: dict[str, dict[str, str]]) -> Optional[bool]:
+        """
+        Write a partition given as chunks, without holding more than one in memory.
+
+        The chunks are written to a staging directory under the root (its `_` prefix
+        hides it from loads), which replaces the partition only when the combined hash
+        differs from the manifest (or the partition is missing). A partition whose chunks
+        fail or are empty is skipped, leaving the stored one. Later chunks are cast to
+        the schema of the first one.
+
+        Args:
+            partition_id (str): Partition to write.
+            chunks (Iterable[pd.DataFrame]): DataFrames of the partition, in order.
+            manifest (dict[str, dict[str, str]]): Manifest, updated when the partition is written.
+
+        Returns:
+            Optional[bool]: True when written, False when unchanged, None when skipped.
+        """
+        digest = hashlib.sha256()
+        staging = f"{self._root}/_staging-{uuid.uuid4().hex}"
+        schema, rows = None, 0
+        try:
+            try:
+                for number, chunk in enumerate(chunks):
+                    digest.update(hash_partition(chunk).encode())
+                    if chunk.empty:
+                        continue
+                    table = self._partition_table(partition_id, chunk)
+                    if schema is None:
+                        schema = table.schema
+                    elif not table.schema.equals(schema, check_metadata=False):
+                        table = table.cast(schema)
+                    self._write_table(staging, table, f"part-{number:06d}-{{i}}.parquet")
+                    rows += len(table)
+            except Exception as e:
+                logger.error(f"Error writing partition {partition_id} in chunks: {e}")
+                rows = 0
+            if not rows:
+                logger.warning(f"Partition {partition_id} has no data. Skipping save.")
+                return None
+
+            partition_dir = self._partition_dir(partition_id)
+            if manifest.get(partition_id, {}).get("hash") == digest.hexdigest() and self._fs.exists(partition_dir):
+                return False
+            if self._fs.exists(partition_dir):
+                self._fs.rm(partition_dir, recursive=True)
+            self._fs.mv(f"{staging}/{self._partition_column}={partition_id}", partition_dir, recursive=True)
+            manifest[partition_id] = {
+                "hash": digest.hexdigest(),
+                "updated_at": datetime.now(timezone.utc).isoformat(),
+            }
+            return True
+        finally:
+            if self._fs.exists(staging):
+                self._fs.rm(staging, recursive=True)
+
+    def save(self, data: dict[str, Any]) -> None:
+        manifest = self.load_manifest()
+        written, skipped = [], []
+
+        for partition_id, partition_data in sorted(data.items()):
+            if callable(partition_data):
+                partition_data = partition_data()  # noqa: PLW2901
+            if partition_data is None:
+                logger.warning(f"Partition {partition_id} has no data. Skipping save.")
+                continue
+            if isinstance(partition_data, Iterator):
+                changed = self._save_chunks(partition_id, partition_data, manifest)
+                if changed is not None:
+                    (written if changed else skipped).append(partition_id)
+                    record_source(manifest, partition_id, data)
+                continue
+
+            digest = hash_partition(partition_data)
+            if manifest.get(partition_id, {}).get("hash") == digest and self._fs.exists(self._partition_dir(partition_id)):
+                skipped.append(partition_id)
+                record_source(manifest, partition_id, data)
+                continue
+
+            self._write_partition(partition_id, partition_data)
+            manifest[partition_id] = {
+                "hash": digest,
+                "updated_at": datetime.now(timezone.utc).isoformat(),
+            }
+            written.append(partition_id)
+            record_source(manifest, partition_id, data)
+
+        self._fs.makedirs(self._root, exist_ok=True)
+        with self._fs.open(self._manifest_path, "w") as f:
+            json.dump({"partitions": manifest}, f, indent=2, sort_keys=True)
+        logger.info(f"Saved {len(written)} changed partition(s) to {self._path}, skipped {len(skipped)} unchanged")
+
+    def load(self) -> pd.DataFrame:
+        if not self._fs.exists(self._root):
+            raise DatasetError(f"No data found in {self._path}")
+
+        dataset = ds.dataset(self._root, format="parquet", partitioning=self._partitioning, filesystem=self._fs)
+        filters = self._load_args.get("filters")
+        table = dataset.to_table(
+            columns=self._load_args.get("columns"),
+            filter=pq.filters_to_expression(filters) if filters else None,
+        )
+        df = table.to_pandas()
+        if YEAR_COLUMN in df.columns and YEAR_COLUMN not in (self._load_args.get("columns") or []):
+            df = df.drop(columns=YEAR_COLUMN) # Derived partition, only returned on request
+        return df
+
+    def _exists(self) -> bool:
+        return self._fs.exists(self._root)
+
+    def _describe(self) -> dict[str, Any]:
+        return {
+            "path": self._path,
+            "partition_column": self._partition_column,
+            "date_column": self._date_column,
+            "row_group_size": self._row_group_size,
+            "load_args": self._load_args,
+        }
@@ -0,0 +1,279 @@
+import hashlib
+import json
+import pickle
+import uuid
+from copy import deepcopy
+from datetime import datetime, timezone
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+import pandas as pd
+from kedro.io.core import AbstractDataset, DatasetError
+from kedro_datasets.pandas import ParquetDataset
+from kedro_datasets.partitions import PartitionedDataset
+
+from project001.config.logging_config import get_logging_config
+from project001.utils.chunks import ChunkedParquetLoader, write_parquet_chunks
+
+logger = get_logging_config(pipeline_name="datasets")
+
+MANIFEST_FILENAME = "_manifest.json" # Stored in the dataset path, ignored as a partition
+
+
+def hash_partition(data: Any) -> str:
+    """
+    Compute a content hash of a partition.
+
+    DataFrames are hashed from their column names, dtypes and row values (the index is
+    not saved, so it is not hashed). Other objects are hashed from their pickle.
+
+    Args:
+        data (Any): Partition data.
+
+    Returns:
+        str: SHA-256 hex digest.
+    """
+    digest = hashlib.sha256()
+    if isinstance(data, pd.DataFrame):
+        digest.update(json.dumps([list(map(str, data.columns)), list(map(str, data.dtypes))]).encode())
+        try:
+            digest.update(pd.util.hash_pandas_object(data, index=False).values.tobytes())
+            return digest.hexdigest()
+        except TypeError: # Unhashable cells (e.g., lists)
+            pass
+    digest.update(pickle.dumps(data))
+    return digest.hexdigest()
+
+
+class SourcedPartitions(dict):
+    """
+    Partitions to save, with the upstream content hash each one was computed from.
+
+    Incremental stages return their outputs as `SourcedPartitions`. Whenever a partition
+    is saved (written or unchanged), the dataset records its upstream hash in the
+    manifest as `source`, so the next run can skip partitions whose upstream did not
+    change. As the dataset records it, a partition that fails or is never saved is not
+    recorded, whichever runner or process saves it.
+
+    Args:
+        sources (Optional[dict[str, str]]): Upstream hash keyed by partition.
+    """
+
+    def __init__(self, *args: Any, sources: Optional[dict[str, str]] = None, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.sources = dict(sources or {})
+
+
+def record_source(manifest: dict[str, dict[str, str]], partition_id: str, data: dict[str, Any]) -> None:
+    """Record the upstream hash of a saved partition in its manifest entry, when `data` has one."""
+    source = getattr(data, "sources", {}).get(partition_id)
+    if source is not None and partition_id in manifest:
+        manifest[partition_id]["source"] = source
+
+
+class ManifestPartitionedDataset(PartitionedDataset):
+    """
+    PartitionedDataset that skips writing partitions whose content did not change.
+
+    A manifest (`_manifest.json`) stored in the dataset path keeps, for every partition,
+    the content hash and the time it was last written. On save, a partition is only
+    written when its hash differs from the manifest (or its file is missing), and
+    partitions that resolve to None (e.g., a lazy partition that failed) are skipped.
+    Downstream nodes can read the manifest with `PartitionManifestDataset` to find which
+    partitions changed. When the saved dict is a `SourcedPartitions`, the upstream hash
+    of every saved partition is recorded too.
+
+    Parquet partitions also stream, for histories that do not fit in memory: their
+    loaders are `ChunkedParquetLoader`s, which can read the file in chunks of rows, and
+    a partition given as an iterator of DataFrames (or a callable returning one) is
+    written chunk by chunk. Its hash then combines the hashes of the chunks.
+
+    With `allow_empty`, loading a path without partitions (e.g., before the first run)
+    returns an empty dict instead of raising, so a node can read what an earlier run
+    stored in the dataset it writes.
+
+    Example catalog entry:
+        01_raw_stock:
+          type: project001.datasets.ManifestPartitionedDataset
+          dataset:
+            type: pandas.ParquetDataset
+          path: data/01_raw/stock
+          filename_suffix: .parquet
+    """
+
+    def __init__(self, *args: Any, allow_empty: bool = False, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._allow_empty = allow_empty
+
+    @property
+    def _manifest_path(self) -> str:
+        dir_path = self._filesystem._strip_protocol(self._normalized_path).rstrip(self._sep)
+        return self._sep.join([dir_path, MANIFEST_FILENAME])
+
+    def load_manifest(self) -> dict[str, dict[str, str]]:
+        """
+        Read the manifest of the dataset.
+
+        Returns:
+            dict[str, dict[str, str]]: Hash and last write time keyed by partition.
+        """
+        return read_manifest(self._filesystem, self._manifest_path)
+
+    def _save_manifest(self, manifest: dict[str, dict[str, str]]) -> None:
+        self._filesystem.makedirs(self._filesystem._parent(self._manifest_path), exist_ok=True)
+        with self._filesystem.open(self._manifest_path, "w") as f:
+            json.dump({"partitions": manifest}, f, indent=2, sort_keys=True)
+
+    def load(self) -> dict[str, Callable[[], Any]]:
+        try:
+            partitions = super().load()
+        except DatasetError:
+            if self._allow_empty and not self._list_partitions():
+                return {}
+            raise
+        if not issubclass(self._dataset_type, ParquetDataset):
+            return partitions
+        columns = self._dataset_config.get("load_args", {}).get("columns")
+        return {
+            partition_id: ChunkedParquetLoader(partitions[partition_id], path, self._filesystem, columns)
+            for path in self._list_partitions()
+            if (partition_id := self._path_to_partition(path)) in partitions
+        }
+
+    def _save_chunks(self, partition_id: str, chunks: Iterable[Any], manifest: dict[str, dict[str, str]]) -> Optional[bool]:
+        """
+        Write a partition given as chunks, without holding more than one in memory.
+
+        The chunks are written to a temporary file, which replaces the partition only
+        when the combined hash differs from the manifest (or the partition is missing).
+        A partition whose chunks fail or are empty is skipped, leaving the stored one.
+
+        Args:
+            partition_id (str): Partition to write.
+            chunks (Iterable[Any]): DataFrames of the partition, in order.
+            manifest (dict[str, dict[str, str]]): Manifest, updated when the partition is written.
+
+        Returns:
+            Optional[bool]: True when written, False when unchanged, None when skipped.
+        """
+        digest = hashlib.sha256()
+
+        def hashed(chunks: Iterable[Any]) -> Iterator[Any]:
+            for chunk in chunks:
+                digest.update(hash_partition(chunk).encode())
+                yield chunk
+
+        partition = self._partition_to_path(partition_id)
+        tmp_path = f"{partition}.{uuid.uuid4().hex}.tmp" # Not listed as a partition (other suffix)
+        save_args = self._dataset_config.get("save_args", {})
+        self._filesystem.makedirs(self._filesystem._parent(partition), exist_ok=True)
+        try:
+            with self._filesystem.open(tmp_path, "wb") as f:
+                rows = write_parquet_chunks(hashed(chunks), f, save_args)
+        except Exception as e:
+            logger.error(f"Error writing partition {partition_id} in chunks: {e}")
+            rows = 0
+        if not rows:
+            if self._filesystem.exists(tmp_path):
+                self._filesystem.rm(tmp_path)
+            logger.warning(f"Partition {partition_id} has no data. Skipping save.")
+            return None
+
+        if manifest.get(partition_id, {}).get("hash") == digest.hexdigest() and self._filesystem.exists(partition):
+            self._filesystem.rm(tmp_path)
+            return False
+        self._filesystem.mv(tmp_path, partition)
+        manifest[partition_id] = {
+            "hash": digest.hexdigest(),
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+        }
+        return True
+
+    def save(self, data: dict[str, Any]) -> None:
+        if self._overwrite and self._filesystem.exists(self._normalized_path):
+            self._filesystem.rm(self._normalized_path, recursive=True)
+
+        manifest = self.load_manifest()
+        written, skipped = [], []
+
+        for partition_id, partition_data in sorted(data.items()):
+            if callable(partition_data) and self._save_lazily:
+                partition_data = partition_data()  # noqa: PLW2901
+            if partition_data is None:
+                logger.warning(f"Partition {partition_id} has no data. Skipping save.")
+                continue
+            if isinstance(partition_data, Iterator):
+                changed = self._save_chunks(partition_id, partition_data, manifest)
+                if changed is not None:
+                    (written if changed else skipped).append(partition_id)
+                    record_source(manifest, partition_id, data)
+                continue
+
+            partition = self._partition_to_path(partition_id)
+            digest = hash_partition(partition_data)
+            if manifest.get(partition_id, {}).get("hash") == digest and self._filesystem.exists(partition):
+                skipped.append(partition_id)
+                record_source(manifest, partition_id, data)
+                continue
+
+            kwargs = deepcopy(self._dataset_config)
+            kwargs[self._filepath_arg] = self._join_protocol(partition)
+            dataset = self._dataset_type(**kwargs)  # type: ignore
+            dataset.save(partition_data)
+            manifest[partition_id] = {
+                "hash": digest,
+                "updated_at": datetime.now(timezone.utc).isoformat(),
+            }
+            written.append(partition_id)
+            record_source(manifest, partition_id, data)
+
+        self._save_manifest(manifest)
+        self._invalidate_caches()
+        logger.info(f"Saved {len(written)} changed partition(s) to {self._path}, skipped {len(skipped)} unchanged")
+
+
+def read_manifest(filesystem: Any, path: str) -> dict[str, dict[str, str]]:
+    """
+    Read a partition manifest.
+
+    Args:
+        filesystem (Any): fsspec filesystem.
+        path (str): Path of the manifest file.
+
+    Returns:
+        dict[str, dict[str, str]]: Manifest entries keyed by partition, empty if missing.
+    """
+    if not filesystem.exists(path):
+        return {}
+    with filesystem.open(path, "r") as f:
+        return json.load(f).get("partitions", {})
+
+
+class PartitionManifestDataset(AbstractDataset[None, dict[str, str]]):
+    """
+    Read-only view of the manifest written by `ManifestPartitionedDataset`.
+
+    Loads the content hash of every partition, so nodes can compare it with the hashes
+    they processed before. With `field: source`, loads instead the upstream hash each
+    partition was computed from (see `SourcedPartitions`), for the partitions that have
+    one. Loads an empty dict when no manifest exists yet.
+
+    Args:
+        path (str): Path of the partitioned dataset (the manifest is stored inside it).
+        field (str): Manifest field to load, 'hash' or 'source'.
+    """
+
+    def __init__(self, path: str, field: str = "hash", metadata: dict[str, Any] = None):
+        self._partitioned = ManifestPartitionedDataset(path=path, dataset="pandas.ParquetDataset")
+        self._path = path
+        self._field = field
+        self.metadata = metadata
+
+    def load(self) -> dict[str, str]:
+        manifest = self._partitioned.load_manifest()
+        return {partition: entry[self._field] for partition, entry in manifest.items() if self._field in entry}
+
+    def save(self, data: None) -> None:
+        raise DatasetError(f"{self.__class__.__name__} is read-only")
+
+    def _describe(self) -> dict[str, Any]:
+        return {"path": self._path, "field": self._field}
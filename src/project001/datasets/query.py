@@ -0,0 +1,199 @@
+import re
+from pathlib import Path
+from typing import Any, Optional, Union
+
+from kedro.io.core import AbstractDataset, DatasetError
+
+from project001.config.logging_config import get_logging_config
+
+logger = get_logging_config(pipeline_name="datasets")
+
+DEFAULT_LAYERS = ("01_raw", "02_intermediate", "03_primary")
+PARTITION_COLUMN = "partition" # Partition id (file name) of flat partitioned datasets
+
+
+def _import_duckdb():
+    """Import DuckDB, an optional dependency (`pip install project001[query]`)."""
+    try:
+        import duckdb
+    except ImportError as e:
+        raise ImportError("DataQuery requires DuckDB. Install it with `pip install project001[query]`.") from e
+    return duckdb
+
+
+def view_name(layer: str, dataset: str) -> str:
+    """
+    Name of the view of a dataset, without the numeric prefix of its layer.
+
+    Args:
+        layer (str): Layer directory (e.g., '03_primary').
+        dataset (str): Dataset directory (e.g., 'stock').
+
+    Returns:
+        str: View name (e.g., 'primary_stock').
+    """
+    layer = re.sub(r"^\d+_", "", layer)
+    return re.sub(r"\W", "_", f"{layer}_{dataset}")
+
+
+class DataQuery:
+    """
+    SQL access to the layered data directory through DuckDB views.
+
+    Every dataset directory of the layers (e.g., `data/03_primary/stock`) is registered as
+    a view named after its layer and directory (`primary_stock`). Flat partitioned
+    datasets (one parquet file per ticker) get a `partition` column with the partition id
+    (e.g., 'EMBR3_SA'); hive-partitioned datasets (`ConsolidatedParquetDataset`) expose
+    their partition columns. Views read the parquet files on demand, so DuckDB only
+    scans the columns and row groups a query needs, and results can be returned as
+    pandas or Arrow without materializing the whole history.
+
+    Example:
+        with DataQuery("data") as query:
+            query.to_pandas("SELECT partition, max(date) AS last_date FROM primary_stock GROUP BY 1")
+
+    Args:
+        root (str): Data directory holding the layers.
+        layers (tuple[str, ...]): Layer directories to register.
+        database (str): DuckDB database (':memory:' keeps nothing on disk).
+        threads (Optional[int]): DuckDB worker threads. None uses all cores.
+    """
+
+    def __init__(
+        self,
+        root: str = "data",
+        layers: tuple[str, ...] = DEFAULT_LAYERS,
+        database: str = ":memory:",
+        threads: Optional[int] = None,
+    ):
+        duckdb = _import_duckdb()
+        self.root = Path(root)
+        self.layers = tuple(layers)
+        self.connection = duckdb.connect(database)
+        if threads:
+            self.connection.execute(f"SET threads = {int(threads)}")
+        self.views: dict[str, str] = {}
+        self.refresh()
+
+    def refresh(self) -> dict[str, str]:
+        """
+        (Re)register a view for every dataset directory containing parquet files.
+
+        Returns:
+            dict[str, str]: Path of the dataset of every view.
+        """
+        self.views = {}
+        for layer in self.layers:
+            layer_path = self.root / layer
+            if not layer_path.is_dir():
+                continue
+            for path in sorted(layer_path.iterdir()):
+                if not path.is_dir() or path.name.startswith((".", "_")):
+                    continue
+                source = self._source(path)
+                if source is None:
+                    continue
+                name = view_name(layer, path.name)
+                self.connection.execute(f'CREATE OR REPLACE VIEW "{name}" AS {source}')
+                self.views[name] = str(path)
+        logger.info(f"Registered {len(self.views)} views: {', '.join(self.views)}")
+        return self.views
+
+    @staticmethod
+    def _source(path: Path) -> Optional[str]:
+        """SELECT statement reading a dataset directory, None if it holds no parquet file."""
+        quoted = str(path).replace("'", "''")
+        if any(path.glob("*.parquet")):
+            return (
+                f"SELECT * EXCLUDE (filename), regexp_extract(filename, '([^/\\\\]+)\\.parquet$', 1) AS {PARTITION_COLUMN} "
+                f"FROM read_parquet('{quoted}/*.parquet', filename = true, union_by_name = true)"
+            )
+        if any(path.glob("*=*/**/*.parquet")):
+            return f"SELECT * FROM read_parquet('{quoted}/**/*.parquet', hive_partitioning = true, union_by_name = true)"
+        return
+
+    def sql(self, query: str, params: Optional[Union[list, dict]] = None) -> Any:
+        """
+        Run a query lazily.
+
+        Args:
+            query (str): SQL query over the registered views.
+            params (Optional[Union[list, dict]]): Prepared statement parameters.
+
+        Returns:
+            duckdb.DuckDBPyRelation: Relation, evaluated when converted or fetched.
+        """
+        return self.connection.sql(query, params=params)
+
+    def to_pandas(self, query: str, params: Optional[Union[list, dict]] = None) -> Any:
+        """Run a query and return a pandas DataFrame."""
+        return self.connection.execute(query, params).df()
+
+    def to_arrow(self, query: str, params: Optional[Union[list, dict]] = None) -> Any:
+        """Run a query and return a pyarrow Table."""
+        result = self.connection.execute(query, params).arrow()
+        return result.read_all() if hasattr(result, "read_all") else result # DuckDB>=1.4 returns a RecordBatchReader
+
+    def close(self) -> None:
+        """Close the DuckDB connection."""
+        self.connection.close()
+
+    def __enter__(self) -> "DataQuery":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class DuckDBQueryDataset(AbstractDataset[None, Any]):
+    """
+    Read-only dataset returning the result of a SQL query over the data directory.
+
+    The query runs on the views of `DataQuery`, so nodes can load aggregates (e.g., the
+    last close per ticker) without loading the partitioned datasets.
+
+    Example catalog entry:
+        last_close:
+          type: project001.datasets.DuckDBQueryDataset
+          sql: >
+            SELECT partition AS ticker, arg_max(close, date) AS close
+            FROM primary_stock GROUP BY 1
+
+    Args:
+        sql (str): SQL query.
+        root (str): Data directory holding the layers.
+        layers (tuple[str, ...]): Layer directories registered as views.
+        params (Optional[Union[list, dict]]): Prepared statement parameters.
+        output (str): 'pandas' or 'arrow'.
+        metadata (Optional[dict[str, Any]]): Kedro metadata.
+    """
+
+    def __init__(
+        self,
+        sql: str,
+        root: str = "data",
+        layers: tuple[str, ...] = DEFAULT_LAYERS,
+        params: Optional[Union[list, dict]] = None,
+        output: str = "pandas",
+        metadata: Optional[dict[str, Any]] = None,
+    ):
+        if output not in ("pandas", "arrow"):
+            raise DatasetError(f"Unsupported output '{output}', expected 'pandas' or 'arrow'")
+        self._sql = sql
+        self._root = root
+        self._layers = tuple(layers)
+        self._params = params
+        self._output = output
+        self.metadata = metadata
+
+    def load(self) -> Any:
+        with DataQuery(self._root, self._layers) as query:
+            if self._output == "arrow":
+                return query.to_arrow(self._sql, self._params)
+            return query.to_pandas(self._sql, self._params)
+
+    def save(self, data: None) -> None:
+        raise DatasetError(f"{self.__class__.__name__} is read-only")
+
+    def _describe(self) -> dict[str, Any]:
+        return {"sql": self._sql, "root": self._root, "layers": self._layers, "output": self._output}
@@ -1,6 +1,8 @@
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Optional
+from functools import partial
+from typing import Callable, Iterator, Optional, Union
 
 import pandas as pd
 import requests
@@ -8,12 +10,16 @@ import yfinance as yf
 
 from project001.config.logging_config import get_logging_config
 from project001.utils import typing as personal_typing
+from project001.utils.cache import ResponseCache
+from project001.utils.http import build_session
 
 # typing
 StockFetcher = personal_typing.StockFetcher # Type alias for stock fetcher function
+BatchStockFetcher = personal_typing.BatchStockFetcher # Type alias for batched stock fetcher function
 NewsFetcher = personal_typing.NewsFetcher # Type alias for news fetcher function
 IngestFrames = personal_typing.IngestFrames # Type alias for ingest frames function
 TickersFrames = personal_typing.TickersFrames # Type alias for tickers frames function
+StoredPartitions = dict[str, Callable[[], pd.DataFrame]] # Loaders of the partitions stored by earlier runs
 
 @dataclass
 class IngestConfig:
@@ -25,29 +31,63 @@ class IngestConfig:
         days_back (int): Number of days to look back.
         api_key (str): NewsAPI key.
         period (str): Historical period for stock data.
+        max_workers (int): Maximum number of concurrent fetches. 1 runs serially.
+        stock_batch_size (int): Tickers per bulk Yahoo download. 0 fetches one ticker per request.
+        incremental (bool): Fetch only the data missing from the stored raw partitions.
+        news_max_pages (int): Maximum NewsAPI result pages per company.
+        http_pool_size (int): Pooled connections kept per host.
+        http_retries (int): Retries for transient HTTP errors (429/5xx).
+        http_backoff (float): Exponential backoff factor between retries, in seconds.
+        http_timeout (float): Timeout of a single HTTP request, in seconds.
+        news_rate_limit (float): Maximum NewsAPI requests per second. 0 disables the limit.
+        news_burst (int): NewsAPI requests allowed in a burst.
+        cache_enabled (bool): Serve repeated requests from the on-disk response cache.
+        cache_dir (str): Directory of the response cache.
+        cache_ttl_hours (float): Time to live of a cached response, in hours.
+        cache_max_mb (float): Maximum size of the response cache, in megabytes.
     """
     language: str
     days_back: int
     api_key: str
     period: str
+    max_workers: int = 1
+    stock_batch_size: int = 0
+    incremental: bool = False
+    news_max_pages: int = 10
+    http_pool_size: int = 10
+    http_retries: int = 3
+    http_backoff: float = 0.5
+    http_timeout: float = 30.0
+    news_rate_limit: float = 1.0
+    news_burst: int = 5
+    cache_enabled: bool = False
+    cache_dir: str = "data/01_raw/.cache"
+    cache_ttl_hours: float = 12.0
+    cache_max_mb: float = 512.0
 
 logger = get_logging_config(pipeline_name="raw_pipeline")
 
-def _get_stock_data(ticker: str, period: str) -> Optional[pd.DataFrame]:
+NEWS_API_URL = "https://newsapi.org/v2/everything"
+NEWS_PAGE_SIZE = 100 # Maximum page size accepted by NewsAPI
+NEWS_KEY = ["url", "publishedAt", "title"] # Identifies an article, also when its url is null
+
+def _get_stock_data(ticker: str, period: str, start: Optional[str] = None) -> Optional[pd.DataFrame]:
     """
     Fetch stock data from Yahoo Finance.
 
     Args:
         ticker (str): Stock ticker symbol.
         period (str): Historical period (e.g., '1d', '5d', '1mo').
+        start (Optional[str]): First date to fetch ('YYYY-MM-DD'). Overrides `period`.
 
     Returns:
         pd.DataFrame: Stock data.
     """
     try:
-        logger.info(f"Fetching stock data for {ticker} with period '{period}'")
+        window = f"start '{start}'" if start else f"period '{period}'"
+        logger.info(f"Fetching stock data for {ticker} with {window}")
         ticker_obj = yf.Ticker(ticker)
-        stock_data = ticker_obj.history(period=period)
+        stock_data = ticker_obj.history(start=start) if start else ticker_obj.history(period=period)
         stock_data.reset_index(inplace=True) # Make that date column is not a index
         stock_data["ticker"] = ticker
         logger.info(f"Successfully retrieved stock data for {ticker}")
@@ -56,15 +96,194 @@ def _get_stock_data(ticker: str, period: str) -> Optional[pd.DataFrame]:
         logger.error(f"Failed to fetch stock data for {ticker}: {e}")
         return
 
-def _get_news_data(company: str, language: str, days_back: int, api_key: str) -> Optional[pd.DataFrame]:
+def _split_batch(wide: pd.DataFrame, tickers: list[str]) -> dict[str, pd.DataFrame]:
+    """
+    Split a bulk Yahoo Finance download into per-ticker DataFrames.
+
+    Args:
+        wide (pd.DataFrame): Download grouped by ticker (ticker on the first column level).
+        tickers (list[str]): Ticker symbols requested in the download.
+
+    Returns:
+        dict[str, pd.DataFrame]: Stock data keyed by partition name.
+    """
+    frames = {}
+    available = set(wide.columns.get_level_values(0)) if not wide.empty else set()
+
+    for ticker in tickers:
+        if ticker not in available:
+            logger.warning(f"No stock data returned for {ticker} in batch download")
+            continue
+
+        stock_data = wide[ticker].dropna(how="all")
+        if stock_data.empty:
+            logger.warning(f"No stock data returned for {ticker} in batch download")
+            continue
+
+        stock_data.columns.name = None
+        stock_data = stock_data.reset_index() # Make that date column is not a index
+        stock_data["ticker"] = ticker
+        frames[ticker.replace(".", "_")] = stock_data
+
+    return frames
+
+def _get_stock_data_batch(tickers: list[str], period: str, start: Optional[str] = None) -> dict[str, pd.DataFrame]:
+    """
+    Fetch stock data for many tickers from Yahoo Finance in a single bulk download.
+
+    Args:
+        tickers (list[str]): Stock ticker symbols.
+        period (str): Historical period (e.g., '1d', '5d', '1mo').
+        start (Optional[str]): First date to fetch ('YYYY-MM-DD'). Overrides `period`.
+
+    Returns:
+        dict[str, pd.DataFrame]: Stock data keyed by partition name, with the same
+        columns returned by `_get_stock_data`.
+    """
+    window = {"start": start} if start else {"period": period}
+    logger.info(f"Fetching stock data for {len(tickers)} tickers with {window}")
+    wide = yf.download(
+        tickers,
+        **window,
+        group_by="ticker",
+        actions=True, # Keep Dividends and Stock Splits, as Ticker.history does
+        auto_adjust=True,
+        ignore_tz=False,
+        multi_level_index=True,
+        progress=False,
+    )
+    frames = _split_batch(wide, tickers)
+    logger.info(f"Successfully retrieved stock data for {len(frames)} of {len(tickers)} tickers")
+    return frames
+
+def _chunked(items: list, size: int) -> Iterator[list]:
+    """
+    Split a list into consecutive chunks.
+
+    Args:
+        items (list): Items to split.
+        size (int): Maximum chunk size.
+
+    Returns:
+        Iterator[list]: Chunks of at most `size` items.
+    """
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def _read_watermarks(partitions: StoredPartitions, column: str) -> dict[str, pd.Timestamp]:
+    """
+    Read the last stored value of a date column for every stored partition.
+
+    Loaders that can read single columns (`ChunkedParquetLoader.read`) only decode `column`.
+
+    Args:
+        partitions (StoredPartitions): Loaders of the stored partitions, keyed by name.
+        column (str): Date column to inspect.
+
+    Returns:
+        dict[str, pd.Timestamp]: Latest date keyed by partition name. Partitions that
+        cannot be read or have no dates are left out.
+    """
+    watermarks = {}
+    for name, loader in sorted(partitions.items()):
+        try:
+            dates = (loader.read([column]) if hasattr(loader, "read") else loader())[column]
+            if not dates.empty and pd.notna(dates.max()):
+                watermarks[name] = pd.Timestamp(dates.max())
+        except Exception as e:
+            logger.warning(f"Could not read watermark from partition {name}: {e}")
+    return watermarks
+
+def _isoformat(timestamp: Optional[pd.Timestamp]) -> Optional[str]:
+    """
+    Format a watermark as the ISO 8601 timestamp accepted by NewsAPI.
+
+    Args:
+        timestamp (Optional[pd.Timestamp]): Watermark to format.
+
+    Returns:
+        Optional[str]: ISO timestamp without timezone (UTC), or None.
+    """
+    if timestamp is None:
+        return
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.tz_convert("UTC").tz_localize(None)
+    return timestamp.strftime("%Y-%m-%dT%H:%M:%S")
+
+def _merge_partition(
+    stored: Callable[[], pd.DataFrame],
+    new_data: pd.DataFrame,
+    key: Union[str, list[str]],
+    sort_by: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    Merge newly fetched rows into a stored partition.
+
+    Rows from `new_data` replace stored rows with the same `key`, so a partially stored
+    last day is refreshed. Null key values compare equal, so a key that can be null
+    (e.g., the url of an article) must be combined with other columns.
+
+    Args:
+        stored (Callable[[], pd.DataFrame]): Loader of the stored partition.
+        new_data (pd.DataFrame): Newly fetched rows.
+        key (Union[str, list[str]]): Column(s) identifying a row (e.g., the date column).
+        sort_by (Optional[str]): Column to sort the result by. Defaults to `key`.
+
+    Returns:
+        pd.DataFrame: Stored and new rows, sorted by `sort_by`.
+    """
+    merged = pd.concat([stored(), new_data], ignore_index=True)
+    merged = merged.drop_duplicates(subset=key, keep="last")
+    return merged.sort_values(sort_by or key).reset_index(drop=True)
+
+def _parse_articles(articles: list[dict]) -> list[dict]:
+    """
+    Keep the relevant fields of NewsAPI articles.
+
+    Args:
+        articles (list[dict]): Articles returned by NewsAPI.
+
+    Returns:
+        list[dict]: Flattened articles.
+    """
+    return [
+        {
+            "title": article.get("title"),
+            "description": article.get("description"),
+            "url": article.get("url"),
+            "publishedAt": article.get("publishedAt"),
+            "source": article.get("source", {}).get("name"),
+            "content": article.get("content"),
+        }
+        for article in articles
+    ]
+
+def _get_news_data(
+    company: str,
+    language: str,
+    days_back: int,
+    api_key: str,
+    since: Optional[str] = None,
+    max_pages: int = 10,
+    session: Optional[requests.Session] = None,
+    timeout: float = 30.0,
+    url: str = NEWS_API_URL,
+) -> Optional[pd.DataFrame]:
     """
-    Fetch news data from NewsAPI.
+    Fetch news data from NewsAPI, following result pages.
 
     Args:
         company (str): Company name.
         language (str): News language.
         days_back (int): Number of days to look back.
         api_key (str): NewsAPI key.
+        since (Optional[str]): Only fetch articles published from this ISO timestamp on.
+            Ignored when older than the `days_back` window.
+        max_pages (int): Maximum number of result pages to request.
+        session (Optional[requests.Session]): Session used for the requests. Defaults to
+            a bare `requests.get` per page.
+        timeout (float): Timeout of a single request, in seconds.
+        url (str): NewsAPI endpoint.
 
     Returns:
         pd.DataFrame: News articles.
@@ -73,63 +292,161 @@ def _get_news_data(company: str, language: str, days_back: int, api_key: str) ->
         logger.info(f"Fetching news for '{company}' in language '{language}' from the last {days_back} days")
         end_date = datetime.now()
         start_date = end_date - timedelta(days=days_back)
+        date_from = start_date.strftime("%Y-%m-%d")
+        if since and pd.Timestamp(since).tz_localize(None) > pd.Timestamp(start_date):
+            date_from = since
+            logger.info(f"Fetching only news for '{company}' published since {since}")
 
-        url = "https://newsapi.org/v2/everything"
+        http = session or requests
         params = {
             "q": company,
             "language": language,
-            "from": start_date.strftime("%Y-%m-%d"),
+            "from": date_from,
             "to": end_date.strftime("%Y-%m-%d"),
             "apiKey": api_key,
             "sortBy": "publishedAt",
-            "pageSize": 100,
+            "pageSize": NEWS_PAGE_SIZE,
         }
 
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        news_data = response.json()
+        articles = []
+        for page in range(1, max_pages + 1):
+            try:
+                response = http.get(url, params={**params, "page": page}, timeout=timeout)
+                response.raise_for_status()
+            except requests.exceptions.HTTPError as e:
+                if page == 1:
+                    raise
+                # NewsAPI refuses pages past the plan's result limit; keep what was fetched
+                logger.warning(f"Stopped news pagination for '{company}' at page {page}: {e}")
+                break
+
+            news_data = response.json()
+            page_articles = news_data.get("articles") or []
+            articles.extend(page_articles)
 
-        if "articles" not in news_data or not news_data["articles"]:
+            total_results = news_data.get("totalResults") or 0
+            if len(page_articles) < NEWS_PAGE_SIZE or len(articles) >= total_results:
+                break
+        else:
+            logger.warning(f"Reached the limit of {max_pages} pages for '{company}'; older news may be missing")
+
+        if not articles:
             logger.warning(f"No articles found for '{company}'")
             return
 
-        news = [
-            {
-                "title": article.get("title"),
-                "description": article.get("description"),
-                "url": article.get("url"),
-                "publishedAt": article.get("publishedAt"),
-                "source": article.get("source", {}).get("name"),
-                "content": article.get("content"),
-            }
-            for article in news_data["articles"]
-        ]
+        news = _parse_articles(articles)
 
         if not news:
             logger.warning(f"No relevant news found for '{company}'")
             return
 
-        logger.info(f"Successfully retrieved news for '{company}'")
+        logger.info(f"Successfully retrieved {len(news)} news for '{company}'")
         return pd.DataFrame(news)
 
     except Exception as e:
         logger.error(f"Failed to fetch news for '{company}': {e}")
         return
 
+def _fetch_stock(stock_fetcher: StockFetcher, ticker: str, period: str, start: Optional[str] = None) -> Optional[pd.DataFrame]:
+    """
+    Run the stock fetcher for a single ticker, isolating its errors.
+
+    Args:
+        stock_fetcher (StockFetcher): Function to fetch stock data.
+        ticker (str): Stock ticker symbol.
+        period (str): Historical period for stock data.
+        start (Optional[str]): First date to fetch. Only passed to the fetcher when set.
+
+    Returns:
+        Optional[pd.DataFrame]: Stock data, or None if the fetch failed.
+    """
+    try:
+        if start:
+            return stock_fetcher(ticker, period=period, start=start)
+        return stock_fetcher(ticker, period=period)
+    except Exception as e:
+        logger.error(f"Error during stock data fetching for {ticker}: {e}")
+        return
+
+def _fetch_stock_batch(batch_stock_fetcher: BatchStockFetcher, tickers: list[str], period: str, start: Optional[str] = None) -> dict[str, pd.DataFrame]:
+    """
+    Run the batched stock fetcher for a chunk of tickers, isolating its errors.
+
+    Args:
+        batch_stock_fetcher (BatchStockFetcher): Function to fetch stock data in bulk.
+        tickers (list[str]): Stock ticker symbols in the chunk.
+        period (str): Historical period for stock data.
+        start (Optional[str]): First date to fetch. Only passed to the fetcher when set.
+
+    Returns:
+        dict[str, pd.DataFrame]: Stock data keyed by partition name, empty if the fetch failed.
+    """
+    try:
+        if start:
+            return batch_stock_fetcher(tickers, period=period, start=start)
+        return batch_stock_fetcher(tickers, period=period)
+    except Exception as e:
+        logger.error(f"Error during batch stock data fetching for {tickers}: {e}")
+        return {}
+
+def _fetch_news(news_fetcher: NewsFetcher, company: str, config: IngestConfig, since: Optional[str] = None) -> Optional[pd.DataFrame]:
+    """
+    Run the news fetcher for a single company, isolating its errors.
+
+    Args:
+        news_fetcher (NewsFetcher): Function to fetch news data.
+        company (str): Company name.
+        config (IngestConfig): Configuration for news fetching.
+        since (Optional[str]): Last stored publication timestamp. Only passed to the fetcher when set.
+
+    Returns:
+        Optional[pd.DataFrame]: News data, or None if the fetch failed.
+    """
+    try:
+        if since:
+            return news_fetcher(company, config.language, config.days_back, config.api_key, since=since)
+        return news_fetcher(company, config.language, config.days_back, config.api_key)
+    except Exception as e:
+        logger.error(f"Error during news data fetching for {company}: {e}")
+        return
+
 def ingest_raw_data(
     tickers: TickersFrames,
     config: IngestConfig,
     stock_fetcher: StockFetcher = _get_stock_data,
-    news_fetcher: NewsFetcher = _get_news_data,
+    news_fetcher: Optional[NewsFetcher] = None,
+    batch_stock_fetcher: BatchStockFetcher = _get_stock_data_batch,
+    stored_stock: Optional[StoredPartitions] = None,
+    stored_news: Optional[StoredPartitions] = None,
 ) -> Optional[IngestFrames]:
     """
     Ingest raw stock and news data.
 
+    Stock and news fetches for every ticker are submitted to a thread pool bounded by
+    `config.max_workers`, so network waits overlap across tickers. A failing fetch only
+    drops that ticker's partition. When `config.stock_batch_size` is set, stock data is
+    fetched with `batch_stock_fetcher` in chunks of that many tickers instead.
+
+    When `config.cache_enabled` is set, every fetcher is wrapped by a `ResponseCache`
+    under `config.cache_dir`, so identical requests made on the same day (e.g., reruns
+    after a downstream failure) are served from disk.
+
+    When `config.incremental` is set, tickers that already have a partition in
+    `stored_stock` (the partitions of 01_raw_stock written by earlier runs) are fetched
+    from their last stored date only (the fetchers receive a `start` keyword) and the
+    new rows are merged into the stored partition. Likewise, news is requested from the
+    last stored `publishedAt` of each partition in `stored_news` (the fetcher receives a
+    `since` keyword) and merged by url, publication time and title (`NEWS_KEY`).
+
     Args:
         - tickers (TickersFrames): Mapping of ticker symbols to company names.
         - config (IngestConfig): Configuration for news fetching.
         - stock_fetcher (StockFetcher): Function to fetch stock data.
-        - news_fetcher (NewsFetcher): Function to fetch news data.
+        - news_fetcher (Optional[NewsFetcher]): Function to fetch news data. Defaults to
+          `_get_news_data` sharing one pooled, retrying and rate-limited session.
+        - batch_stock_fetcher (BatchStockFetcher): Function to fetch stock data in bulk.
+        - stored_stock (Optional[StoredPartitions]): Stored raw stock partitions, read in incremental mode.
+        - stored_news (Optional[StoredPartitions]): Stored raw news partitions, read in incremental mode.
 
     Returns:
         Optional[IngestFrames]: Stock and news data.
@@ -140,28 +457,118 @@ def ingest_raw_data(
         - days_back (int): Number of days to look back.
         - api_key (str): NewsAPI key.
         - period (str): Historical period for stock data.
+        - max_workers (int): Maximum number of concurrent fetches.
+        - stock_batch_size (int): Tickers per bulk download (0 disables batching).
+        - incremental (bool): Fetch only the days missing from stored partitions.
+        - news_max_pages, http_* and news_* (optional): NewsAPI session settings.
+        - cache_* (optional): On-disk response cache settings.
     """
-    logger.info("Starting raw data ingestion")
+    logger.info(f"Starting raw data ingestion with {config.max_workers} worker(s)")
     stock_data = {}
     news_data = {}
 
-    for ticker in tickers.keys():
-        try:
-            data = stock_fetcher(ticker, period=config.period)
+    stored_stock = stored_stock or {}
+    stored_news = stored_news or {}
+    watermarks = _read_watermarks(stored_stock, "Date") if config.incremental else {}
+    starts = {
+        ticker: watermarks[ticker.replace(".", "_")].strftime("%Y-%m-%d")
+        for ticker in tickers.keys()
+        if ticker.replace(".", "_") in watermarks
+    }
+    news_watermarks = _read_watermarks(stored_news, "publishedAt") if config.incremental else {}
+    if config.incremental:
+        logger.info(f"Incremental mode: {len(starts)} of {len(tickers)} tickers have stored stock data")
+        logger.info(f"Incremental mode: {len(news_watermarks)} of {len(tickers)} tickers have stored news data")
+
+    session = None
+    if news_fetcher is None:
+        session = build_session(
+            pool_size=max(config.http_pool_size, config.max_workers),
+            retries=config.http_retries,
+            backoff_factor=config.http_backoff,
+            rate_limit=config.news_rate_limit or None,
+            burst=config.news_burst,
+        )
+        news_fetcher = partial(
+            _get_news_data,
+            max_pages=config.news_max_pages,
+            session=session,
+            timeout=config.http_timeout,
+        )
+
+    if config.cache_enabled:
+        cache = ResponseCache(
+            config.cache_dir,
+            ttl_seconds=config.cache_ttl_hours * 3600,
+            max_bytes=int(config.cache_max_mb * 1024 ** 2),
+        )
+        stock_fetcher = cache.wrap(stock_fetcher, "stock")
+        batch_stock_fetcher = cache.wrap(batch_stock_fetcher, "stock_batch")
+        news_fetcher = cache.wrap(news_fetcher, f"news_{config.language}")
+
+    with ThreadPoolExecutor(max_workers=max(1, config.max_workers)) as executor:
+        if config.stock_batch_size > 0:
+            # Tickers with and without stored data are chunked apart so new tickers get the full period
+            stored = [ticker for ticker in tickers.keys() if ticker in starts]
+            missing = [ticker for ticker in tickers.keys() if ticker not in starts]
+            batch_futures = [
+                executor.submit(_fetch_stock_batch, batch_stock_fetcher, chunk, config.period)
+                for chunk in _chunked(missing, config.stock_batch_size)
+            ] + [
+                executor.submit(
+                    _fetch_stock_batch, batch_stock_fetcher, chunk, config.period,
+                    min(starts[ticker] for ticker in chunk),
+                )
+                for chunk in _chunked(stored, config.stock_batch_size)
+            ]
+            stock_futures = {}
+        else:
+            batch_futures = []
+            stock_futures = {
+                ticker: executor.submit(
+                    _fetch_stock, stock_fetcher, ticker, config.period, starts.get(ticker)
+                )
+                for ticker in tickers.keys()
+            }
+        news_futures = {
+            ticker: executor.submit(
+                _fetch_news, news_fetcher, company, config,
+                _isoformat(news_watermarks.get(ticker.replace(".", "_"))),
+            )
+            for ticker, company in tickers.items()
+        }
+
+        for future in batch_futures:
+            stock_data.update(future.result())
+
+        for ticker, future in stock_futures.items():
+            data = future.result()
             if data is not None:
                 stock_data[ticker.replace(".", "_")] = data
+
+        for ticker, future in news_futures.items():
+            data = future.result()
+            if data is not None:
+                news_data[ticker.replace(".", "_")] = data
+
+    if session is not None:
+        session.close()
+
+    for name in stock_data.keys() & watermarks.keys():
+        try:
+            stock_data[name] = _merge_partition(stored_stock[name], stock_data[name], "Date")
         except Exception as e:
-            logger.error(f"Error during stock data fetching for {ticker}: {e}")
+            logger.error(f"Error merging stored stock data for {name}: {e}")
+            del stock_data[name]
 
-    for ticker, company in tickers.items():
+    for name in news_data.keys() & news_watermarks.keys():
         try:
-            data = news_fetcher(
-                company, config.language, config.days_back, config.api_key
+            news_data[name] = _merge_partition(
+                stored_news[name], news_data[name], NEWS_KEY, sort_by="publishedAt"
             )
-            if data is not None:
-                news_data[ticker.replace(".", "_")] = data
         except Exception as e:
-            logger.error(f"Error during news data fetching for {company}: {e}")
+            logger.error(f"Error merging stored news data for {name}: {e}")
+            del news_data[name]
 
     logger.info("Raw data ingestion completed successfully")
     return stock_data, news_data if stock_data or news_data else None
@@ -11,6 +11,20 @@ def create_pipeline(**kwargs) -> Pipeline:
                 "days_back": "params:days_back",
                 "api_key": "news_api_key",
                 "period": "params:period",
+                "max_workers": "params:max_workers",
+                "stock_batch_size": "params:stock_batch_size",
+                "incremental": "params:incremental",
+                "news_max_pages": "params:news_max_pages",
+                "http_pool_size": "params:http_pool_size",
+                "http_retries": "params:http_retries",
+                "http_backoff": "params:http_backoff",
+                "http_timeout": "params:http_timeout",
+                "news_rate_limit": "params:news_rate_limit",
+                "news_burst": "params:news_burst",
+                "cache_enabled": "params:cache_enabled",
+                "cache_dir": "params:cache_dir",
+                "cache_ttl_hours": "params:cache_ttl_hours",
+                "cache_max_mb": "params:cache_max_mb",
             },
             outputs="ingest_config",
             name="ingest_config",
@@ -20,6 +34,8 @@ def create_pipeline(**kwargs) -> Pipeline:
             inputs={
                 "tickers": "params:tickers",
                 "config": "ingest_config",
+                "stored_stock": "01_raw_stock_stored", # partitions written to 01_raw_stock by earlier runs
+                "stored_news": "01_raw_news_stored", # partitions written to 01_raw_news by earlier runs
             },
             outputs=["01_raw_stock", "01_raw_news"],
             name="ingest_raw_data",
@@ -1,10 +1,18 @@
 
 import re
+from functools import lru_cache
+from itertools import chain
+from typing import Callable, Iterator, Optional
 
 import pandas as pd
 
 from project001.config.logging_config import get_logging_config
+from project001.config.transform_config import TransformConfig
+from project001.datasets import SourcedPartitions
 from project001.utils import typing as personal_typing
+from project001.utils.chunks import RowDeduplicator, external_sort, load_partition, partition_chunks
+from project001.utils.parallel import lazy_partitions, map_partitions, stream_partitions
+from project001.utils.polars_interop import from_pandas, import_polars, to_pandas
 
 # typing
 Transformer = personal_typing.Transformer # Type alias for transformer function
@@ -14,13 +22,70 @@ TickersFrames = personal_typing.TickersFrames # Type alias for tickers frames fu
 
 logger = get_logging_config(pipeline_name="intermediate_pipeline")
 
+ROW_COLUMN = "__row__" # Position of the row in the input, restores its index with Polars
+
+_ACRONYM_BOUNDARY = re.compile(r'([A-Z]+)([A-Z][a-z])')
+_CAMEL_BOUNDARY = re.compile(r'([a-z\d])([A-Z])')
+
 def _to_snake_case(name: str) -> str:
     """Converts a string to snake_case."""
-    name = re.sub(r'([A-Z]+)([A-Z][a-z])', r'\1_\2', name)
-    name = re.sub(r'([a-z\d])([A-Z])', r'\1_\2', name)
+    name = _ACRONYM_BOUNDARY.sub(r'\1_\2', name)
+    name = _CAMEL_BOUNDARY.sub(r'\1_\2', name)
     name = name.replace(' ', '_')
     return name.lower()
 
+@lru_cache(maxsize=256)
+def _normalize_columns(columns: tuple[str, ...]) -> tuple[str, ...]:
+    """
+    Convert a header to snake_case, once per distinct header.
+
+    Yahoo Finance and NewsAPI return the same header for every ticker, so the
+    conversion is computed once per process and reused.
+
+    Args:
+        columns (tuple[str, ...]): Column names.
+
+    Returns:
+        tuple[str, ...]: Column names in snake_case.
+    """
+    return tuple(_to_snake_case(col) for col in columns)
+
+def _normalize_column_names(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Rename the columns of a DataFrame to snake_case without copying its data.
+
+    Args:
+        df (pd.DataFrame): DataFrame to rename. It is not modified.
+
+    Returns:
+        pd.DataFrame: Shallow copy of `df` with snake_case column names.
+    """
+    df = df.copy(deep=False) # New column index only, the data blocks are shared
+    df.columns = _normalize_columns(tuple(df.columns))
+    return df
+
+def _drop_duplicates_and_nulls(df: pd.DataFrame) -> tuple[pd.DataFrame, int, int]:
+    """
+    Drop duplicated rows and rows with null values in a single filter.
+
+    Equivalent to `df.drop_duplicates().dropna()`, but the duplicate and null masks are
+    computed once and reused for both the counts and the filter.
+
+    Args:
+        df (pd.DataFrame): DataFrame to clean.
+
+    Returns:
+        tuple[pd.DataFrame, int, int]: Cleaned DataFrame, number of duplicated rows and
+            number of null values.
+    """
+    duplicated = df.duplicated().to_numpy() # Rows repeating an earlier row
+    null = df.isna().to_numpy() # Null values, cell by cell
+
+    keep = ~(duplicated | null.any(axis=1))
+    if keep.all():
+        return df, 0, int(null.sum())
+    return df.loc[keep], int(duplicated.sum()), int(null.sum())
+
 def _transform_data(df: pd.DataFrame, ticker: str) -> pd.DataFrame:
     """
     Transform data from pipeline 01_raw.
@@ -35,16 +100,13 @@ def _transform_data(df: pd.DataFrame, ticker: str) -> pd.DataFrame:
 
     try:
         logger.info(f"Transforming data for ticker {ticker}.")
-        df = df.copy()
 
         logger.info("Converting columns to snake_case.")
-        df.columns = [_to_snake_case(col) for col in df.columns]
+        df = _normalize_column_names(df)
         logger.info("Columns names transformed.")
 
         logger.info("Removing duplicated and null values.")
-        qt_duplicated = df.duplicated().sum() # Count duplicated rows
-        qt_null = df.isnull().sum().sum() # Count null values
-        df = df.drop_duplicates().dropna() # Drop duplicated rows and null
+        df, qt_duplicated, qt_null = _drop_duplicates_and_nulls(df)
         logger.info(f"Removed {qt_duplicated} duplicated rows and {qt_null} null values.")
 
         # Sort DataFrame by available date column
@@ -62,55 +124,248 @@ def _transform_data(df: pd.DataFrame, ticker: str) -> pd.DataFrame:
         logger.error(f"Error transforming DataFrame for ticker {ticker}: {e}")
         raise e
 
-def ingest_transformed_data(tickers: TickersFrames, raw_stock: IngestFrames, raw_news: IngestFrames, transformer: Transformer = _transform_data) -> IngestFrames:
+def _transform_data_polars(df: pd.DataFrame, ticker: str) -> pd.DataFrame:
+    """
+    Transform data from pipeline 01_raw with a Polars lazy query.
+
+    Same output as `_transform_data` (columns, dtypes, index and row order): columns are
+    converted to snake_case, duplicated rows and rows with null values are removed and
+    the data is sorted by its date column. The filter and the sort run in a single
+    optimized query on all cores.
+
+    Args:
+        df (pd.DataFrame): DataFrame from pipeline 01_raw.
+        ticker (str): Ticker of stock.
+
+    Returns:
+        pd.DataFrame: DataFrame with transformed data.
+    """
+    pl = import_polars()
+    try:
+        logger.info(f"Transforming data for ticker {ticker} with Polars.")
+        columns = list(_normalize_columns(tuple(df.columns)))
+        frame = from_pandas(df).rename(dict(zip(map(str, df.columns), columns))).with_row_index(ROW_COLUMN)
+
+        values = pl.all().exclude(ROW_COLUMN)
+        counts = frame.select(
+            (pl.len() - pl.struct(values).is_first_distinct().sum()).alias("duplicated"),
+            pl.sum_horizontal(values.null_count()).alias("null"),
+        ).row(0)
+        logger.info(f"Removed {counts[0]} duplicated rows and {counts[1]} null values.")
+
+        query = frame.lazy().filter(pl.struct(values).is_first_distinct() & ~pl.any_horizontal(values.is_null()))
+        date_column = next((col for col in ["date", "published_at"] if col in columns), None)
+        if date_column:
+            query = query.sort(date_column, maintain_order=True)
+
+        result = to_pandas(query.collect(), dtypes=dict(zip(columns, df.dtypes)))
+        rows = result.pop(ROW_COLUMN).to_numpy()
+        result.index = df.index[rows]
+        logger.info(f"Transformed stock data for ticker {ticker}")
+        return result
+
+    except Exception as e:
+        logger.error(f"Error transforming DataFrame for ticker {ticker}: {e}")
+        raise e
+
+def _transform_partition(
+    loader: Callable[[], pd.DataFrame],
+    ticker_name: str,
+    ticker: str,
+    transformer: Transformer,
+    kind: str,
+    arrow_strings: bool = False,
+) -> Optional[pd.DataFrame]:
+    """
+    Load and transform a single partition, isolating its errors.
+
+    Args:
+        loader (Callable[[], pd.DataFrame]): Loader of the partition from pipeline 01_raw.
+        ticker_name (str): Partition name of the ticker.
+        ticker (str): Ticker of stock.
+        transformer (Transformer): Function to transform data.
+        kind (str): Kind of data ('stock' or 'news'), used in logs.
+        arrow_strings (bool): Load text columns as 'string[pyarrow]' (see `load_partition`).
+
+    Returns:
+        Optional[pd.DataFrame]: Transformed data, or None if it was empty or failed.
+    """
+    try:
+        df = load_partition(loader, arrow_strings)
+        if df is not None and not df.empty:
+            df = transformer(df, ticker)
+            logger.info(f"Successfully transformed {kind} data for {ticker_name}.")
+            return df
+        logger.warning(f"{kind.capitalize()} data for {ticker_name} is empty or None. Skipping transformation.")
+    except Exception as e:
+        logger.error(f"Error loading or transforming {kind} data for {ticker_name}: {e}")
+    return
+
+def _stream_partition(
+    loader: Callable[[], pd.DataFrame],
+    ticker_name: str,
+    ticker: str,
+    kind: str,
+    chunk_size: int,
+    arrow_strings: bool = False,
+) -> Iterator[pd.DataFrame]:
+    """
+    Transform a partition chunk by chunk, with the same rows as `_transform_data`.
+
+    Every chunk is renamed to snake_case and cleaned of duplicated and null rows. The
+    chunks are then sorted by the date column across the whole partition with
+    `external_sort`, and rows repeating a row of an earlier chunk are dropped with
+    `RowDeduplicator` while the sorted chunks stream out, holding only the rows of the
+    current date. The output does not depend on how the input was chunked.
+
+    Args:
+        loader (Callable[[], pd.DataFrame]): Loader of the partition from pipeline 01_raw.
+        ticker_name (str): Partition name of the ticker.
+        ticker (str): Ticker of stock.
+        kind (str): Kind of data ('stock' or 'news'), used in logs.
+        chunk_size (int): Rows per chunk.
+        arrow_strings (bool): Load text columns as 'string[pyarrow]' (see `load_partition`).
+
+    Yields:
+        pd.DataFrame: Transformed chunks, in date order.
+    """
+    logger.info(f"Streaming {kind} data for ticker {ticker} in chunks of {chunk_size} rows.")
+    counts = {"rows": 0, "duplicated": 0, "null": 0}
+    date_column = None
+
+    def cleaned() -> Iterator[pd.DataFrame]:
+        nonlocal date_column
+        for chunk in partition_chunks(loader, chunk_size, arrow_strings):
+            counts["rows"] += len(chunk)
+            chunk = _normalize_column_names(chunk)
+            chunk, qt_duplicated, qt_null = _drop_duplicates_and_nulls(chunk)
+            counts["duplicated"] += qt_duplicated
+            counts["null"] += qt_null
+            date_column = next((col for col in ["date", "published_at"] if col in chunk.columns), None)
+            yield chunk
+
+    chunks = cleaned()
+    first = next(chunks, None)
+    if first is None:
+        logger.warning(f"{kind.capitalize()} data for {ticker_name} is empty or None. Skipping transformation.")
+        return
+    chunks = chain([first], chunks)
+    deduplicator = RowDeduplicator(date_column)
+    for chunk in external_sort(chunks, date_column, chunk_size) if date_column else chunks:
+        chunk, qt_repeated = deduplicator.filter(chunk)
+        counts["duplicated"] += qt_repeated
+        if not chunk.empty:
+            yield chunk
+    logger.info(
+        f"Streamed {counts['rows']} {kind} rows for {ticker_name}: removed {counts['duplicated']} "
+        f"duplicated rows and {counts['null']} null values."
+    )
+
+def ingest_transformed_data(
+    tickers: TickersFrames,
+    raw_stock: IngestFrames,
+    raw_news: IngestFrames,
+    transformer: Transformer = _transform_data,
+    config: Optional[TransformConfig] = None,
+    raw_stock_manifest: Optional[dict[str, str]] = None,
+    raw_news_manifest: Optional[dict[str, str]] = None,
+    stock_sources: Optional[dict[str, str]] = None,
+    news_sources: Optional[dict[str, str]] = None,
+) -> IngestFrames:
     """
     Transform raw data from pipeline 01_raw.
 
+    Outputs are `SourcedPartitions`: the dataset records the raw hash of every partition
+    it saves, which the next run loads as `stock_sources` and `news_sources`. When
+    `config.only_changed` is set, partitions whose raw hash matches the recorded one are
+    skipped, so only changed partitions are returned (and written). With
+    `config.max_workers` > 1, partitions are loaded and transformed in a process pool
+    (`transformer` must then be picklable). With `config.lazy`, a callable is returned
+    per partition instead, so partitions are transformed when Kedro saves the outputs
+    and written one at a time; with `config.max_workers` > 1 too, the pool transforms
+    the next partitions while one is written, holding about `max_workers` + 1 of them. A
+    partition that fails resolves to None and is skipped by the dataset. With
+    `config.arrow_strings`, text columns are read as 'string[pyarrow]'.
+    With `config.backend` 'polars', the default transformer is replaced by
+    `_transform_data_polars`. With `config.chunk_size`, the default transformer streams
+    every partition in chunks (`_stream_partition`), so a partition is never held in
+    memory whole; custom transformers keep loading whole partitions.
+
     Args:
         tickers (TickersFrames): Mapping of ticker symbols to company names.
         raw_stock (IngestFrames): Stock data from pipeline 01_raw.
         raw_news (IngestFrames): News data from pipeline 01_raw.
         transformer (Transformer): Function to transform data.
+        config (Optional[TransformConfig]): Configuration of the stage.
+        raw_stock_manifest (Optional[dict[str, str]]): Content hash of each raw stock partition.
+        raw_news_manifest (Optional[dict[str, str]]): Content hash of each raw news partition.
+        stock_sources (Optional[dict[str, str]]): Raw hash each stored stock output was computed from.
+        news_sources (Optional[dict[str, str]]): Raw hash each stored news output was computed from.
 
     Returns:
         IngestFrames: Transformed data.
     """
     logger.info("Starting data transformation")
+    config = config or TransformConfig()
+    max_workers = config.max_workers
+    streaming = config.chunk_size is not None and transformer is _transform_data
+    if config.chunk_size is not None and not streaming:
+        logger.warning("chunk_size is only supported by the default transformer. Loading whole partitions.")
+    if config.backend == "polars" and not streaming:
+        max_workers = 1 # Polars already uses every core, and is not fork-safe
+        if transformer is _transform_data:
+            transformer = _transform_data_polars
+    if config.max_workers > 1 and (streaming or max_workers == 1):
+        mode = "chunked" if streaming else "polars"
+        logger.info(f"Ignoring max_workers={config.max_workers}: the {mode} mode runs partitions serially.")
+    sources = {
+        "stock": (raw_stock, raw_stock_manifest or {}, stock_sources or {}),
+        "news": (raw_news, raw_news_manifest or {}, news_sources or {}),
+    }
 
-    news_data = {}
-    stock_data = {}
+    news_data = SourcedPartitions()
+    stock_data = SourcedPartitions()
+    outputs = {"stock": stock_data, "news": news_data}
+    jobs = {}
 
     for ticker, company in tickers.items():
         ticker_name = ticker.replace(".", "_")
         logger.info(f"Attempting to transform data for ticker {ticker} ({ticker_name}).")
 
-        # Transform stock data
-        if ticker_name in raw_stock:
-            try:
-                stock_df = raw_stock[ticker_name]()
-                if stock_df is not None and not stock_df.empty:
-                    stock_data[ticker_name] = transformer(stock_df, ticker)
-                    logger.info(f"Successfully transformed stock data for {ticker_name}.")
-                else:
-                    logger.warning(f"Stock data for {ticker_name} is empty or None. Skipping transformation.")
-            except Exception as e:
-                logger.error(f"Error loading or transforming stock data for {ticker_name}: {e}")
-        else:
-            logger.warning(f"No stock data partition found for {ticker_name}. Skipping.")
-
-        # Transform news data
-        if ticker_name in raw_news:
-            try:
-                news_df = raw_news[ticker_name]()
-                if news_df is not None and not news_df.empty:
-                    news_data[ticker_name] = transformer(news_df, ticker)
-                    logger.info(f"Successfully transformed news data for {ticker_name}.")
-                else:
-                    logger.warning(f"News data for {ticker_name} is empty or None. Skipping transformation.")
-            except Exception as e:
-                logger.error(f"Error loading or transforming news data for {ticker_name}: {e}")
-        else:
-            logger.warning(f"No news data partition found for {ticker_name}. Skipping.")
+        for kind, (partitions, manifest, processed) in sources.items():
+            if ticker_name not in partitions:
+                logger.warning(f"No {kind} data partition found for {ticker_name}. Skipping.")
+                continue
+
+            upstream_hash = manifest.get(ticker_name)
+            if config.only_changed and upstream_hash is not None and processed.get(ticker_name) == upstream_hash:
+                logger.info(f"{kind.capitalize()} data for {ticker_name} unchanged since last run. Skipping.")
+                continue
+            if upstream_hash is not None:
+                outputs[kind].sources[ticker_name] = upstream_hash
+
+            if streaming:
+                jobs[(kind, ticker_name)] = (
+                    partitions[ticker_name], ticker_name, ticker, kind, config.chunk_size, config.arrow_strings,
+                )
+            else:
+                jobs[(kind, ticker_name)] = (
+                    partitions[ticker_name], ticker_name, ticker, transformer, kind, config.arrow_strings,
+                )
+
+    if streaming:
+        logger.info(f"Streaming {len(jobs)} partitions in chunks of {config.chunk_size} rows when they are saved.")
+        for (kind, ticker_name), partition in stream_partitions(_stream_partition, jobs).items():
+            outputs[kind][ticker_name] = partition
+    elif config.lazy:
+        logger.info(f"Deferring {len(jobs)} partitions until they are saved.")
+        jobs = {key: jobs[key] for key in sorted(jobs, key=lambda key: (list(outputs).index(key[0]), key[1]))} # Save order
+        for (kind, ticker_name), partition in lazy_partitions(_transform_partition, jobs, max_workers).items():
+            outputs[kind][ticker_name] = partition
+    else:
+        for (kind, ticker_name), df in map_partitions(_transform_partition, jobs, max_workers).items():
+            if df is not None:
+                outputs[kind][ticker_name] = df
 
     logger.info("Data transformation process completed.")
     return stock_data, news_data
@@ -1,14 +1,33 @@
 from kedro.pipeline import Node, Pipeline  # noqa
+from project001.config.transform_config import TransformConfig
 from project001.pipelines._02_intermediate.nodes import ingest_transformed_data
 
 def create_pipeline(**kwargs) -> Pipeline:
     return Pipeline([
+        Node(
+            func=TransformConfig,
+            inputs={
+                "only_changed": "params:only_changed",
+                "max_workers": "params:transform_workers",
+                "lazy": "params:lazy_save",
+                "arrow_strings": "params:arrow_strings",
+                "backend": "params:transform_backend",
+                "chunk_size": "params:transform_chunk_size",
+            },
+            outputs="intermediate_config",
+            name="intermediate_config",
+        ),
         Node(
             func=ingest_transformed_data,
             inputs={
                 "raw_stock": "01_raw_stock", # import from pipeline 01_raw
                 "raw_news": "01_raw_news", # import from pipeline 01_raw
                 "tickers": "params:tickers",
+                "config": "intermediate_config",
+                "raw_stock_manifest": "01_raw_stock_manifest", # content hashes written by 01_raw_stock
+                "raw_news_manifest": "01_raw_news_manifest", # content hashes written by 01_raw_news
+                "stock_sources": "02_intermediate_stock_sources", # raw hashes the stored outputs were computed from
+                "news_sources": "02_intermediate_news_sources",
             },
             outputs=["02_intermediate_stock", "02_intermediate_news"],
             name="ingest_transformed_data",
@@ -1,7 +1,14 @@
+from typing import Callable, Iterator, Optional
+
 import pandas as pd
 
 from project001.config.logging_config import get_logging_config
+from project001.config.transform_config import TransformConfig
+from project001.datasets import SourcedPartitions
+from project001.pipelines._03_primary.plan import TransformerPlan, default_plans
 from project001.utils import typing as personal_typing
+from project001.utils.chunks import load_partition, partition_chunks
+from project001.utils.parallel import lazy_partitions, map_partitions, stream_partitions
 
 # typing
 Transformer = personal_typing.Transformer # Type alias for transformer function
@@ -11,174 +18,161 @@ TransformerPipeline = personal_typing.TransformerPipeline # Type alias for trans
 
 logger = get_logging_config(pipeline_name="test_pipeline_03_primary")
 
-def _remove_columns(columns: list) -> pd.DataFrame:
-    """
-    Remove columns from a DataFrame.
-
-    Args:
-        columns (list): A list of column names to be removed.
-
-    Returns:
-        pd.DataFrame: The DataFrame with specified columns removed.
+def _transform_partition(
+    loader: Callable[[], pd.DataFrame],
+    ticker: str,
+    kind: str,
+    plan: TransformerPlan,
+    arrow_strings: bool = False,
+    backend: str = "pandas",
+) -> Optional[pd.DataFrame]:
     """
-    def transformers(df: pd.DataFrame) -> pd.DataFrame:
-        """
-        Remove columns from a DataFrame.
-
-        Args:
-            df (pd.DataFrame): The DataFrame from which columns will be removed.
-
-        Returns:
-            pd.DataFrame: The DataFrame with specified columns removed.
-        """
-        logger.info(f"Removing columns {columns} from DataFrame")
-        try:
-            df = df.drop(columns=columns)
-            logger.info(f"Columns {columns} removed successfully")
-            return df
-        except KeyError as e:
-            logger.error(f"Error removing columns: {e}")
-            raise
-        except Exception as e:
-            logger.error(f"Error removing columns: {e}")
-            raise
-    return transformers
-
-
-def _lower_case_text_columns(df: pd.DataFrame) -> pd.DataFrame:
-    """
-    Convert text columns in a DataFrame to lowercase.
+    Load and transform a single partition, isolating its errors.
 
     Args:
-        df (pd.DataFrame): The DataFrame whose text columns will be converted to lowercase.
+        loader (Callable[[], pd.DataFrame]): Loader of the partition from pipeline 02_intermediate.
+        ticker (str): Ticker of stock.
+        kind (str): Kind of data ('stock' or 'news').
+        plan (TransformerPlan): Transformer plan of the kind of data.
+        arrow_strings (bool): Load text columns as 'string[pyarrow]' (see `load_partition`).
+        backend (str): 'pandas' (`TransformerPlan.apply`) or 'polars' (`TransformerPlan.apply_polars`).
 
     Returns:
-        pd.DataFrame: The DataFrame with text columns in lowercase.
+        Optional[pd.DataFrame]: Transformed data, or None if it failed.
     """
-    logger.info("Converting text columns to lowercase")
     try:
-        object_cols = df.select_dtypes(include=["object"]).columns
-        df[object_cols] = df[object_cols].apply(lambda x: x.str.lower())
-        logger.info("Text columns converted to lowercase successfully")
-        return df
+        df = load_partition(loader, arrow_strings)
+        return plan.apply_polars(df) if backend == "polars" else plan.apply(df)
     except Exception as e:
-        logger.error(f"Error converting text columns to lowercase: {e}")
-        raise
-
-def _round_numeric_columns(df: pd.DataFrame) -> pd.DataFrame:
+        logger.error(f"Error transforming {kind} data for ticker {ticker}: {e}")
+        return
+
+def _stream_partition(
+    loader: Callable[[], pd.DataFrame],
+    ticker: str,
+    kind: str,
+    plan: TransformerPlan,
+    chunk_size: int,
+    arrow_strings: bool = False,
+) -> Iterator[pd.DataFrame]:
     """
-    Round numeric columns in a DataFrame to 2 decimal places.
+    Transform a partition chunk by chunk.
 
-    Args:
-        df (pd.DataFrame): The DataFrame whose numeric columns will be rounded.
-
-    Returns:
-        pd.DataFrame: The DataFrame with numeric columns rounded.
-    """
-    logger.info("Rounding numeric columns")
-    try:
-        float_columns = df.select_dtypes(include=["float64"]).columns
-        df[float_columns] = df[float_columns].round(2)
-        logger.info("Numeric columns rounded successfully")
-        return df
-    except Exception as e:
-        logger.error(f"Error rounding numeric columns: {e}")
-        raise
-
-def _format_date_columns(df: pd.DataFrame) -> pd.DataFrame:
-    """
-    Format date columns in a DataFrame to a specified date format.
-
-    Args:
-        df (pd.DataFrame): The DataFrame whose date columns will be formatted.
-
-    Returns:
-        pd.DataFrame: The DataFrame with date columns formatted.
-    """
-    logger.info("Formatting date columns")
-    try:
-        date_columns = [col for col in ["date", "published_at"] if col in df.columns]
-        for col in date_columns:
-            df[col] = pd.to_datetime(df[col], errors="coerce").dt.strftime("%Y-%m-%d")
-        logger.info("Date columns formatted successfully")
-        return df
-    except Exception as e:
-        logger.error(f"Error formatting date columns: {e}")
-        raise
-
-def _apply_transformers(df: pd.DataFrame, transformers: list[Transformer]) -> pd.DataFrame:
-    """
-    Apply a list of transformers to a DataFrame.
+    The plan only has column-wise, row-by-row operations, so every chunk is transformed
+    on its own and the chunks keep the order (sorted by date in 02_intermediate) of the
+    input.
 
     Args:
-        df (pd.DataFrame): The DataFrame to transform.
-        transformers (list[Transformer]): The list of transformers to apply.
-
-    Returns:
-        pd.DataFrame: The transformed DataFrame.
+        loader (Callable[[], pd.DataFrame]): Loader of the partition from pipeline 02_intermediate.
+        ticker (str): Ticker of stock.
+        kind (str): Kind of data ('stock' or 'news'), used in logs.
+        plan (TransformerPlan): Transformer plan of the kind of data.
+        chunk_size (int): Rows per chunk.
+        arrow_strings (bool): Load text columns as 'string[pyarrow]' (see `load_partition`).
+
+    Yields:
+        pd.DataFrame: Transformed chunks.
     """
-    for transformer in transformers:
-        df = transformer(df)
-    return df
+    logger.info(f"Streaming {kind} data for ticker {ticker} in chunks of {chunk_size} rows.")
+    for chunk in partition_chunks(loader, chunk_size, arrow_strings):
+        yield plan.apply(chunk)
 
 def ingest_transformed_data(
     tickers: TickersFrames,
     intermediate_stock: IngestFrames,
-    intermediate_news: IngestFrames) -> IngestFrames:
+    intermediate_news: IngestFrames,
+    config: Optional[TransformConfig] = None,
+    intermediate_stock_manifest: Optional[dict[str, str]] = None,
+    intermediate_news_manifest: Optional[dict[str, str]] = None,
+    stock_sources: Optional[dict[str, str]] = None,
+    news_sources: Optional[dict[str, str]] = None,
+    plans: Optional[dict[str, TransformerPlan]] = None) -> IngestFrames:
     """
     Transform intermediate stock and news data.
 
+    Outputs are `SourcedPartitions`: the dataset records the intermediate hash of every
+    partition it saves, which the next run loads as `stock_sources` and `news_sources`.
+    When `config.only_changed` is set, partitions whose intermediate hash matches the
+    recorded one are skipped. With `config.max_workers` > 1, partitions are loaded and
+    transformed in a process pool. With `config.lazy`, a callable is returned per
+    partition instead, so partitions are transformed when Kedro saves the outputs and
+    written one at a time; with `config.max_workers` > 1 too, the pool transforms the
+    next partitions while one is written, holding about `max_workers` + 1 of them. With
+    `config.chunk_size`, every partition is streamed in chunks instead (`_stream_partition`).
+
+    Every partition is transformed by the `TransformerPlan` of its kind of data, built
+    once for the whole run; `default_plans()` are used when `plans` is not given. With
+    `config.arrow_strings`, text columns are read as 'string[pyarrow]'.
+    With `config.backend` 'polars', plans run as Polars queries, serially (not when streaming).
+
     Args:
         tickers (TickersFrames): The tickers data.
         intermediate_stock (IngestFrames): The intermediate stock data.
         intermediate_news (IngestFrames): The intermediate news data.
+        config (Optional[TransformConfig]): Configuration of the stage.
+        intermediate_stock_manifest (Optional[dict[str, str]]): Content hash of each intermediate stock partition.
+        intermediate_news_manifest (Optional[dict[str, str]]): Content hash of each intermediate news partition.
+        stock_sources (Optional[dict[str, str]]): Intermediate hash each stored stock output was computed from.
+        news_sources (Optional[dict[str, str]]): Intermediate hash each stored news output was computed from.
+        plans (Optional[dict[str, TransformerPlan]]): Transformer plan of each kind of data ('stock', 'news').
 
     Returns:
         IngestFrames: The transformed stock and news data.
     """
     logger.info("Transforming intermediate data")
-
-    news_data = {}
-    stock_data = {}
+    config = config or TransformConfig()
+    plans = {**default_plans(), **(plans or {})}
+    max_workers = 1 if config.backend == "polars" else config.max_workers # Polars already uses every core, and is not fork-safe
+    if config.max_workers > 1 and (config.chunk_size is not None or max_workers == 1):
+        mode = "chunked" if config.chunk_size is not None else "polars"
+        logger.info(f"Ignoring max_workers={config.max_workers}: the {mode} mode runs partitions serially.")
+    sources = {
+        "stock": (intermediate_stock, intermediate_stock_manifest or {}, stock_sources or {}),
+        "news": (intermediate_news, intermediate_news_manifest or {}, news_sources or {}),
+    }
+
+    news_data = SourcedPartitions()
+    stock_data = SourcedPartitions()
+    outputs = {"stock": stock_data, "news": news_data}
+    jobs = {}
 
     for ticker, company in tickers.items():
         ticker_name = ticker.replace(".", "_")
         logger.info(f"Attempting to transform data for ticker {ticker}.")
 
-        stock_transformers = [
-            _remove_columns(["ticker"]),
-            _lower_case_text_columns,
-            _round_numeric_columns,
-            _format_date_columns,
-        ]
-
-        news_transformers = [
-            _remove_columns(["url"]),
-            _lower_case_text_columns,
-            _format_date_columns,
-        ]
-
-
-        if ticker_name in intermediate_stock:
-            try:
-                stock_df = intermediate_stock[ticker_name]()
-                stock_df = _apply_transformers(stock_df, stock_transformers)
-                stock_data[ticker_name] = stock_df
-            except Exception as e:
-                logger.error(f"Error transforming stock data for ticker {ticker}: {e}")
-        else:
-            logger.warning(f"No stock data found for ticker {ticker}.")
-            continue
-
-        if ticker_name in intermediate_news:
-            try:
-                news_df = intermediate_news[ticker_name]()
-                news_df = _apply_transformers(news_df, news_transformers)
-                news_data[ticker_name] = news_df
-            except Exception as e:
-                logger.error(f"Error transforming news data for ticker {ticker}: {e}")
-        else:
-            logger.warning(f"No news data found for ticker {ticker}.")
-            continue
+        for kind, (partitions, manifest, processed) in sources.items():
+            if ticker_name not in partitions:
+                logger.warning(f"No {kind} data found for ticker {ticker}.")
+                continue
+
+            upstream_hash = manifest.get(ticker_name)
+            if config.only_changed and upstream_hash is not None and processed.get(ticker_name) == upstream_hash:
+                logger.info(f"{kind.capitalize()} data for ticker {ticker} unchanged since last run. Skipping.")
+                continue
+            if upstream_hash is not None:
+                outputs[kind].sources[ticker_name] = upstream_hash
+
+            if config.chunk_size is not None:
+                jobs[(kind, ticker_name)] = (
+                    partitions[ticker_name], ticker, kind, plans[kind], config.chunk_size, config.arrow_strings,
+                )
+            else:
+                jobs[(kind, ticker_name)] = (
+                    partitions[ticker_name], ticker, kind, plans[kind], config.arrow_strings, config.backend,
+                )
+
+    if config.chunk_size is not None:
+        logger.info(f"Streaming {len(jobs)} partitions in chunks of {config.chunk_size} rows when they are saved.")
+        for (kind, ticker_name), partition in stream_partitions(_stream_partition, jobs).items():
+            outputs[kind][ticker_name] = partition
+    elif config.lazy:
+        logger.info(f"Deferring {len(jobs)} partitions until they are saved.")
+        jobs = {key: jobs[key] for key in sorted(jobs, key=lambda key: (list(outputs).index(key[0]), key[1]))} # Save order
+        for (kind, ticker_name), partition in lazy_partitions(_transform_partition, jobs, max_workers).items():
+            outputs[kind][ticker_name] = partition
+    else:
+        for (kind, ticker_name), df in map_partitions(_transform_partition, jobs, max_workers).items():
+            if df is not None:
+                outputs[kind][ticker_name] = df
 
     return stock_data, news_data
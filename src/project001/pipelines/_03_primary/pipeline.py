@@ -1,14 +1,41 @@
 from kedro.pipeline import Node, Pipeline  # noqa
+from project001.config.transform_config import TransformConfig
 from project001.pipelines._03_primary.nodes import ingest_transformed_data
+from project001.pipelines._03_primary.plan import build_transformer_plans
 
 def create_pipeline(**kwargs) -> Pipeline:
     return Pipeline([
+        Node(
+            func=TransformConfig,
+            inputs={
+                "only_changed": "params:only_changed",
+                "max_workers": "params:transform_workers",
+                "lazy": "params:lazy_save",
+                "arrow_strings": "params:arrow_strings",
+                "backend": "params:transform_backend",
+                "chunk_size": "params:transform_chunk_size",
+            },
+            outputs="primary_config",
+            name="primary_config",
+        ),
+        Node(
+            func=build_transformer_plans,
+            inputs="params:primary_transformer_plans",
+            outputs="primary_transformer_plans",
+            name="primary_transformer_plans",
+        ),
         Node(
             ingest_transformed_data,
             inputs={
                 "tickers": "params:tickers",
                 "intermediate_stock": "02_intermediate_stock",
                 "intermediate_news": "02_intermediate_news",
+                "config": "primary_config",
+                "intermediate_stock_manifest": "02_intermediate_stock_manifest",
+                "intermediate_news_manifest": "02_intermediate_news_manifest",
+                "stock_sources": "03_primary_stock_sources",
+                "news_sources": "03_primary_news_sources",
+                "plans": "primary_transformer_plans",
             },
             outputs=[
                 "03_primary_stock",
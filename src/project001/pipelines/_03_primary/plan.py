@@ -0,0 +1,307 @@
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+import pandas as pd
+import pyarrow as pa
+
+from project001.config.logging_config import get_logging_config
+from project001.utils.arrow import is_text_dtype
+from project001.utils.polars_interop import from_pandas, import_polars, to_pandas
+
+logger = get_logging_config(pipeline_name="primary_pipeline")
+
+DATE32 = pd.ArrowDtype(pa.date32()) # Calendar date, written to parquet as DATE
+STEPS = ("select", "lower_case", "round", "format_dates", "assemble") # Timed steps, in execution order
+POLARS_STEPS = ("select", "query", "assemble") # Timed steps of `apply_polars`, the column steps run in one query
+
+
+def to_date32(series: pd.Series) -> pd.Series:
+    """
+    Convert a date column to calendar dates (Arrow date32).
+
+    Time-zone aware values keep their local date, as `strftime` did.
+
+    Args:
+        series (pd.Series): Date column (datetimes or date strings).
+
+    Returns:
+        pd.Series: Column of dtype `date32[pyarrow]`; unparseable values become null.
+    """
+    dates = pd.to_datetime(series, errors="coerce")
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_localize(None)
+    return pd.Series(pa.array(dates).cast(pa.date32()), index=series.index, name=series.name, dtype=DATE32)
+
+def to_utc_timestamp(series: pd.Series) -> pd.Series:
+    """
+    Convert a timestamp column to UTC datetimes.
+
+    Args:
+        series (pd.Series): Timestamp column (datetimes or ISO strings).
+
+    Returns:
+        pd.Series: Column of dtype `datetime64[ns, UTC]`; unparseable values become NaT.
+    """
+    return pd.to_datetime(series, errors="coerce", utc=True)
+
+def round_half_to_even(expression: Any, decimals: int) -> Any:
+    """
+    Round a Polars float expression as numpy does (`rint` of the scaled values).
+
+    Ties are rounded to the nearest even value, like `np.round`, whatever the Polars
+    version (`Expr.round` only takes a rounding `mode` in recent versions).
+
+    Args:
+        expression (pl.Expr): Float expression.
+        decimals (int): Decimals to keep; negative values round to tens, hundreds, etc.
+
+    Returns:
+        pl.Expr: Rounded expression. NaN and infinite values are kept.
+    """
+    pl = import_polars()
+    factor = 10.0 ** abs(decimals)
+    scaled = expression * factor if decimals >= 0 else expression / factor
+    floor = scaled.floor()
+    fraction = scaled - floor
+    odd = (floor / 2).floor() * 2 != floor
+    rounded = (
+        pl.when(fraction > 0.5).then(floor + 1)
+        .when((fraction == 0.5) & odd).then(floor + 1)
+        .when(fraction.is_nan()).then(scaled) # Infinite and NaN values
+        .otherwise(floor)
+    )
+    if decimals < 0:
+        return rounded * factor
+    return (rounded / factor).round(decimals) # Polars divides by a scalar through its reciprocal, which can be 1 ulp off
+
+
+@dataclass
+class _Selection:
+    """Columns selected by every step of a plan, for one schema."""
+    keep: list[str]
+    lower_case: frozenset[str]
+    round: frozenset[str]
+    format_dates: frozenset[str]
+
+
+@dataclass
+class TransformerPlan:
+    """
+    Declarative plan of the column transformations of pipeline 03_primary.
+
+    The steps (drop columns, lowercase text, round floats, format dates) run in a single
+    pass: the columns selected by every step are resolved once per schema (and cached),
+    then each column goes through its steps and the output frame is assembled once,
+    without copying the columns left untouched. The time spent in every step (see
+    `STEPS`) is logged per DataFrame and accumulated in `timings`.
+
+    Args:
+        drop (tuple[str, ...]): Columns removed. A missing column raises KeyError.
+        lower_case (bool): Convert text (object or string) columns to lowercase.
+        round_decimals (Optional[int]): Decimals of float64 columns. None disables rounding.
+        date_columns (tuple[str, ...]): Date columns formatted as text, when present.
+        date_format (Optional[str]): Format of the date columns. None disables formatting.
+        typed_dates (bool): Keep date columns as native types instead of `date_format`
+            strings: `timestamp_columns` become UTC datetimes and the others Arrow date32.
+            Both are written to parquet with min/max statistics, so date-range filters
+            can skip row groups when reading. At the granularity of `date_format` (no
+            `timestamp_columns`), the files are as small as with strings; timestamps keep
+            the time of day, which the '%Y-%m-%d' text drops, and take more space.
+        timestamp_columns (tuple[str, ...]): Date columns keeping their time with `typed_dates`.
+    """
+    drop: tuple[str, ...] = ()
+    lower_case: bool = True
+    round_decimals: Optional[int] = None
+    date_columns: tuple[str, ...] = ("date", "published_at")
+    date_format: Optional[str] = "%Y-%m-%d"
+    typed_dates: bool = False
+    timestamp_columns: tuple[str, ...] = ("published_at",)
+    timings: dict[str, float] = field(default_factory=dict, init=False, compare=False, repr=False)
+    _selections: dict[tuple, _Selection] = field(default_factory=dict, init=False, compare=False, repr=False)
+
+    @classmethod
+    def from_params(cls, params: dict[str, Any]) -> "TransformerPlan":
+        """
+        Build a plan from its entry in `parameters.yml`.
+
+        Args:
+            params (dict[str, Any]): Fields of the plan. Lists are converted to tuples.
+
+        Returns:
+            TransformerPlan: The plan.
+        """
+        return cls(**{key: tuple(value) if isinstance(value, list) else value for key, value in params.items()})
+
+    def _select(self, df: pd.DataFrame) -> _Selection:
+        """
+        Resolve the columns of every step, once per schema (column names and dtypes).
+
+        Args:
+            df (pd.DataFrame): DataFrame to transform.
+
+        Returns:
+            _Selection: Columns selected by every step.
+        """
+        schema = tuple(zip(df.columns, map(str, df.dtypes)))
+        selection = self._selections.get(schema)
+        if selection is None:
+            missing = [col for col in self.drop if col not in df.columns]
+            if missing:
+                raise KeyError(f"{missing} not found in axis")
+
+            keep = [col for col in df.columns if col not in self.drop]
+            dtypes = df.dtypes
+            selection = _Selection(
+                keep=keep,
+                lower_case=frozenset(col for col in keep if self.lower_case and is_text_dtype(dtypes[col])),
+                round=frozenset(col for col in keep if self.round_decimals is not None and dtypes[col] == "float64"),
+                format_dates=frozenset(
+                    col for col in keep if (self.date_format or self.typed_dates) and col in self.date_columns
+                ),
+            )
+            self._selections[schema] = selection
+        return selection
+
+    def _operations(self) -> dict[str, Callable[[pd.Series], pd.Series]]:
+        """Column-wise operation of every step selecting columns."""
+        return {
+            "lower_case": lambda s: s.str.lower(),
+            "round": lambda s: s.round(self.round_decimals),
+            "format_dates": self._format_date,
+        }
+
+    def _format_date(self, series: pd.Series) -> pd.Series:
+        """Format a date column as text, or convert it to its native type with `typed_dates`."""
+        if not self.typed_dates:
+            return pd.to_datetime(series, errors="coerce").dt.strftime(self.date_format)
+        if series.name in self.timestamp_columns:
+            return to_utc_timestamp(series)
+        return to_date32(series)
+
+    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Apply the plan to a DataFrame.
+
+        Args:
+            df (pd.DataFrame): DataFrame to transform. It is not modified.
+
+        Returns:
+            pd.DataFrame: The transformed DataFrame.
+        """
+        timings = dict.fromkeys(STEPS, 0.0)
+
+        start = time.perf_counter()
+        selection = self._select(df)
+        timings["select"] += time.perf_counter() - start
+
+        operations = self._operations()
+        columns = {}
+        for col in selection.keep:
+            series = df[col]
+            for step, operation in operations.items():
+                if col in getattr(selection, step):
+                    start = time.perf_counter()
+                    series = operation(series)
+                    timings[step] += time.perf_counter() - start
+            columns[col] = series
+
+        start = time.perf_counter()
+        result = pd.DataFrame(columns, index=df.index, copy=False)
+        timings["assemble"] += time.perf_counter() - start
+
+        self._record(timings)
+        return result
+
+    def apply_polars(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Apply the plan with a Polars query, giving the same output as `apply`.
+
+        All the column operations run in one multi-threaded query. Date columns stored as
+        text are formatted with pandas, to keep its parsing rules.
+
+        Args:
+            df (pd.DataFrame): DataFrame to transform. It is not modified.
+
+        Returns:
+            pd.DataFrame: The transformed DataFrame.
+        """
+        pl = import_polars()
+        timings = dict.fromkeys(POLARS_STEPS, 0.0)
+
+        start = time.perf_counter()
+        selection = self._select(df)
+        frame = from_pandas(df[selection.keep])
+        timings["select"] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        expressions, dtypes, text_dates = [], {}, []
+        for col in selection.keep:
+            expression, dtype = pl.col(col), df[col].dtype
+            if col in selection.lower_case:
+                expression = expression.str.to_lowercase()
+            if col in selection.round:
+                expression = round_half_to_even(expression, self.round_decimals)
+            if col in selection.format_dates:
+                if not frame.schema[col].is_temporal():
+                    text_dates.append(col)
+                elif not self.typed_dates:
+                    expression, dtype = expression.dt.strftime(self.date_format), object
+                elif col in self.timestamp_columns:
+                    time_zone = getattr(frame.schema[col], "time_zone", None)
+                    expression = expression.dt.convert_time_zone("UTC") if time_zone else expression.dt.replace_time_zone("UTC")
+                    dtype = "datetime64[ns, UTC]"
+                else:
+                    expression, dtype = expression.dt.date(), DATE32
+            expressions.append(expression)
+            dtypes[col] = dtype
+        result = frame.lazy().select(expressions).collect()
+        timings["query"] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = to_pandas(result, dtypes)
+        result.index = df.index
+        for col in selection.keep:
+            if dtypes[col] == object and df[col].dtype == object and df[col].hasnans:
+                result[col] = result[col].mask(result[col].isna(), df[col]) # Keep the input nulls (None or NaN), as pandas does
+        for col in text_dates:
+            result[col] = self._format_date(result[col])
+        timings["assemble"] += time.perf_counter() - start
+
+        self._record(timings)
+        return result
+
+    def _record(self, timings: dict[str, float]) -> None:
+        """Accumulate and log the timings of one DataFrame."""
+        for step, elapsed in timings.items():
+            self.timings[step] = self.timings.get(step, 0.0) + elapsed
+        logger.info("Transformer plan timings: " + ", ".join(f"{step} {elapsed:.4f}s" for step, elapsed in timings.items()))
+
+
+def build_transformer_plans(plans: dict[str, dict[str, Any]]) -> dict[str, TransformerPlan]:
+    """
+    Build the transformer plan of every kind of data ('stock', 'news') from parameters.
+
+    Args:
+        plans (dict[str, dict[str, Any]]): Plan parameters keyed by kind of data.
+
+    Returns:
+        dict[str, TransformerPlan]: Plans keyed by kind of data.
+    """
+    return {kind: TransformerPlan.from_params(params or {}) for kind, params in plans.items()}
+
+
+def default_plans() -> dict[str, TransformerPlan]:
+    """
+    Build the default transformer plans, used when the parameters do not define them.
+
+    New plans are built on every call: plans cache their column selections and
+    accumulate their timings, so sharing them would leak both between runs.
+
+    Returns:
+        dict[str, TransformerPlan]: Plans keyed by kind of data ('stock', 'news').
+    """
+    return {
+        "stock": TransformerPlan(drop=("ticker",), round_decimals=2),
+        "news": TransformerPlan(drop=("url",)),
+    }
@@ -0,0 +1,218 @@
+from dataclasses import dataclass
+from typing import Callable, Union
+
+import numpy as np
+import pandas as pd
+
+from project001.config.logging_config import get_logging_config
+from project001.pipelines._04_feature.nodes import TICKER_COLUMN
+from project001.pipelines._04_feature.sentiment import SCORE_COLUMN
+
+logger = get_logging_config(pipeline_name="feature_pipeline")
+
+TIME_BITS = 34 # Seconds kept below the ticker code in a combined sort key (~544 years)
+
+Partitions = Union[dict[str, Callable[[], pd.DataFrame]], dict[str, pd.DataFrame]]
+
+
+@dataclass
+class NewsMergeConfig:
+    """
+    Configuration class for the merge of the stock features with the news sentiment.
+
+    Args:
+        windows (tuple[int, ...]): Trailing windows, in trading days, of the news features.
+        cutoff (str): Offset from the start (00:00 UTC) of a trading day until which news
+            are available for that day (e.g., '20h' for the close of B3). '0h' only uses news
+            published before the trading day, the only look-ahead-free choice when news
+            dates have no time.
+        date_column (str): Trading day column of the stock features.
+        timestamp_column (str): Publication time column of the news.
+        score_column (str): News score aggregated in the windows.
+    """
+    windows: tuple[int, ...] = (1, 5, 20)
+    cutoff: str = "0h"
+    date_column: str = "date"
+    timestamp_column: str = "published_at"
+    score_column: str = SCORE_COLUMN
+
+
+def _to_utc(series: pd.Series) -> pd.Series:
+    """
+    Parse dates or timestamps (text, date32, naive or aware datetimes) as UTC datetimes.
+
+    Text is parsed as ISO 8601 (dates with or without time). Naive values and dates are
+    read as UTC; unparseable values become NaT.
+
+    Args:
+        series (pd.Series): Date or timestamp column.
+
+    Returns:
+        pd.Series: UTC datetimes.
+    """
+    if isinstance(series.dtype, pd.ArrowDtype) or series.dtype == object:
+        series = series.astype("string")
+    if pd.api.types.is_string_dtype(series.dtype):
+        return pd.to_datetime(series, utc=True, errors="coerce", format="ISO8601")
+    return pd.to_datetime(series, utc=True, errors="coerce")
+
+def _epoch_seconds(timestamps: pd.Series) -> np.ndarray:
+    """Seconds since the epoch (int64) of UTC datetimes without NaT."""
+    return timestamps.dt.tz_convert(None).to_numpy().astype("datetime64[s]").astype("int64")
+
+def _stack(partitions: Partitions, columns: list[str]) -> tuple[dict[str, pd.DataFrame], pd.DataFrame]:
+    """
+    Load the partitions and stack the given columns with the partition code of every row.
+
+    Args:
+        partitions (Partitions): Loaders or DataFrames keyed by ticker.
+        columns (list[str]): Columns to stack.
+
+    Returns:
+        tuple[dict[str, pd.DataFrame], pd.DataFrame]: Loaded non-empty partitions and the
+            stacked columns, with the ticker in `TICKER_COLUMN`.
+    """
+    loaded, frames = {}, []
+    for ticker, partition in partitions.items():
+        data = partition() if callable(partition) else partition
+        if data is None or data.empty:
+            continue
+        missing = [col for col in columns if col not in data.columns]
+        if missing:
+            raise KeyError(f"Partition {ticker} is missing the columns {missing}")
+        loaded[ticker] = data.reset_index(drop=True)
+        frames.append(data[columns].reset_index(drop=True).assign(**{TICKER_COLUMN: ticker}))
+    stacked = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=[*columns, TICKER_COLUMN])
+    return loaded, stacked
+
+def combined_keys(codes: np.ndarray, seconds: np.ndarray, origin: int) -> np.ndarray:
+    """
+    Combine partition codes and times in int64 keys ordered by code, then time.
+
+    Args:
+        codes (np.ndarray): Non-negative partition code of every row.
+        seconds (np.ndarray): Epoch seconds of every row.
+        origin (int): Earliest time of all rows.
+
+    Returns:
+        np.ndarray: Sort keys.
+    """
+    offset = seconds - origin
+    if len(offset) and offset.max() >= 1 << TIME_BITS:
+        raise ValueError("Time span too large for the combined keys")
+    return (codes.astype("int64") << TIME_BITS) | offset
+
+def asof_positions(
+    left_codes: np.ndarray,
+    left_times: np.ndarray,
+    right_codes: np.ndarray,
+    right_times: np.ndarray,
+) -> np.ndarray:
+    """
+    Row of the left side at which every right row becomes available, for all partitions at once.
+
+    A right row (e.g., an article) is assigned to the first left row (e.g., a trading day)
+    of the same partition whose time is strictly later, so no left row sees a later right
+    row. The left rows must be sorted by code and time.
+
+    Args:
+        left_codes (np.ndarray): Partition code of the left rows.
+        left_times (np.ndarray): Availability time (epoch seconds) of the left rows.
+        right_codes (np.ndarray): Partition code of the right rows.
+        right_times (np.ndarray): Time (epoch seconds) of the right rows.
+
+    Returns:
+        np.ndarray: Left row of every right row, -1 when it comes after the last left row
+            of its partition or the partition has no left rows.
+    """
+    if not len(left_times) or not len(right_times):
+        return np.full(len(right_times), -1, dtype="int64")
+    origin = min(left_times.min(), right_times.min())
+    left = combined_keys(left_codes, left_times, origin)
+    right = combined_keys(right_codes, right_times, origin)
+    positions = np.searchsorted(left, right, side="right")
+    valid = positions < len(left)
+    valid[valid] = left_codes[positions[valid]] == right_codes[valid]
+    return np.where(valid, positions, -1)
+
+def trailing_sum(values: np.ndarray, group_start: np.ndarray, window: int) -> np.ndarray:
+    """
+    Sum of the last `window` rows of every row, restarting at every group.
+
+    Args:
+        values (np.ndarray): Values sorted by group.
+        group_start (np.ndarray): First row of the group of every row.
+        window (int): Rows in the window.
+
+    Returns:
+        np.ndarray: Trailing sums (partial windows at the start of a group).
+    """
+    cumulative = np.concatenate([[0], np.cumsum(values)])
+    rows = np.arange(len(values))
+    return cumulative[rows + 1] - cumulative[np.maximum(rows + 1 - window, group_start)]
+
+def merge_news_features(stock: Partitions, news: Partitions, config: NewsMergeConfig) -> dict[str, pd.DataFrame]:
+    """
+    Merge the stock features with the news sentiment of trailing windows of trading days.
+
+    Every scored article is assigned to the first trading day of its ticker whose cutoff
+    (date + `cutoff`) is strictly after its publication, with one `searchsorted` over
+    the keys of all tickers. The counts and score sums of every trading day are then
+    summed over the trailing windows with cumulative sums. For every window `w` the
+    result has `news_count_<w>d` (0 without news) and `sentiment_mean_<w>d` (null without
+    news). Articles after the last trading day are not used.
+
+    Args:
+        stock (Partitions): Stock features (e.g., technical indicators) keyed by ticker.
+        news (Partitions): Scored news keyed by ticker.
+        config (NewsMergeConfig): Configuration of the merge.
+
+    Returns:
+        dict[str, pd.DataFrame]: Stock features and news features keyed by ticker.
+    """
+    logger.info("Merging stock features with news sentiment")
+    stock, days = _stack(stock, [config.date_column])
+    if not stock:
+        logger.warning("No stock data to merge.")
+        return {}
+    day_dates = _to_utc(days[config.date_column])
+    if day_dates.isna().any():
+        raise ValueError(f"Stock data has invalid dates in '{config.date_column}'")
+    _, articles = _stack(news, [config.timestamp_column, config.score_column])
+    published = _to_utc(articles[config.timestamp_column])
+    keep = (
+        articles[TICKER_COLUMN].isin(stock).to_numpy()
+        & articles[config.score_column].notna().to_numpy()
+        & published.notna().to_numpy()
+    )
+    articles, published = articles[keep], published[keep]
+
+    tickers = pd.Index(list(stock))
+    day_codes = tickers.get_indexer(days[TICKER_COLUMN])
+    day_times = _epoch_seconds(day_dates) + int(pd.Timedelta(config.cutoff).total_seconds())
+    order = np.lexsort((day_times, day_codes))
+    day_codes, day_times = day_codes[order], day_times[order]
+
+    positions = asof_positions(day_codes, day_times, tickers.get_indexer(articles[TICKER_COLUMN]), _epoch_seconds(published))
+    used = positions >= 0
+    counts = np.bincount(positions[used], minlength=len(order)).astype("float64")
+    sums = np.bincount(positions[used], weights=articles[config.score_column].to_numpy("float64")[used], minlength=len(order))
+
+    group_start = np.searchsorted(day_codes, day_codes, side="left")
+    features = {}
+    for window in config.windows:
+        count = trailing_sum(counts, group_start, window)
+        total = trailing_sum(sums, group_start, window)
+        features[f"news_count_{window}d"] = count.astype("int64")
+        with np.errstate(invalid="ignore", divide="ignore"):
+            features[f"sentiment_mean_{window}d"] = np.where(count > 0, total / count, np.nan)
+    features = pd.DataFrame(features)
+    features.index = order # Back to the stacked order of the stock rows
+    features = features.sort_index()
+    logger.info(f"Merged {int(used.sum())} of {len(articles)} scored articles into {len(stock)} tickers")
+
+    merged, start = {}, 0
+    for ticker, df in stock.items():
+        merged[ticker] = pd.concat([df, features.iloc[start:start + len(df)].reset_index(drop=True)], axis=1)
+        start += len(df)
+    return merged
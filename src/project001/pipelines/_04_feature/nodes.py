@@ -1,5 +1,210 @@
-"""
-This is a boilerplate pipeline '_04_feature'
-generated using Kedro 1.0.0
-"""
-# TODO: Create functions
\ No newline at end of file
+from dataclasses import dataclass
+from typing import Callable, Union
+
+import numpy as np
+import pandas as pd
+
+from project001.config.logging_config import get_logging_config
+
+logger = get_logging_config(pipeline_name="feature_pipeline")
+
+TICKER_COLUMN = "ticker" # Partition id of every row once the partitions are stacked
+PRICE_COLUMNS = ["date", "open", "high", "low", "close", "volume"] # Required by the indicators
+
+StockPartitions = Union[dict[str, Callable[[], pd.DataFrame]], dict[str, pd.DataFrame], pd.DataFrame]
+
+
+@dataclass
+class IndicatorConfig:
+    """
+    Configuration class for the technical indicators.
+
+    Args:
+        sma_windows (tuple[int, ...]): Windows of the simple moving averages of the close.
+        ema_spans (tuple[int, ...]): Spans of the exponential moving averages of the close.
+        rsi_window (int): Window of the Relative Strength Index (Wilder smoothing).
+        macd_fast (int): Span of the fast EMA of the MACD.
+        macd_slow (int): Span of the slow EMA of the MACD.
+        macd_signal (int): Span of the EMA of the MACD signal line.
+        bollinger_window (int): Window of the Bollinger Bands.
+        bollinger_std (float): Standard deviations of the Bollinger Bands.
+        atr_window (int): Window of the Average True Range (Wilder smoothing).
+        volume_window (int): Window of the volume moving average.
+    """
+    sma_windows: tuple[int, ...] = (5, 20, 50)
+    ema_spans: tuple[int, ...] = (12, 26)
+    rsi_window: int = 14
+    macd_fast: int = 12
+    macd_slow: int = 26
+    macd_signal: int = 9
+    bollinger_window: int = 20
+    bollinger_std: float = 2.0
+    atr_window: int = 14
+    volume_window: int = 20
+
+
+def _stack_partitions(stock: StockPartitions) -> pd.DataFrame:
+    """
+    Stack the stock partitions in a single long DataFrame sorted by ticker and date.
+
+    Args:
+        stock (StockPartitions): Partitions (loaders or DataFrames) keyed by ticker, or
+            a DataFrame that already has a ticker column (e.g., `ConsolidatedParquetDataset`).
+
+    Returns:
+        pd.DataFrame: Stock data of every ticker, with a ticker column.
+    """
+    if isinstance(stock, pd.DataFrame):
+        df = stock
+    else:
+        frames = []
+        for ticker, partition in stock.items():
+            data = partition() if callable(partition) else partition
+            if data is None or data.empty:
+                logger.warning(f"Stock data for {ticker} is empty or None. Skipping.")
+                continue
+            frames.append(data.assign(**{TICKER_COLUMN: ticker}))
+        if not frames:
+            return pd.DataFrame(columns=[TICKER_COLUMN, *PRICE_COLUMNS])
+        df = pd.concat(frames, ignore_index=True)
+
+    return df.sort_values([TICKER_COLUMN, "date"], kind="stable", ignore_index=True)
+
+def _rolling(grouped: "pd.core.groupby.SeriesGroupBy", window: int, func: str, **kwargs) -> pd.Series:
+    """
+    Rolling statistic of every ticker, in a single pass over the stacked data.
+
+    pandas computes grouped windows in one call, with window bounds that restart at
+    every ticker, so the values are the same as a per-ticker rolling window.
+
+    Args:
+        grouped (SeriesGroupBy): Column grouped by ticker.
+        window (int): Window size.
+        func (str): Rolling method ('mean', 'std', ...).
+        **kwargs: Arguments of the rolling method.
+
+    Returns:
+        pd.Series: Rolling statistic aligned with the stacked data, NaN until a ticker
+            has `window` rows.
+    """
+    result = getattr(grouped.rolling(window), func)(**kwargs)
+    return result.reset_index(level=0, drop=True).sort_index()
+
+def _ewm(grouped: "pd.core.groupby.SeriesGroupBy", position: np.ndarray, min_periods: int, **kwargs) -> pd.Series:
+    """
+    Exponential moving average of every ticker (`adjust=False`, as trading platforms do).
+
+    Args:
+        grouped (SeriesGroupBy): Column grouped by ticker.
+        position (np.ndarray): Position of every row within its ticker.
+        min_periods (int): Rows of a ticker before the average is reported.
+        **kwargs: Decay of the average (`span` or `alpha`).
+
+    Returns:
+        pd.Series: Average aligned with the stacked data.
+    """
+    result = grouped.ewm(adjust=False, **kwargs).mean().reset_index(level=0, drop=True).sort_index()
+    return result.where(position >= min_periods - 1)
+
+def _compute_indicators(df: pd.DataFrame, config: IndicatorConfig) -> pd.DataFrame:
+    """
+    Compute the technical indicators of every ticker at once.
+
+    Every indicator is a vectorized column operation over the stacked data: shifts,
+    rolling windows, cumulative sums and exponential averages use pandas grouped kernels,
+    which run over all tickers in one call.
+
+    Args:
+        df (pd.DataFrame): Stock data sorted by ticker and date, with a RangeIndex.
+        config (IndicatorConfig): Configuration of the indicators.
+
+    Returns:
+        pd.DataFrame: Input columns followed by the indicator columns.
+    """
+    grouped = df.groupby(TICKER_COLUMN, sort=False)
+    position = grouped.cumcount().to_numpy()
+    close, high, low, volume = (df[col].astype("float64") for col in ["close", "high", "low", "volume"])
+    close_by_ticker = close.groupby(df[TICKER_COLUMN], sort=False)
+    volume_by_ticker = volume.groupby(df[TICKER_COLUMN], sort=False)
+    prev_close = grouped["close"].shift().astype("float64")
+    features = {}
+
+    features["return_1d"] = close / prev_close - 1
+    features["log_return_1d"] = np.log(close / prev_close)
+
+    for window in config.sma_windows:
+        features[f"sma_{window}"] = _rolling(close_by_ticker, window, "mean")
+    for span in config.ema_spans:
+        features[f"ema_{span}"] = _ewm(close_by_ticker, position, span, span=span)
+
+    # RSI: Wilder averages of gains and losses
+    delta = close - prev_close
+    gains = delta.clip(lower=0).groupby(df[TICKER_COLUMN], sort=False)
+    losses = (-delta).clip(lower=0).groupby(df[TICKER_COLUMN], sort=False)
+    avg_gain = _ewm(gains, position, config.rsi_window + 1, alpha=1 / config.rsi_window)
+    avg_loss = _ewm(losses, position, config.rsi_window + 1, alpha=1 / config.rsi_window)
+    features[f"rsi_{config.rsi_window}"] = 100 - 100 / (1 + avg_gain / avg_loss)
+
+    # MACD
+    ema_fast = _ewm(close_by_ticker, position, config.macd_slow, span=config.macd_fast)
+    ema_slow = _ewm(close_by_ticker, position, config.macd_slow, span=config.macd_slow)
+    macd = ema_fast - ema_slow
+    signal = _ewm(macd.groupby(df[TICKER_COLUMN], sort=False), position, config.macd_slow + config.macd_signal - 1, span=config.macd_signal)
+    features["macd"] = macd
+    features["macd_signal"] = signal
+    features["macd_hist"] = macd - signal
+
+    # Bollinger Bands (population standard deviation)
+    middle = _rolling(close_by_ticker, config.bollinger_window, "mean")
+    band = config.bollinger_std * _rolling(close_by_ticker, config.bollinger_window, "std", ddof=0)
+    features["bb_middle"] = middle
+    features["bb_upper"] = middle + band
+    features["bb_lower"] = middle - band
+    features["bb_percent_b"] = (close - (middle - band)) / (2 * band)
+    features["bb_bandwidth"] = 2 * band / middle
+
+    # ATR: Wilder average of the true range
+    true_range = pd.concat([high - low, (high - prev_close).abs(), (low - prev_close).abs()], axis=1).max(axis=1)
+    features[f"atr_{config.atr_window}"] = _ewm(
+        true_range.groupby(df[TICKER_COLUMN], sort=False), position, config.atr_window, alpha=1 / config.atr_window)
+
+    # Volume
+    volume_sma = _rolling(volume_by_ticker, config.volume_window, "mean")
+    features[f"volume_sma_{config.volume_window}"] = volume_sma
+    features["volume_ratio"] = volume / volume_sma
+    direction = np.sign(delta).fillna(0)
+    features["obv"] = (direction * volume).groupby(df[TICKER_COLUMN], sort=False).cumsum()
+
+    features = pd.DataFrame(features, index=df.index).replace([np.inf, -np.inf], np.nan)
+    return pd.concat([df, features], axis=1)
+
+def compute_technical_indicators(stock: StockPartitions, config: IndicatorConfig) -> dict[str, pd.DataFrame]:
+    """
+    Compute the technical indicators of every ticker from pipeline 03_primary.
+
+    The partitions are stacked and the indicators computed over all tickers at once, then
+    split again in one partition per ticker.
+
+    Args:
+        stock (StockPartitions): Stock partitions of pipeline 03_primary (loaders or
+            DataFrames keyed by ticker), or a DataFrame with a ticker column.
+        config (IndicatorConfig): Configuration of the indicators.
+
+    Returns:
+        dict[str, pd.DataFrame]: Stock data and indicators keyed by ticker.
+    """
+    logger.info("Computing technical indicators")
+    df = _stack_partitions(stock)
+    missing = [col for col in PRICE_COLUMNS if col not in df.columns]
+    if missing:
+        raise KeyError(f"Stock data is missing the columns {missing}")
+    if df.empty:
+        logger.warning("No stock data to compute technical indicators.")
+        return {}
+
+    features = _compute_indicators(df, config)
+    logger.info(f"Computed {features.shape[1] - df.shape[1]} indicators for {features[TICKER_COLUMN].nunique()} tickers")
+    return {
+        str(ticker): frame.drop(columns=TICKER_COLUMN).reset_index(drop=True)
+        for ticker, frame in features.groupby(TICKER_COLUMN, sort=False)
+    }
@@ -1,10 +1,85 @@
-"""
-This is a boilerplate pipeline '_04_feature'
-generated using Kedro 1.0.0
-"""
-# TODO: Insert functions into the Nodes
 from kedro.pipeline import Node, Pipeline  # noqa
+from project001.pipelines._04_feature.merge import NewsMergeConfig, merge_news_features
+from project001.pipelines._04_feature.nodes import IndicatorConfig, compute_technical_indicators
+from project001.pipelines._04_feature.sentiment import SentimentConfig, score_news_sentiment
 
 
 def create_pipeline(**kwargs) -> Pipeline:
-    return Pipeline([])
+    return Pipeline([
+        Node(
+            func=IndicatorConfig,
+            inputs={
+                "sma_windows": "params:technical_indicators.sma_windows",
+                "ema_spans": "params:technical_indicators.ema_spans",
+                "rsi_window": "params:technical_indicators.rsi_window",
+                "macd_fast": "params:technical_indicators.macd_fast",
+                "macd_slow": "params:technical_indicators.macd_slow",
+                "macd_signal": "params:technical_indicators.macd_signal",
+                "bollinger_window": "params:technical_indicators.bollinger_window",
+                "bollinger_std": "params:technical_indicators.bollinger_std",
+                "atr_window": "params:technical_indicators.atr_window",
+                "volume_window": "params:technical_indicators.volume_window",
+            },
+            outputs="indicator_config",
+            name="indicator_config",
+        ),
+        Node(
+            compute_technical_indicators,
+            inputs={
+                "stock": "03_primary_stock",
+                "config": "indicator_config",
+            },
+            outputs="04_feature_technical",
+            namespace="feature_pipeline",
+            name="compute_technical_indicators",
+        ),
+        Node(
+            func=SentimentConfig,
+            inputs={
+                "model_name": "params:sentiment.model_name",
+                "text_columns": "params:sentiment.text_columns",
+                "batch_size": "params:sentiment.batch_size",
+                "max_length": "params:sentiment.max_length",
+                "cache_dir": "params:sentiment.cache_dir",
+                "num_threads": "params:sentiment.num_threads",
+                "backend": "params:sentiment.backend",
+                "onnx_dir": "params:sentiment.onnx_dir",
+                "num_workers": "params:sentiment.num_workers",
+            },
+            outputs="sentiment_config",
+            name="sentiment_config",
+        ),
+        Node(
+            score_news_sentiment,
+            inputs={
+                "news": "03_primary_news",
+                "config": "sentiment_config",
+            },
+            outputs="04_feature_sentiment",
+            namespace="feature_pipeline",
+            name="score_news_sentiment",
+        ),
+        Node(
+            func=NewsMergeConfig,
+            inputs={
+                "windows": "params:news_merge.windows",
+                "cutoff": "params:news_merge.cutoff",
+                "date_column": "params:news_merge.date_column",
+                "timestamp_column": "params:news_merge.timestamp_column",
+                "score_column": "params:news_merge.score_column",
+            },
+            outputs="news_merge_config",
+            name="news_merge_config",
+        ),
+        Node(
+            merge_news_features,
+            inputs={
+                "stock": "04_feature_technical",
+                "news": "04_feature_sentiment",
+                "config": "news_merge_config",
+            },
+            outputs="04_feature",
+            namespace="feature_pipeline",
+            name="merge_news_features",
+        ),
+    ])
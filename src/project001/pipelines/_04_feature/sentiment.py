@@ -0,0 +1,583 @@
+import hashlib
+import inspect
+import os
+import re
+import time
+import uuid
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from project001.config.logging_config import get_logging_config
+from project001.utils.parallel import worker_context
+
+logger = get_logging_config(pipeline_name="feature_pipeline")
+
+HASH_COLUMN = "text_hash" # Key of the sentiment cache
+SCORE_COLUMN = "sentiment_score" # P(positive) - P(negative), when the model has both labels
+INFERENCE_BACKENDS = ("torch", "torch_int8", "onnx", "onnx_int8")
+MAX_CACHE_SEGMENTS = 8 # Segments of the sentiment cache before `update` compacts them into one
+
+NewsPartitions = Union[dict[str, Callable[[], pd.DataFrame]], dict[str, pd.DataFrame]]
+
+
+@dataclass
+class SentimentConfig:
+    """
+    Configuration class for the news sentiment scoring.
+
+    Args:
+        model_name (str): Hugging Face model id or local directory of a sequence
+            classification model.
+        text_columns (tuple[str, ...]): News columns joined into the scored text.
+        batch_size (int): Articles per inference batch.
+        max_length (int): Maximum tokens per article; longer texts are truncated.
+        cache_dir (Optional[str]): Directory of the score cache. None disables the cache.
+        num_threads (Optional[int]): Torch CPU threads. None keeps the torch default.
+        backend (str): Inference backend: 'torch' (fp32), 'torch_int8' (dynamic int8
+            quantization of the linear layers), 'onnx' (ONNX Runtime, fp32) or 'onnx_int8'
+            (ONNX Runtime with int8 weights).
+        onnx_dir (str): Directory of the exported ONNX models, reused across runs.
+        num_workers (int): Worker processes scoring the news of different tickers with
+            the model loaded once, in shared memory (1 = score in the current process).
+    """
+    model_name: str = "lucas-leme/FinBERT-PT-BR"
+    text_columns: tuple[str, ...] = ("title", "description")
+    batch_size: int = 32
+    max_length: int = 128
+    cache_dir: Optional[str] = "data/04_feature/.sentiment_cache"
+    num_threads: Optional[int] = None
+    backend: str = "torch"
+    onnx_dir: str = "data/06_models/sentiment_onnx"
+    num_workers: int = 1
+
+    def __post_init__(self):
+        if self.backend not in INFERENCE_BACKENDS:
+            raise ValueError(f"Unknown inference backend '{self.backend}', expected one of {INFERENCE_BACKENDS}")
+
+
+def _import_onnxruntime():
+    """Import ONNX Runtime, an optional dependency (`pip install project001[onnx]`)."""
+    try:
+        import onnxruntime
+    except ImportError as e:
+        raise ImportError("The ONNX backends require ONNX Runtime. Install it with `pip install project001[onnx]`.") from e
+    return onnxruntime
+
+
+def _model_slug(model_name: str) -> str:
+    """Directory name of a model id or path."""
+    return re.sub(r"[^\w.-]", "_", model_name)
+
+
+def hash_text(text: str, model_name: str, max_length: int, backend: str = "torch") -> str:
+    """
+    Hash an article text into a cache key.
+
+    The model, the truncation length and the inference backend are part of the key, since
+    all of them change the score (int8 backends differ slightly from fp32).
+
+    Args:
+        text (str): Article text.
+        model_name (str): Model scoring the text.
+        max_length (int): Maximum tokens per article.
+        backend (str): Inference backend.
+
+    Returns:
+        str: Hex digest identifying the score.
+    """
+    prefix = model_name if backend == "torch" else f"{model_name}\0{backend}"
+    return hashlib.sha256(f"{prefix}\0{max_length}\0{text}".encode()).hexdigest()
+
+
+class SentimentCache:
+    """
+    On-disk cache of sentiment scores keyed by text hash.
+
+    Every model gets its own directory. Each `update` appends one parquet segment with the
+    new scores, so previously scored articles are never re-inferred. Once there are more
+    than `max_segments` segments, they are compacted into one, so the number of files
+    (and the time to load them) stays bounded.
+
+    Args:
+        directory (str): Cache directory.
+        model_name (str): Model whose scores are cached.
+        max_segments (int): Segments kept before compacting.
+    """
+
+    def __init__(self, directory: str, model_name: str, max_segments: int = MAX_CACHE_SEGMENTS):
+        self.directory = Path(directory) / _model_slug(model_name)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_segments = max_segments
+
+    def _segment_path(self) -> Path:
+        """Path of a new segment; names sort in write order."""
+        return self.directory / f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}.parquet"
+
+    def _write(self, scores: pd.DataFrame, path: Path) -> None:
+        """Write scores indexed by text hash to a segment, atomically."""
+        tmp_path = path.with_suffix(".tmp")
+        scores.rename_axis(HASH_COLUMN).reset_index().to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+
+    def load(self) -> pd.DataFrame:
+        """
+        Read the cached scores.
+
+        Returns:
+            pd.DataFrame: Probability of every label, indexed by text hash.
+        """
+        segments = []
+        for path in sorted(self.directory.glob("*.parquet")):
+            try:
+                segments.append(pd.read_parquet(path))
+            except Exception as e:
+                logger.warning(f"Discarding unreadable sentiment cache segment {path.name}: {e}")
+                path.unlink(missing_ok=True)
+        if not segments:
+            return pd.DataFrame(index=pd.Index([], name=HASH_COLUMN))
+        scores = pd.concat(segments, ignore_index=True).drop_duplicates(HASH_COLUMN, keep="last")
+        return scores.set_index(HASH_COLUMN)
+
+    def update(self, scores: pd.DataFrame) -> None:
+        """
+        Append new scores to the cache.
+
+        Args:
+            scores (pd.DataFrame): Probability of every label, indexed by text hash.
+        """
+        if scores.empty:
+            return
+        self._write(scores, self._segment_path())
+        segments = sorted(self.directory.glob("*.parquet"))
+        if len(segments) > self.max_segments:
+            self.compact(segments)
+
+    def compact(self, segments: Optional[list[Path]] = None) -> None:
+        """
+        Rewrite the segments into a single one, without duplicated hashes.
+
+        The compacted segment is written atomically before the old ones are removed, so
+        a concurrent `load` sees the scores either once or twice (resolved on read),
+        never missing.
+
+        Args:
+            segments (Optional[list[Path]]): Segments to compact. Defaults to all of them.
+        """
+        segments = segments if segments is not None else sorted(self.directory.glob("*.parquet"))
+        scores = self.load()
+        if scores.empty:
+            return
+        path = self._segment_path()
+        self._write(scores, path)
+        for segment in segments:
+            if segment != path:
+                segment.unlink(missing_ok=True)
+        logger.info(f"Compacted {len(segments)} sentiment cache segments into {path.name}")
+
+
+def model_labels(model_name: str) -> list[str]:
+    """
+    Lowercase label names of a sequence classification model, read from its config only.
+
+    Args:
+        model_name (str): Hugging Face model id or local directory.
+
+    Returns:
+        list[str]: Labels, in the order of the model outputs.
+    """
+    from transformers import AutoConfig
+
+    config = AutoConfig.from_pretrained(model_name)
+    return [str(config.id2label[i]).lower() for i in range(config.num_labels)]
+
+
+class SentimentScorer:
+    """
+    CPU inference of a Hugging Face sequence classification model.
+
+    Texts are tokenized once without padding and sorted by token length, then split in
+    batches padded only to their longest text (dynamic padding), so short titles are not
+    padded to `max_length` and similar lengths share a batch.
+
+    The int8 backends trade a small accuracy loss for throughput: 'torch_int8' quantizes
+    the weights of the linear layers and their activations on the fly, and 'onnx_int8'
+    does the same on the ONNX graph. The ONNX models are exported once to
+    `<onnx_dir>/<model>/` and reused by later runs.
+
+    A scorer can be sent to worker processes (see `score_in_workers`). After
+    `share_memory`, the fp32 torch weights are sent as handles to shared memory, so the
+    workers map the weights loaded here instead of copying them. The int8 torch weights
+    are copied, and the ONNX backends open one ONNX Runtime session per process on the
+    exported model (sessions cannot share their weights across processes).
+
+    Args:
+        model_name (str): Hugging Face model id or local directory.
+        batch_size (int): Texts per inference batch.
+        max_length (int): Maximum tokens per text.
+        num_threads (Optional[int]): Torch and ONNX Runtime CPU threads. None keeps the defaults.
+        backend (str): Inference backend (see `INFERENCE_BACKENDS`).
+        onnx_dir (str): Directory of the exported ONNX models.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        batch_size: int = 32,
+        max_length: int = 128,
+        num_threads: Optional[int] = None,
+        backend: str = "torch",
+        onnx_dir: str = "data/06_models/sentiment_onnx",
+    ):
+        if backend not in INFERENCE_BACKENDS:
+            raise ValueError(f"Unknown inference backend '{backend}', expected one of {INFERENCE_BACKENDS}")
+        # Imported here: torch and transformers take seconds to import and only this stage needs them
+        import torch
+        from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+        if num_threads:
+            torch.set_num_threads(num_threads)
+        self._torch = torch
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.backend = backend
+        self.onnx_dir = onnx_dir
+        self.num_threads = num_threads
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model = AutoModelForSequenceClassification.from_pretrained(model_name).to("cpu").eval()
+        self.labels = [str(self.model.config.id2label[i]).lower() for i in range(self.model.config.num_labels)]
+        if not {"positive", "negative"} <= set(self.labels):
+            logger.warning(
+                f"The labels of {model_name} are {self.labels}, without 'positive' and 'negative': "
+                f"{SCORE_COLUMN} will be null, only the label probabilities are scored."
+            )
+
+        self.session, self.onnx_path = None, None
+        if backend == "torch_int8":
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore") # torch.ao quantization is deprecated in favor of torchao
+                self.model = torch.ao.quantization.quantize_dynamic(self.model, {torch.nn.Linear}, dtype=torch.qint8)
+        elif backend in ("onnx", "onnx_int8"):
+            self.onnx_path = self._export_onnx(Path(onnx_dir) / _model_slug(model_name), quantize=backend == "onnx_int8")
+            self.session = self._onnx_session(self.onnx_path, num_threads)
+
+    def __getstate__(self) -> dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["_torch"]
+        state["session"] = None # Reopened by the process receiving the scorer
+        if self.onnx_path is not None:
+            state["model"] = None # Not used by the ONNX backends
+        return state
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        import torch
+
+        self.__dict__.update(state)
+        self._torch = torch
+
+    def share_memory(self) -> "SentimentScorer":
+        """
+        Move the fp32 torch weights to shared memory, so the processes receiving the
+        scorer map them instead of copying them.
+
+        Returns:
+            SentimentScorer: The scorer.
+        """
+        if self.backend == "torch":
+            self.model.share_memory()
+        return self
+
+    @property
+    def shares_weights(self) -> bool:
+        """Whether the torch weights are in shared memory (see `share_memory`)."""
+        return self.backend == "torch" and all(param.is_shared() for param in self.model.parameters())
+
+    def set_num_threads(self, num_threads: int) -> None:
+        """Set the torch CPU threads, and those of the ONNX Runtime session (reopened on the next batch)."""
+        self._torch.set_num_threads(num_threads)
+        self.num_threads = num_threads
+        self.session = None
+
+    def _export_onnx(self, directory: Path, quantize: bool) -> Path:
+        """
+        Export the model to ONNX (and quantize its weights to int8) unless already done.
+
+        Args:
+            directory (Path): Directory of the exported model.
+            quantize (bool): Return the int8 model.
+
+        Returns:
+            Path: ONNX model to load.
+        """
+        path = directory / "model.onnx"
+        if not path.exists():
+            directory.mkdir(parents=True, exist_ok=True)
+            features = self.tokenizer(["onnx export"], return_tensors="pt")
+            # The graph inputs follow the order of the forward arguments, not of the tokenizer output
+            names = [name for name in inspect.signature(self.model.forward).parameters if name in features]
+            tmp_path = path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                self._torch.onnx.export(
+                    self.model,
+                    (),
+                    str(tmp_path),
+                    kwargs={name: features[name] for name in names},
+                    input_names=names,
+                    output_names=["logits"],
+                    dynamic_axes={**{name: {0: "batch", 1: "sequence"} for name in names}, "logits": {0: "batch"}},
+                    opset_version=17,
+                    dynamo=False,
+                )
+            os.replace(tmp_path, path)
+            logger.info(f"Exported the sentiment model to {path}")
+
+        if not quantize:
+            return path
+        int8_path = directory / "model_int8.onnx"
+        if not int8_path.exists():
+            _import_onnxruntime()
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+
+            tmp_path = int8_path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+            quantize_dynamic(str(path), str(tmp_path), weight_type=QuantType.QInt8)
+            os.replace(tmp_path, int8_path)
+            logger.info(f"Quantized the sentiment model to {int8_path}")
+        return int8_path
+
+    @staticmethod
+    def _onnx_session(path: Path, num_threads: Optional[int]):
+        """ONNX Runtime CPU session of an exported model."""
+        ort = _import_onnxruntime()
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        return ort.InferenceSession(str(path), options, providers=["CPUExecutionProvider"])
+
+    def _probabilities(self, features: dict[str, list]) -> np.ndarray:
+        """Label probabilities of a padded batch."""
+        if self.onnx_path is not None:
+            if self.session is None:
+                self.session = self._onnx_session(self.onnx_path, self.num_threads)
+            inputs = {arg.name: np.asarray(features[arg.name], dtype="int64") for arg in self.session.get_inputs()}
+            logits = self.session.run(["logits"], inputs)[0]
+            exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+            return exp / exp.sum(axis=1, keepdims=True)
+        tensors = {key: self._torch.tensor(values) for key, values in features.items()}
+        return self._torch.softmax(self.model(**tensors).logits, dim=-1).numpy()
+
+    def score(self, texts: list[str]) -> np.ndarray:
+        """
+        Score texts with the model.
+
+        Args:
+            texts (list[str]): Texts to score.
+
+        Returns:
+            np.ndarray: Probability of every label (columns ordered as `labels`), one row
+                per text in the input order.
+        """
+        probabilities = np.empty((len(texts), len(self.labels)), dtype="float32")
+        if not texts:
+            return probabilities
+
+        encoded = self.tokenizer(texts, truncation=True, max_length=self.max_length)
+        order = np.argsort([len(ids) for ids in encoded["input_ids"]], kind="stable")
+        with self._torch.inference_mode():
+            for start in range(0, len(order), self.batch_size):
+                batch = order[start:start + self.batch_size]
+                features = self.tokenizer.pad({key: [values[i] for i in batch] for key, values in encoded.items()})
+                probabilities[batch] = self._probabilities(features)
+        return probabilities
+
+
+_worker_scorer: Optional[SentimentScorer] = None # Scorer received by every worker process
+
+
+def _init_worker(scorer: SentimentScorer, num_threads: int) -> None:
+    """
+    Keep the scorer sent by the parent process, with the CPU threads of a worker.
+
+    Workers start from a fresh interpreter (forkserver or spawn), not from a fork of the
+    parent, whose torch/OpenMP and ONNX Runtime thread pools may already be running.
+    """
+    global _worker_scorer
+    scorer.set_num_threads(num_threads)
+    _worker_scorer = scorer
+
+def _score_shard(texts: list[str]) -> tuple[np.ndarray, bool]:
+    """Score the texts of a shard in a worker. Returns the probabilities and whether the weights are shared."""
+    return _worker_scorer.score(texts), _worker_scorer.shares_weights
+
+def _shard_by_ticker(keys_by_ticker: dict[str, list[str]], num_shards: int) -> list[list[str]]:
+    """
+    Split the texts to score in shards of whole tickers with similar sizes.
+
+    Tickers are assigned from the largest to the smallest to the shard with the fewest
+    texts.
+
+    Args:
+        keys_by_ticker (dict[str, list[str]]): Text hashes to score keyed by ticker.
+        num_shards (int): Maximum number of shards.
+
+    Returns:
+        list[list[str]]: Text hashes of every non-empty shard.
+    """
+    shards = [[] for _ in range(num_shards)]
+    for _, keys in sorted(keys_by_ticker.items(), key=lambda item: len(item[1]), reverse=True):
+        min(shards, key=len).extend(keys)
+    return [shard for shard in shards if shard]
+
+def score_in_workers(
+    scorer: SentimentScorer,
+    texts: dict[str, str],
+    keys_by_ticker: dict[str, list[str]],
+    num_workers: int,
+    num_threads: Optional[int] = None,
+) -> dict[str, np.ndarray]:
+    """
+    Score texts in worker processes sharing the model of `scorer`.
+
+    The news of every ticker is scored by a single worker, and the CPU threads are split
+    between the workers. The model is loaded once, by the caller: its fp32 torch weights
+    are moved to shared memory (`SentimentScorer.share_memory`) and the workers map them
+    instead of loading or copying them (see `SentimentScorer` for the other backends).
+
+    Workers are not forked from the current process: forking after torch (OpenMP) or
+    ONNX Runtime started their thread pools can deadlock the children. They start with
+    forkserver (or spawn where it is not available), and receive the scorer when they
+    start. A shard whose worker fails is scored in the current process. With a single
+    worker or shard, everything is scored in the current process.
+
+    Args:
+        scorer (SentimentScorer): Loaded scorer.
+        texts (dict[str, str]): Text keyed by hash.
+        keys_by_ticker (dict[str, list[str]]): Text hashes to score keyed by ticker.
+        num_workers (int): Worker processes.
+        num_threads (Optional[int]): CPU threads per worker. None splits the cores.
+
+    Returns:
+        dict[str, np.ndarray]: Label probabilities keyed by text hash.
+    """
+    shards = _shard_by_ticker(keys_by_ticker, num_workers)
+    if num_workers <= 1 or len(shards) <= 1:
+        keys = [key for shard in shards for key in shard]
+        return dict(zip(keys, scorer.score([texts[key] for key in keys])))
+
+    num_threads = num_threads or max(1, (os.cpu_count() or 1) // len(shards))
+    scorer.share_memory()
+    logger.info(f"Scoring {sum(map(len, shards))} articles with {len(shards)} worker processes x {num_threads} threads")
+    results, shared = {}, []
+    with ProcessPoolExecutor(
+        max_workers=len(shards), mp_context=worker_context(), initializer=_init_worker, initargs=(scorer, num_threads)
+    ) as executor:
+        futures = [(shard, executor.submit(_score_shard, [texts[key] for key in shard])) for shard in shards]
+        for shard, future in futures:
+            try:
+                probabilities, shares_weights = future.result()
+                results.update(zip(shard, probabilities))
+                shared.append(shares_weights)
+            except Exception as e:
+                logger.error(f"Worker failed while scoring {len(shard)} articles, scoring them here: {e}")
+                results.update(zip(shard, scorer.score([texts[key] for key in shard])))
+    if shared:
+        logger.info(f"Workers {'shared' if all(shared) else 'copied'} the model weights of the {scorer.backend} backend")
+    return results
+
+def _article_texts(df: pd.DataFrame, text_columns: tuple[str, ...]) -> pd.Series:
+    """Join the text columns of every article with '. ', skipping nulls. Articles without text are NA."""
+    columns = [col for col in text_columns if col in df.columns]
+    if not columns:
+        raise KeyError(f"News data has none of the text columns {list(text_columns)}")
+    texts = pd.Series(pd.NA, index=df.index, dtype="string")
+    for col in columns:
+        part = df[col].astype("string").str.strip().replace("", pd.NA)
+        texts = (texts + ". " + part).fillna(texts).fillna(part)
+    return texts
+
+def _score_columns(labels: list[str]) -> list[str]:
+    """Output column of the probability of every label."""
+    return [f"sentiment_{label}" for label in labels]
+
+def score_news_sentiment(news: NewsPartitions, config: SentimentConfig) -> dict[str, pd.DataFrame]:
+    """
+    Score the sentiment of the news from pipeline 03_primary.
+
+    The texts of every partition are hashed and deduplicated; only texts missing from the
+    cache are inferred (the model is not loaded when there are none), and their scores
+    are appended to the cache. Each article gets the
+    probability of every label of the model (`sentiment_<label>`) and `sentiment_score`,
+    P(positive) - P(negative) when the model has both labels. Articles without text get
+    null scores. With `num_workers` > 1, the texts to infer are sharded by ticker across
+    worker processes sharing the loaded model (`score_in_workers`).
+
+    Args:
+        news (NewsPartitions): News partitions of pipeline 03_primary (loaders or
+            DataFrames keyed by ticker).
+        config (SentimentConfig): Configuration of the scoring.
+
+    Returns:
+        dict[str, pd.DataFrame]: News data and sentiment columns keyed by ticker.
+    """
+    logger.info("Scoring news sentiment")
+    partitions, hashes, unique, owner = {}, {}, {}, {}
+    for ticker, partition in news.items():
+        data = partition() if callable(partition) else partition
+        if data is None or data.empty:
+            logger.warning(f"News data for {ticker} is empty or None. Skipping.")
+            continue
+        partitions[ticker] = data.reset_index(drop=True)
+        hashes[ticker] = []
+        for text in _article_texts(partitions[ticker], config.text_columns):
+            key = None if pd.isna(text) else hash_text(text, config.model_name, config.max_length, config.backend)
+            if key is not None:
+                unique.setdefault(key, text)
+                owner.setdefault(key, ticker)
+            hashes[ticker].append(key)
+    if not partitions:
+        logger.warning("No news data to score.")
+        return {}
+
+    cache = SentimentCache(config.cache_dir, config.model_name) if config.cache_dir else None
+    cached = cache.load() if cache else pd.DataFrame()
+    missing = [key for key in unique if key not in cached.index]
+
+    columns = _score_columns(model_labels(config.model_name)) if missing else list(cached.columns)
+
+    scores = cached.reindex(columns=columns)
+    if missing:
+        # Loaded once; with workers, its weights are shared with them rather than copied
+        scorer = SentimentScorer(
+            config.model_name, config.batch_size, config.max_length, config.num_threads, config.backend, config.onnx_dir)
+        start = time.perf_counter()
+        if config.num_workers > 1:
+            keys_by_ticker = {}
+            for key in missing:
+                keys_by_ticker.setdefault(owner[key], []).append(key)
+            results = score_in_workers(scorer, unique, keys_by_ticker, config.num_workers, config.num_threads)
+            probabilities = np.stack([results[key] for key in missing])
+        else:
+            probabilities = scorer.score([unique[key] for key in missing])
+        elapsed = time.perf_counter() - start
+        new_scores = pd.DataFrame(probabilities, index=pd.Index(missing, name=HASH_COLUMN), columns=columns)
+        if cache:
+            cache.update(new_scores)
+        scores = new_scores if scores.empty else pd.concat([scores, new_scores])
+        logger.info(f"Scored {len(missing)} articles in {elapsed:.2f}s ({len(missing) / elapsed:,.1f} articles/s)")
+    logger.info(f"Reused {len(unique) - len(missing)} cached scores out of {len(unique)} unique articles")
+
+    if {"sentiment_positive", "sentiment_negative"} <= set(columns):
+        scores[SCORE_COLUMN] = scores["sentiment_positive"] - scores["sentiment_negative"]
+    else:
+        scores[SCORE_COLUMN] = np.nan
+
+    return {
+        ticker: pd.concat([df, scores.reindex(hashes[ticker]).reset_index(drop=True)], axis=1)
+        for ticker, df in partitions.items()
+    }
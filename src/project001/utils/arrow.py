@@ -0,0 +1,64 @@
+from typing import Optional
+
+import pandas as pd
+import pyarrow as pa
+from pandas.api.types import infer_dtype
+
+ARROW_STRING = pd.StringDtype("pyarrow") # Arrow-backed string dtype ('string[pyarrow]')
+
+
+def is_text_dtype(dtype) -> bool:
+    """
+    Check whether a column dtype holds text (Python objects or pandas strings).
+
+    Args:
+        dtype: Column dtype.
+
+    Returns:
+        bool: True for object and string dtypes.
+    """
+    return dtype == object or isinstance(dtype, pd.StringDtype)
+
+
+def arrow_string_types(arrow_type: pa.DataType) -> Optional[pd.StringDtype]:
+    """
+    Map Arrow string types to 'string[pyarrow]', for the `types_mapper` of `to_pandas`.
+
+    Reading a table with this mapper creates the text columns as Arrow-backed strings
+    directly, without building one Python object per value first.
+
+    Args:
+        arrow_type (pa.DataType): Arrow type of a column.
+
+    Returns:
+        Optional[pd.StringDtype]: `ARROW_STRING` for string columns, None (default conversion) otherwise.
+    """
+    if pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type):
+        return ARROW_STRING
+    return None
+
+
+def to_arrow_strings(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convert the text columns of a DataFrame to the Arrow-backed string dtype.
+
+    Only object columns holding strings (and nulls) are converted; other object columns
+    (e.g., mixed types) are left as they are. String operations on the converted columns
+    (`.str.lower()`, comparisons, hashing) run in Arrow compute kernels, and the text is
+    stored in contiguous buffers instead of one Python object per value. Parquet
+    partitions are better read with `arrow_string_types` (see `load_partition`), which
+    skips the object columns altogether.
+
+    Args:
+        df (pd.DataFrame): DataFrame to convert. It is not modified.
+
+    Returns:
+        pd.DataFrame: DataFrame with Arrow-backed text columns.
+    """
+    columns = [
+        col for col in df.select_dtypes(include=["object"]).columns
+        if infer_dtype(df[col], skipna=True) in ("string", "empty")
+    ]
+    if not columns:
+        return df
+    return df.astype(dict.fromkeys(columns, ARROW_STRING))
@@ -0,0 +1,170 @@
+import functools
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import date
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import pandas as pd
+
+from project001.config.logging_config import get_logging_config
+
+logger = get_logging_config(pipeline_name="raw_pipeline")
+
+PARTITION_COLUMN = "__partition__" # Stores the keys of cached dict responses
+
+
+class ResponseCache:
+    """
+    Content-addressed on-disk cache of fetcher responses.
+
+    Responses are stored as parquet files named by the SHA-256 of the request key. An
+    entry expires `ttl_seconds` after it was written, and the least recently used entries
+    are evicted once the cache grows beyond `max_bytes`.
+
+    Args:
+        directory (str): Cache directory.
+        ttl_seconds (float): Time to live of an entry, in seconds.
+        max_bytes (int): Maximum total size of the cache, in bytes.
+    """
+
+    def __init__(self, directory: str, ttl_seconds: float, max_bytes: int):
+        self.directory = Path(directory)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """
+        Hash the parts of a request into a cache key.
+
+        Args:
+            *parts (Any): JSON-serializable request parts (fetcher, ticker, window, ...).
+
+        Returns:
+            str: Hex digest identifying the request.
+        """
+        payload = json.dumps(parts, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.parquet"
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Read a cached response.
+
+        Args:
+            key (str): Cache key.
+
+        Returns:
+            Optional[Any]: Cached DataFrame (or dict of DataFrames), None on a miss.
+        """
+        path = self._path(key)
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return
+
+        if time.time() - stat.st_mtime > self.ttl_seconds:
+            path.unlink(missing_ok=True)
+            return
+
+        try:
+            data = pd.read_parquet(path)
+        except Exception as e:
+            logger.warning(f"Discarding unreadable cache entry {path.name}: {e}")
+            path.unlink(missing_ok=True)
+            return
+
+        os.utime(path, (time.time(), stat.st_mtime)) # Access time tracks recency, mtime keeps the TTL
+        if PARTITION_COLUMN in data.columns:
+            return {
+                str(partition): frame.drop(columns=PARTITION_COLUMN).reset_index(drop=True)
+                for partition, frame in data.groupby(PARTITION_COLUMN, sort=False)
+            }
+        return data
+
+    def set(self, key: str, data: Any) -> None:
+        """
+        Store a response and evict old entries if the cache is too large.
+
+        Args:
+            key (str): Cache key.
+            data (Any): DataFrame or dict of DataFrames to store.
+        """
+        if isinstance(data, dict):
+            if not data:
+                return
+            data = pd.concat(
+                [frame.assign(**{PARTITION_COLUMN: partition}) for partition, frame in data.items()],
+                ignore_index=True,
+            )
+
+        path = self._path(key)
+        tmp_path = path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+        data.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self) -> None:
+        """Remove expired entries, then least recently used ones until under `max_bytes`."""
+        with self._lock:
+            now = time.time()
+            entries = []
+            for path in self.directory.glob("*.parquet"):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                if now - stat.st_mtime > self.ttl_seconds:
+                    path.unlink(missing_ok=True)
+                else:
+                    entries.append((max(stat.st_atime, stat.st_mtime), stat.st_size, path))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+                logger.debug(f"Evicted cache entry {path.name}")
+
+    def wrap(self, fetcher: Callable, name: str) -> Callable:
+        """
+        Wrap a fetcher so identical requests made on the same day are served from the cache.
+
+        The key is built from `name`, the call arguments and the current date, since
+        relative windows (e.g., period '2mo' or `days_back`) move every day. Failed
+        fetches (None) are not cached.
+
+        Args:
+            fetcher (Callable): Stock or news fetcher.
+            name (str): Name of the fetcher, part of the key.
+
+        Returns:
+            Callable: Fetcher with the same signature.
+        """
+        @functools.wraps(fetcher)
+        def cached_fetcher(*args, **kwargs):
+            key = self.make_key(name, args, kwargs, date.today().isoformat())
+            data = self.get(key)
+            if data is not None:
+                logger.info(f"Cache hit for {name} {args[0] if args else ''}")
+                return data
+
+            data = fetcher(*args, **kwargs)
+            if data is not None:
+                try:
+                    self.set(key, data)
+                except Exception as e:
+                    logger.warning(f"Could not cache {name} response: {e}")
+            return data
+
+        return cached_fetcher
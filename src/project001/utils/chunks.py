@@ -0,0 +1,305 @@
+import os
+import tempfile
+from typing import Any, BinaryIO, Callable, Iterable, Iterator, Optional, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from project001.config.logging_config import get_logging_config
+from project001.utils.arrow import arrow_string_types, to_arrow_strings
+
+logger = get_logging_config(pipeline_name="chunks")
+
+MIN_MERGE_BATCH = 1024 # Smallest batch read from every sorted run during a merge
+
+
+class ChunkedParquetLoader:
+    """
+    Loader of a parquet partition that can also read it in chunks of rows.
+
+    Calling it loads the whole partition, like the loader Kedro's partitioned datasets
+    return, so nodes that do not stream are unaffected. `iter_chunks` reads the file
+    record batch by record batch, so only one chunk is held in memory. It is picklable
+    when the wrapped loader and the filesystem are.
+
+    Args:
+        loader (Callable[[], pd.DataFrame]): Loader of the whole partition.
+        path (str): Path of the partition file, without protocol.
+        filesystem (Any): fsspec filesystem of the file.
+        columns (Optional[list[str]]): Columns to read (the `columns` load arg).
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[], pd.DataFrame],
+        path: str,
+        filesystem: Any,
+        columns: Optional[list[str]] = None,
+    ):
+        self._loader = loader
+        self._path = path
+        self._filesystem = filesystem
+        self._columns = columns
+
+    def __call__(self) -> pd.DataFrame:
+        return self._loader()
+
+    def read(self, columns: Optional[list[str]] = None, arrow_strings: bool = False) -> pd.DataFrame:
+        """
+        Read some columns of the partition, without decoding the others.
+
+        Args:
+            columns (Optional[list[str]]): Columns to read. Defaults to the `columns` load arg.
+            arrow_strings (bool): Read text columns as 'string[pyarrow]'.
+
+        Returns:
+            pd.DataFrame: Partition data.
+        """
+        with self._filesystem.open(self._path, "rb") as f:
+            table = pq.read_table(f, columns=columns or self._columns)
+        return table.to_pandas(types_mapper=arrow_string_types if arrow_strings else None)
+
+    def iter_chunks(self, chunk_size: int, arrow_strings: bool = False) -> Iterator[pd.DataFrame]:
+        """
+        Read the partition in chunks of at most `chunk_size` rows.
+
+        Args:
+            chunk_size (int): Rows per chunk.
+            arrow_strings (bool): Read text columns as 'string[pyarrow]'.
+
+        Yields:
+            pd.DataFrame: Chunks, in file order, with the dtypes and index of the whole
+                partition (a default index continues across chunks).
+        """
+        rows = 0
+        with self._filesystem.open(self._path, "rb") as f:
+            for batch in pq.ParquetFile(f).iter_batches(batch_size=chunk_size, columns=self._columns):
+                chunk = batch.to_pandas(types_mapper=arrow_string_types if arrow_strings else None)
+                if isinstance(chunk.index, pd.RangeIndex):
+                    chunk.index = pd.RangeIndex(rows, rows + len(chunk))
+                rows += len(chunk)
+                yield chunk
+
+
+def load_partition(partition: Union[Callable[[], pd.DataFrame], pd.DataFrame], arrow_strings: bool = False) -> Optional[pd.DataFrame]:
+    """
+    Load a whole partition.
+
+    With `arrow_strings`, loaders with a `read` method (`ChunkedParquetLoader`) create the
+    text columns as 'string[pyarrow]' while reading; the data of other loaders is
+    converted with `to_arrow_strings` once loaded.
+
+    Args:
+        partition (Union[Callable[[], pd.DataFrame], pd.DataFrame]): Partition loader or data.
+        arrow_strings (bool): Load text columns as 'string[pyarrow]'.
+
+    Returns:
+        Optional[pd.DataFrame]: Partition data, None if the loader returned None.
+    """
+    if arrow_strings and hasattr(partition, "read"):
+        return partition.read(arrow_strings=True)
+    df = partition() if callable(partition) else partition
+    return to_arrow_strings(df) if arrow_strings and df is not None else df
+
+
+def partition_chunks(
+    partition: Union[Callable[[], pd.DataFrame], pd.DataFrame],
+    chunk_size: int,
+    arrow_strings: bool = False,
+) -> Iterator[pd.DataFrame]:
+    """
+    Iterate over a partition in chunks of at most `chunk_size` rows.
+
+    Loaders with an `iter_chunks` method (`ChunkedParquetLoader`) are read chunk by chunk.
+    Other loaders are loaded whole and sliced, so the result is the same but memory is
+    not bounded.
+
+    Args:
+        partition (Union[Callable[[], pd.DataFrame], pd.DataFrame]): Partition loader or data.
+        chunk_size (int): Rows per chunk.
+        arrow_strings (bool): Load text columns as 'string[pyarrow]' (see `load_partition`).
+
+    Yields:
+        pd.DataFrame: Chunks, in partition order.
+    """
+    if hasattr(partition, "iter_chunks"):
+        yield from partition.iter_chunks(chunk_size, arrow_strings)
+        return
+    df = load_partition(partition, arrow_strings)
+    if df is None:
+        return
+    for start in range(0, len(df), chunk_size):
+        yield df.iloc[start:start + chunk_size]
+
+
+class RowDeduplicator:
+    """
+    Drop rows already seen in earlier chunks of the same partition.
+
+    Rows are compared by their 64-bit hash (`pd.util.hash_pandas_object`, index
+    excluded), kept in a sorted array; the hashes of every chunk are sorted and merged
+    into it. Without `key`, the array holds every distinct row seen so far, so memory
+    grows by 8 bytes per distinct row of the partition. With `key`, chunks must come in
+    `key` order (e.g., from `external_sort`): repeated rows share their key, so only the
+    hashes of the rows with the last key seen are kept, and memory is bounded by the
+    rows sharing one key value. Rows must have the same dtypes across chunks.
+
+    Args:
+        key (Optional[str]): Column the chunks are sorted by.
+    """
+
+    def __init__(self, key: Optional[str] = None):
+        self._key = key
+        self._last_key = None
+        self._seen = np.empty(0, dtype="uint64")
+
+    def _remember(self, hashes: np.ndarray) -> None:
+        hashes = np.sort(hashes)
+        self._seen = np.insert(self._seen, np.searchsorted(self._seen, hashes), hashes)
+
+    def filter(self, df: pd.DataFrame) -> tuple[pd.DataFrame, int]:
+        """
+        Drop the rows of a chunk that appeared earlier in the chunk or in an earlier chunk.
+
+        Args:
+            df (pd.DataFrame): Chunk, in `key` order when the deduplicator has a key.
+
+        Returns:
+            tuple[pd.DataFrame, int]: Chunk with the new rows and number of rows dropped.
+        """
+        if df.empty:
+            return df, 0
+        hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+        new = ~pd.Series(hashes).duplicated().to_numpy()
+        positions = np.searchsorted(self._seen, hashes)
+        seen = positions < len(self._seen)
+        seen[seen] = self._seen[positions[seen]] == hashes[seen]
+        new &= ~seen
+
+        if self._key is None:
+            self._remember(hashes[new])
+        else:
+            last_key = df[self._key].iloc[-1]
+            if self._last_key is None or last_key != self._last_key:
+                self._seen = np.empty(0, dtype="uint64")
+                self._last_key = last_key
+            self._remember(hashes[new & (df[self._key] == last_key).to_numpy()])
+        if new.all():
+            return df, 0
+        return df.loc[new], int((~new).sum())
+
+
+def _spill_run(df: pd.DataFrame, path: str) -> None:
+    """Write a sorted run as an uncompressed Arrow IPC file (no encoding, memory-mapped on read)."""
+    table = pa.Table.from_pandas(df, preserve_index=True)
+    with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+
+def _read_run(path: str, batch_size: int) -> Iterator[pd.DataFrame]:
+    """Read a sorted run spilled by `_spill_run`, `batch_size` rows at a time."""
+    with pa.memory_map(path) as source:
+        table = pa.ipc.open_file(source).read_all()
+        for start in range(0, table.num_rows, batch_size):
+            yield table.slice(start, batch_size).to_pandas()
+
+def _merge_runs(paths: list[str], key: str, batch_size: int) -> Iterator[pd.DataFrame]:
+    """
+    Merge sorted runs into chunks in `key` order, holding one batch per run.
+
+    Every round emits the buffered rows up to the smallest of the last keys of the
+    buffers, which no row still on disk can precede, then refills the exhausted buffers.
+
+    Args:
+        paths (list[str]): Sorted runs, in input order.
+        key (str): Sort column.
+        batch_size (int): Rows read from a run at a time.
+
+    Yields:
+        pd.DataFrame: Merged chunks.
+    """
+    readers = [_read_run(path, batch_size) for path in paths]
+    buffers = [next(reader, None) for reader in readers]
+    while True:
+        active = [i for i, buffer in enumerate(buffers) if buffer is not None]
+        if not active:
+            return
+        bound = min(buffers[i][key].iloc[-1] for i in active)
+        emitted = []
+        for i in active:
+            ready = (buffers[i][key] <= bound).to_numpy()
+            emitted.append(buffers[i].loc[ready])
+            buffers[i] = buffers[i].loc[~ready] if not ready.all() else next(readers[i], None)
+        yield pd.concat(emitted).sort_values(key, kind="stable")
+
+def external_sort(chunks: Iterable[pd.DataFrame], key: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """
+    Sort chunks by a column with bounded memory.
+
+    Every chunk is sorted and spilled to a temporary Arrow file (a sorted run). Runs whose key ranges
+    follow each other (input already in order) are streamed back one after the other;
+    otherwise they are merged holding one batch of every run. The temporary files are
+    removed when the iterator is exhausted or closed. Like the default `sort_values`,
+    the order of rows with equal keys is not guaranteed.
+
+    Args:
+        chunks (Iterable[pd.DataFrame]): Chunks with the same columns and dtypes.
+        key (str): Sort column, without nulls.
+        chunk_size (int): Rows per chunk, bounding the rows held by the merge.
+
+    Yields:
+        pd.DataFrame: Chunks in `key` order.
+    """
+    with tempfile.TemporaryDirectory(prefix="project001-sort-") as tmp_dir:
+        paths, bounds = [], []
+        for chunk in chunks:
+            if chunk.empty:
+                continue
+            chunk = chunk.sort_values(key, kind="stable")
+            path = os.path.join(tmp_dir, f"run-{len(paths):06d}.arrow")
+            _spill_run(chunk, path)
+            paths.append(path)
+            bounds.append((chunk[key].iloc[0], chunk[key].iloc[-1]))
+
+        if all(bounds[i][1] <= bounds[i + 1][0] for i in range(len(bounds) - 1)):
+            for path in paths:
+                yield from _read_run(path, chunk_size)
+            return
+        logger.info(f"Merging {len(paths)} sorted runs by {key}")
+        yield from _merge_runs(paths, key, max(MIN_MERGE_BATCH, chunk_size // len(paths)))
+
+def write_parquet_chunks(chunks: Iterable[pd.DataFrame], where: Union[str, BinaryIO], save_args: Optional[dict] = None) -> int:
+    """
+    Write chunks to a single parquet file, one at a time.
+
+    Takes the `save_args` of `pandas.ParquetDataset`: `index` (default False, chunk
+    indexes are not meaningful across chunks) and `row_group_size` are applied to every
+    chunk, the others are passed to `pyarrow.parquet.ParquetWriter`. The schema is the
+    one of the first chunk; later chunks are cast to it.
+
+    Args:
+        chunks (Iterable[pd.DataFrame]): Chunks with the same columns.
+        where (Union[str, BinaryIO]): Path or open binary file.
+        save_args (Optional[dict]): Parquet save arguments.
+
+    Returns:
+        int: Rows written. Nothing is written when there are no rows.
+    """
+    save_args = dict(save_args or {})
+    preserve_index = bool(save_args.pop("index", False))
+    row_group_size = save_args.pop("row_group_size", None)
+    writer, rows = None, 0
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=preserve_index)
+            if writer is None:
+                writer = pq.ParquetWriter(where, table.schema, **save_args)
+            elif not table.schema.equals(writer.schema, check_metadata=False):
+                table = table.cast(writer.schema)
+            writer.write_table(table, row_group_size=row_group_size)
+            rows += len(table)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
@@ -0,0 +1,111 @@
+import threading
+import time
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504) # Transient responses worth retrying
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket rate limiter.
+
+    Args:
+        rate (float): Tokens added per second (sustained requests per second).
+        capacity (int): Maximum number of tokens (burst size).
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        if rate <= 0 or capacity < 1:
+            raise ValueError("rate must be positive and capacity at least 1")
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        """Add the tokens accumulated since the last update."""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def acquire(self) -> float:
+        """
+        Take one token, waiting until one is available.
+
+        Returns:
+            float: Seconds spent waiting.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+
+class RateLimitedSession(requests.Session):
+    """
+    Requests session that takes a token from a rate limiter before every request.
+
+    Args:
+        rate_limiter (Optional[TokenBucket]): Rate limiter shared by all requests.
+    """
+
+    def __init__(self, rate_limiter: Optional[TokenBucket] = None):
+        super().__init__()
+        self.rate_limiter = rate_limiter
+
+    def request(self, method, url, *args, **kwargs) -> requests.Response:
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        return super().request(method, url, *args, **kwargs)
+
+
+def build_session(
+    pool_size: int = 10,
+    retries: int = 3,
+    backoff_factor: float = 0.5,
+    rate_limit: Optional[float] = None,
+    burst: int = 1,
+) -> requests.Session:
+    """
+    Build a pooled HTTP session with retries and optional rate limiting.
+
+    Connections are kept alive and reused across requests (up to `pool_size` per host),
+    transient responses (429/5xx) and connection errors are retried with exponential
+    backoff, honouring the `Retry-After` header.
+
+    Args:
+        pool_size (int): Connections kept per host. Should cover the number of workers.
+        retries (int): Maximum retries per request.
+        backoff_factor (float): Backoff factor in seconds (0.5 -> 0.5s, 1s, 2s, ...).
+        rate_limit (Optional[float]): Maximum sustained requests per second. None disables it.
+        burst (int): Requests allowed in a burst when `rate_limit` is set.
+
+    Returns:
+        requests.Session: Configured session.
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        respect_retry_after_header=True,
+        raise_on_status=False, # Return the last response so raise_for_status reports it
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+    rate_limiter = TokenBucket(rate_limit, burst) if rate_limit else None
+    session = RateLimitedSession(rate_limiter)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
@@ -0,0 +1,193 @@
+import multiprocessing
+import pickle
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import partial
+from typing import Any, Callable, Hashable, Iterator, Optional
+
+from project001.config.logging_config import get_logging_config
+
+logger = get_logging_config(pipeline_name="parallel")
+
+
+def worker_context() -> multiprocessing.context.BaseContext:
+    """
+    Start method of the worker processes: forkserver where available (POSIX), else spawn.
+
+    Workers are never forked from the current process: a Kedro run has threads (logging
+    handlers, the download pools of 01_raw, torch/OpenMP pools), and forking a process
+    with running threads can deadlock the child on a lock held by one of them.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def _preloaded(data: Any) -> Any:
+    """Return data that was already loaded by the parent process."""
+    return data
+
+
+def _reraise(error: Exception) -> Any:
+    """Raise, in the worker, an error that happened while loading in the parent process."""
+    raise error
+
+
+def portable_loader(loader: Callable[[], Any]) -> Callable[[], Any]:
+    """
+    Make a partition loader safe to send to a worker process.
+
+    Loaders that can be pickled (e.g., the `load` method of a Kedro dataset) are sent as
+    they are, so the worker does the I/O. Other loaders (e.g., lambdas) are called in the
+    parent process and their result is sent instead; a loading error is raised again in
+    the worker, keeping the per-partition error handling in one place.
+
+    Args:
+        loader (Callable[[], Any]): Partition loader.
+
+    Returns:
+        Callable[[], Any]: Picklable loader.
+    """
+    try:
+        pickle.dumps(loader)
+        return loader
+    except Exception:
+        try:
+            return partial(_preloaded, loader())
+        except Exception as e:
+            return partial(_reraise, e)
+
+
+def map_partitions(func: Callable[..., Any], jobs: dict[Hashable, tuple], max_workers: int = 1) -> dict[Hashable, Any]:
+    """
+    Run `func(*args)` for every job, in a process pool when `max_workers` > 1.
+
+    `func` must be a module-level function and the first argument of every job a
+    partition loader, which is made picklable with `portable_loader`. Workers start
+    with `worker_context`, not by forking the current process. A job whose worker
+    fails unexpectedly (e.g., the process dies) maps to None.
+
+    Args:
+        func (Callable[..., Any]): Function applied to every job.
+        jobs (dict[Hashable, tuple]): Arguments of `func` keyed by job.
+        max_workers (int): Number of worker processes. 1 runs in the current process.
+
+    Returns:
+        dict[Hashable, Any]: Result of every job, in the order of `jobs`.
+    """
+    if max_workers <= 1 or len(jobs) <= 1:
+        return {key: func(*args) for key, args in jobs.items()}
+
+    logger.info(f"Processing {len(jobs)} partitions with {max_workers} worker processes")
+    results = {}
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=worker_context()) as executor:
+        futures = {
+            key: executor.submit(func, portable_loader(args[0]), *args[1:])
+            for key, args in jobs.items()
+        }
+        for key, future in futures.items():
+            try:
+                results[key] = future.result()
+            except Exception as e:
+                logger.error(f"Worker failed while processing partition {key}: {e}")
+                results[key] = None
+    return results
+
+
+class _Prefetcher:
+    """
+    Run lazy jobs in a process pool, ahead of the partition being saved.
+
+    When a partition is requested, its job and the next `max_workers` jobs (in the order
+    of `jobs`) are submitted, so workers transform the upcoming partitions while the
+    current one is written. Only the results of the jobs in flight are held, about
+    `max_workers` + 1 partitions. The pool starts on the first request and shuts down
+    once every job was requested. A job requested again runs in the current process.
+    """
+
+    def __init__(self, func: Callable[..., Any], jobs: dict[Hashable, tuple], max_workers: int):
+        self._func = func
+        self._jobs = jobs
+        self._order = list(jobs)
+        self._positions = {key: position for position, key in enumerate(self._order)}
+        self._max_workers = max_workers
+        self._futures: dict[Hashable, Future] = {}
+        self._pending = set(jobs) # Jobs not requested yet
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def __deepcopy__(self, memo: dict) -> "_Prefetcher":
+        return self # Shared by the partitions of a run, also when a MemoryDataset copies them
+
+    def _submit(self, key: Hashable) -> None:
+        if key in self._pending and key not in self._futures:
+            args = self._jobs[key]
+            self._futures[key] = self._executor.submit(self._func, portable_loader(args[0]), *args[1:])
+
+    def __call__(self, key: Hashable) -> Any:
+        with self._lock:
+            if key not in self._pending:
+                future = None
+            else:
+                if self._executor is None:
+                    logger.info(f"Processing {len(self._pending)} lazy partitions with {self._max_workers} worker processes")
+                    self._executor = ProcessPoolExecutor(max_workers=self._max_workers, mp_context=worker_context())
+                position = self._positions[key]
+                for upcoming in [key, *self._order[position + 1:position + 1 + self._max_workers]]:
+                    self._submit(upcoming)
+                future = self._futures.pop(key)
+                self._pending.discard(key)
+        if future is None:
+            return self._func(*self._jobs[key])
+        try:
+            return future.result()
+        except Exception as e:
+            logger.error(f"Worker failed while processing partition {key}: {e}")
+            return None
+        finally:
+            with self._lock:
+                if not self._pending and self._executor is not None:
+                    self._executor.shutdown()
+                    self._executor = None
+
+
+def lazy_partitions(func: Callable[..., Any], jobs: dict[Hashable, tuple], max_workers: int = 1) -> dict[Hashable, Callable[[], Any]]:
+    """
+    Turn every job into a callable run only when its partition is saved.
+
+    Kedro's partitioned datasets call these one at a time while saving, so only one
+    partition is held in memory. With `max_workers` > 1, the jobs run in a process pool
+    that transforms the next partitions while one is written (see `_Prefetcher`), so
+    `jobs` should be in the order the partitions are saved and, as in `map_partitions`,
+    `func` must be a module-level function taking a partition loader first. A job
+    returning None (e.g., a failed transformation) is skipped by `ManifestPartitionedDataset`.
+
+    Args:
+        func (Callable[..., Any]): Function applied to every job.
+        jobs (dict[Hashable, tuple]): Arguments of `func` keyed by job.
+        max_workers (int): Number of worker processes. 1 runs every job when it is saved.
+
+    Returns:
+        dict[Hashable, Callable[[], Any]]: Lazy partition of every job.
+    """
+    if max_workers <= 1 or len(jobs) <= 1:
+        return {key: partial(func, *args) for key, args in jobs.items()}
+    prefetcher = _Prefetcher(func, jobs, max_workers)
+    return {key: partial(prefetcher, key) for key in jobs}
+
+
+def stream_partitions(func: Callable[..., Iterator[Any]], jobs: dict[Hashable, tuple]) -> dict[Hashable, Callable[[], Iterator[Any]]]:
+    """
+    Turn every job into a callable returning the chunks of its partition.
+
+    Like `lazy_partitions`, but `func` yields the partition in chunks, which
+    `ManifestPartitionedDataset` writes one at a time. A partition whose chunks fail
+    halfway is skipped, keeping the stored one.
+
+    Args:
+        func (Callable[..., Iterator[Any]]): Generator function applied to every job.
+        jobs (dict[Hashable, tuple]): Arguments of `func` keyed by job.
+
+    Returns:
+        dict[Hashable, Callable[[], Iterator[Any]]]: Streamed partition of every job.
+    """
+    return {key: partial(func, *args) for key, args in jobs.items()}
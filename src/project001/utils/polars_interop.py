@@ -0,0 +1,48 @@
+from typing import Any, Optional
+
+import pandas as pd
+
+
+def import_polars():
+    """Import Polars, an optional dependency (`pip install project001[polars]`)."""
+    try:
+        import polars
+    except ImportError as e:
+        raise ImportError("The Polars backend requires Polars. Install it with `pip install project001[polars]`.") from e
+    return polars
+
+
+def from_pandas(df: pd.DataFrame) -> Any:
+    """
+    Convert a pandas DataFrame to Polars, with NaN as null (as `isna` treats them).
+
+    Args:
+        df (pd.DataFrame): DataFrame to convert. Its index is dropped.
+
+    Returns:
+        polars.DataFrame: Converted DataFrame.
+    """
+    pl = import_polars()
+    return pl.from_pandas(df.rename(columns=str), nan_to_null=True)
+
+
+def to_pandas(frame: Any, dtypes: Optional[dict[str, Any]] = None) -> pd.DataFrame:
+    """
+    Convert a Polars DataFrame to pandas, casting columns to the dtypes pandas would give.
+
+    Polars returns text as object, dates as datetime64[ms] and may change the time unit of
+    datetimes; the columns listed in `dtypes` are cast back when they differ.
+
+    Args:
+        frame (polars.DataFrame): DataFrame to convert.
+        dtypes (Optional[dict[str, Any]]): Expected pandas dtype of some columns.
+
+    Returns:
+        pd.DataFrame: Converted DataFrame with a RangeIndex.
+    """
+    df = frame.to_pandas()
+    casts = {
+        col: dtype for col, dtype in (dtypes or {}).items()
+        if col in df.columns and df[col].dtype != dtype
+    }
+    return df.astype(casts) if casts else df
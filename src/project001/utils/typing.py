@@ -3,6 +3,7 @@ import typing as tp
 from pandas import DataFrame
 
 StockFetcher = tp.Callable[[str, str], DataFrame]
+BatchStockFetcher = tp.Callable[[list[str], str], dict[str, DataFrame]]
 NewsFetcher = tp.Callable[[str, str], DataFrame]
 IngestFrames = tuple[dict[str, DataFrame], dict[str, DataFrame]]
 Transformer = tp.Callable[..., DataFrame]
@@ -1,4 +1,7 @@
+import json
+import threading
 from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
 import numpy as np
 import pandas as pd
@@ -53,7 +56,54 @@ def make_fake_news(days_back: int = 2):
         "content": ["Content 1", np.nan, "Content 3"],
     })
 
+class StubHTTPServer:
+    """
+    Local HTTP server that replays a queue of canned responses.
+
+    Each queued response is a tuple (status, body, headers). Once the queue is empty the
+    last response is repeated. Every request path (with query string) is recorded.
+    """
+
+    def __init__(self):
+        self.responses = []
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.requests.append(self.path)
+                status, body, headers = stub.responses.pop(0) if len(stub.responses) > 1 else stub.responses[0]
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def queue(self, status: int, body: dict, headers: dict = None):
+        self.responses.append((status, body, headers or {}))
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
 # Fixtures
+@pytest.fixture
+def stub_http_server():
+    server = StubHTTPServer()
+    yield server
+    server.close()
+
 @pytest.fixture
 def fake_stock():
     return make_fake_stock()
@@ -0,0 +1,100 @@
+"""Tests for the consolidated parquet dataset."""
+import pandas as pd
+
+from project001.config.logging_config import get_test_logging_config
+from project001.config.transform_config import TransformConfig
+from project001.datasets import ConsolidatedParquetDataset, PartitionManifestDataset
+from project001.pipelines._03_primary.nodes import ingest_transformed_data
+
+logger = get_test_logging_config(test_name="test_consolidated")
+
+class TestConsolidatedParquetDataset:
+    """Test class for the consolidated parquet dataset."""
+
+    def _frame(self) -> pd.DataFrame:
+        return pd.DataFrame({
+            "date": ["2023-12-29", "2024-01-02", "2024-01-03"],
+            "close": [10.0, 11.0, 12.0],
+            "volume": [100, 200, 300],
+        })
+
+    def test_save_and_load_universe(self, tmp_path):
+        """Test that partitions are written under hive directories and loaded in one frame."""
+        df = self._frame()
+        dataset = ConsolidatedParquetDataset(path=str(tmp_path), date_column="date")
+        dataset.save({"EMBR3_SA": df, "VALE3_SA": lambda: df.assign(close=df["close"] * 2), "PETR4_SA": lambda: None})
+
+        assert (tmp_path / "ticker=EMBR3_SA" / "year=2024").is_dir()
+        assert not (tmp_path / "ticker=PETR4_SA").exists()
+
+        loaded = dataset.load().sort_values(["ticker", "date"], ignore_index=True)
+        assert list(loaded.columns) == ["date", "close", "volume", "ticker"]
+        assert loaded["ticker"].tolist() == ["EMBR3_SA"] * 3 + ["VALE3_SA"] * 3
+        assert loaded.loc[loaded["ticker"] == "VALE3_SA", "close"].tolist() == [20.0, 22.0, 24.0]
+        assert set(PartitionManifestDataset(path=str(tmp_path)).load()) == {"EMBR3_SA", "VALE3_SA"}
+
+    def test_projection_and_filters(self, tmp_path):
+        """Test that load_args project columns and filter on partition and data columns."""
+        df = self._frame()
+        ConsolidatedParquetDataset(path=str(tmp_path), date_column="date").save({"EMBR3_SA": df, "VALE3_SA": df})
+
+        loaded = ConsolidatedParquetDataset(
+            path=str(tmp_path),
+            date_column="date",
+            load_args={
+                "columns": ["ticker", "date", "close"],
+                "filters": [("ticker", "==", "VALE3_SA"), ("year", "==", 2024), ("close", ">", 11.0)],
+            },
+        ).load()
+
+        assert list(loaded.columns) == ["ticker", "date", "close"]
+        assert loaded.to_dict("records") == [{"ticker": "VALE3_SA", "date": "2024-01-03", "close": 12.0}]
+
+    def test_partial_save_keeps_other_partitions(self, tmp_path):
+        """Test that saving a subset rewrites only its partitions and skips unchanged ones."""
+        df = self._frame()
+        dataset = ConsolidatedParquetDataset(path=str(tmp_path), date_column="date", row_group_size=2)
+        dataset.save({"EMBR3_SA": df, "VALE3_SA": df})
+        before = (tmp_path / "ticker=EMBR3_SA" / "year=2024" / "part-0.parquet").stat().st_mtime_ns
+
+        dataset.save({"EMBR3_SA": df.copy(), "VALE3_SA": df.iloc[:1]})
+        after = (tmp_path / "ticker=EMBR3_SA" / "year=2024" / "part-0.parquet").stat().st_mtime_ns
+
+        loaded = dataset.load()
+        assert after == before
+        assert (loaded["ticker"] == "VALE3_SA").sum() == 1
+        assert not (tmp_path / "ticker=VALE3_SA" / "year=2024").exists()
+
+    def test_save_streamed_partitions(self, tmp_path, fake_stock, fake_news):
+        """Test that the chunks streamed by 03_primary with chunk_size are written and skipped when unchanged."""
+        tickers = {"TICK1.SA": "Test Company"}
+        stock = {"TICK1_SA": lambda: fake_stock.rename(columns={"Date": "date"})}
+        news = {"TICK1_SA": lambda: fake_news.rename(columns={"publishedAt": "published_at"})}
+        expected, _ = ingest_transformed_data(tickers, stock, news)
+        dataset = ConsolidatedParquetDataset(path=str(tmp_path), date_column="date")
+
+        streamed, _ = ingest_transformed_data(tickers, stock, news, config=TransformConfig(chunk_size=2))
+        dataset.save(streamed)
+        updated_at = dataset.load_manifest()["TICK1_SA"]["updated_at"]
+        dataset.save(ingest_transformed_data(tickers, stock, news, config=TransformConfig(chunk_size=2))[0])
+
+        loaded = dataset.load().sort_values("date", ignore_index=True)
+        pd.testing.assert_frame_equal(loaded.drop(columns="ticker"), expected["TICK1_SA"], check_dtype=False)
+        assert dataset.load_manifest()["TICK1_SA"]["updated_at"] == updated_at
+        assert len(list((tmp_path / "ticker=TICK1_SA").rglob("*.parquet"))) == 2 # One file per chunk
+        assert not list(tmp_path.glob("_staging-*"))
+
+    def test_failed_stream_keeps_partition(self, tmp_path):
+        """Test that a partition whose chunks fail halfway keeps the stored data."""
+        df = self._frame()
+        dataset = ConsolidatedParquetDataset(path=str(tmp_path))
+        dataset.save({"EMBR3_SA": df})
+
+        def failing():
+            yield df.iloc[:1]
+            raise ValueError("chunk failed")
+
+        dataset.save({"EMBR3_SA": failing})
+
+        pd.testing.assert_frame_equal(dataset.load().drop(columns="ticker"), df)
+        assert not list(tmp_path.glob("_staging-*"))
@@ -0,0 +1,115 @@
+"""Tests for the manifest partitioned dataset."""
+import pandas as pd
+
+from project001.config.logging_config import get_test_logging_config
+from project001.datasets import ManifestPartitionedDataset, PartitionManifestDataset, SourcedPartitions
+
+logger = get_test_logging_config(test_name="test_partitioned")
+
+class TestManifestPartitionedDataset:
+    """Test class for the manifest partitioned dataset."""
+
+    def _dataset(self, path) -> ManifestPartitionedDataset:
+        return ManifestPartitionedDataset(
+            path=str(path),
+            dataset={"type": "pandas.ParquetDataset", "save_args": {"index": False}},
+            filename_suffix=".parquet",
+        )
+
+    def test_save_and_load(self, tmp_path, fake_stock):
+        """Test that partitions round trip and the manifest is written."""
+        dataset = self._dataset(tmp_path)
+        dataset.save({"EMBR3_SA": fake_stock, "VALE3_SA": fake_stock})
+
+        loaded = dataset.load()
+        assert set(loaded.keys()) == {"EMBR3_SA", "VALE3_SA"}
+        pd.testing.assert_frame_equal(loaded["EMBR3_SA"](), fake_stock)
+        assert set(dataset.load_manifest().keys()) == {"EMBR3_SA", "VALE3_SA"}
+
+    def test_unchanged_partitions_are_not_rewritten(self, tmp_path, fake_stock):
+        """Test that only partitions whose content changed are written again."""
+        dataset = self._dataset(tmp_path)
+        dataset.save({"EMBR3_SA": fake_stock, "VALE3_SA": fake_stock})
+        before = {path.name: path.stat().st_mtime_ns for path in tmp_path.glob("*.parquet")}
+
+        changed = fake_stock.assign(Volume=fake_stock["Volume"] + 1)
+        dataset.save({"EMBR3_SA": fake_stock.copy(), "VALE3_SA": changed})
+        after = {path.name: path.stat().st_mtime_ns for path in tmp_path.glob("*.parquet")}
+
+        assert after["EMBR3_SA.parquet"] == before["EMBR3_SA.parquet"]
+        assert after["VALE3_SA.parquet"] != before["VALE3_SA.parquet"]
+        pd.testing.assert_frame_equal(dataset.load()["VALE3_SA"](), changed)
+
+    def test_none_and_lazy_partitions(self, tmp_path, fake_stock):
+        """Test that lazy partitions are resolved and None partitions are skipped."""
+        dataset = self._dataset(tmp_path)
+        dataset.save({"EMBR3_SA": lambda: fake_stock, "VALE3_SA": lambda: None})
+
+        assert set(dataset.load().keys()) == {"EMBR3_SA"}
+        assert set(dataset.load_manifest().keys()) == {"EMBR3_SA"}
+
+    def test_allow_empty(self, tmp_path, fake_stock):
+        """Test that a dataset with allow_empty loads an empty dict before anything is saved."""
+        dataset = ManifestPartitionedDataset(
+            path=str(tmp_path), dataset="pandas.ParquetDataset", filename_suffix=".parquet", allow_empty=True
+        )
+        assert dataset.load() == {}
+
+        self._dataset(tmp_path).save({"EMBR3_SA": fake_stock})
+        pd.testing.assert_frame_equal(dataset.load()["EMBR3_SA"].read(["Close"]), fake_stock[["Close"]])
+
+    def test_manifest_dataset(self, tmp_path, fake_stock):
+        """Test that the manifest dataset exposes the hash of every partition."""
+        assert PartitionManifestDataset(path=str(tmp_path)).load() == {}
+
+        self._dataset(tmp_path).save({"EMBR3_SA": fake_stock})
+        hashes = PartitionManifestDataset(path=str(tmp_path)).load()
+
+        assert set(hashes.keys()) == {"EMBR3_SA"}
+        assert len(hashes["EMBR3_SA"]) == 64
+
+    def test_sources_are_recorded(self, tmp_path, fake_stock):
+        """Test that the upstream hash of every saved partition is recorded, and not the one of skipped partitions."""
+        dataset = self._dataset(tmp_path)
+        sources = PartitionManifestDataset(path=str(tmp_path), field="source")
+
+        dataset.save(SourcedPartitions(
+            {"EMBR3_SA": lambda: fake_stock, "VALE3_SA": lambda: None},
+            sources={"EMBR3_SA": "raw-1", "VALE3_SA": "raw-1"},
+        ))
+        assert sources.load() == {"EMBR3_SA": "raw-1"}
+
+        dataset.save(SourcedPartitions({"EMBR3_SA": fake_stock.copy()}, sources={"EMBR3_SA": "raw-2"})) # Unchanged output
+        assert sources.load() == {"EMBR3_SA": "raw-2"}
+
+        dataset.save({"EMBR3_SA": fake_stock.assign(Close=0.0)}) # Plain dicts record no source
+        assert sources.load() == {}
+
+    def test_chunked_save_and_load(self, tmp_path, fake_stock):
+        """Test that a partition given as chunks is written as one file and read back in chunks."""
+        dataset = self._dataset(tmp_path)
+        dataset.save({"EMBR3_SA": iter([fake_stock.iloc[:2], fake_stock.iloc[2:]])})
+
+        loader = dataset.load()["EMBR3_SA"]
+        pd.testing.assert_frame_equal(loader(), fake_stock)
+        chunks = list(loader.iter_chunks(2))
+        assert [len(chunk) for chunk in chunks] == [2, 1]
+        pd.testing.assert_frame_equal(pd.concat(chunks), fake_stock)
+
+    def test_unchanged_chunked_partitions_are_not_rewritten(self, tmp_path, fake_stock):
+        """Test that chunked partitions are compared by hash and failed ones keep the stored file."""
+        dataset = self._dataset(tmp_path)
+        dataset.save({"EMBR3_SA": lambda: iter([fake_stock])})
+        before = (tmp_path / "EMBR3_SA.parquet").stat().st_mtime_ns
+        manifest = dataset.load_manifest()
+
+        def failing():
+            yield fake_stock
+            raise ValueError("broken chunk")
+
+        dataset.save({"EMBR3_SA": iter([fake_stock.copy()])})
+        dataset.save({"EMBR3_SA": failing()})
+
+        assert (tmp_path / "EMBR3_SA.parquet").stat().st_mtime_ns == before
+        assert dataset.load_manifest() == manifest
+        assert sorted(path.name for path in tmp_path.iterdir()) == ["EMBR3_SA.parquet", "_manifest.json"]
@@ -0,0 +1,52 @@
+"""Tests for the DuckDB query layer."""
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from project001.config.logging_config import get_test_logging_config
+from project001.datasets import ConsolidatedParquetDataset, DataQuery, DuckDBQueryDataset
+
+pytest.importorskip("duckdb")
+
+logger = get_test_logging_config(test_name="test_query")
+
+class TestDataQuery:
+    """Test class for the DuckDB query layer."""
+
+    @pytest.fixture
+    def data_dir(self, tmp_path, fake_stock):
+        """Data directory with flat and hive-partitioned datasets."""
+        stock = tmp_path / "03_primary" / "stock"
+        stock.mkdir(parents=True)
+        fake_stock.to_parquet(stock / "EMBR3_SA.parquet", index=False)
+        fake_stock.assign(Close=fake_stock["Close"] * 2).to_parquet(stock / "VALE3_SA.parquet", index=False)
+        (tmp_path / "01_raw" / ".cache").mkdir(parents=True)
+
+        frame = pd.DataFrame({"date": ["2023-12-29", "2024-01-02"], "close": [1.0, 2.0]})
+        ConsolidatedParquetDataset(path=str(tmp_path / "03_primary" / "stock_consolidated"), date_column="date").save(
+            {"EMBR3_SA": frame})
+        return tmp_path
+
+    def test_views(self, data_dir):
+        """Test that every dataset directory is registered, hidden directories are not."""
+        with DataQuery(str(data_dir)) as query:
+            assert set(query.views) == {"primary_stock", "primary_stock_consolidated"}
+
+    def test_aggregation_over_partitions(self, data_dir, fake_stock):
+        """Test that queries see the partition id of flat datasets and return pandas or Arrow."""
+        sql = 'SELECT partition, max("Close") AS close FROM primary_stock GROUP BY 1 ORDER BY 1'
+        with DataQuery(str(data_dir)) as query:
+            result = query.to_pandas(sql)
+            table = query.to_arrow("SELECT * FROM primary_stock_consolidated WHERE year = ?", [2024])
+
+        assert result["partition"].tolist() == ["EMBR3_SA", "VALE3_SA"]
+        assert result["close"].tolist() == [fake_stock["Close"].max(), fake_stock["Close"].max() * 2]
+        assert isinstance(table, pa.Table)
+        assert table.num_rows == 1
+        assert table.column("ticker").to_pylist() == ["EMBR3_SA"]
+
+    def test_query_dataset(self, data_dir):
+        """Test that the query dataset loads the result of its SQL query."""
+        dataset = DuckDBQueryDataset(sql="SELECT count(*) AS n FROM primary_stock", root=str(data_dir))
+
+        assert dataset.load()["n"].tolist() == [6]
@@ -0,0 +1,52 @@
+"""Tests for the parquet storage profiles of conf/base/globals.yml."""
+from pathlib import Path
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+from kedro.config import OmegaConfigLoader
+
+from project001.config.logging_config import get_test_logging_config
+
+logger = get_test_logging_config(test_name="test_storage_profiles")
+
+CONF_SOURCE = str(Path(__file__).resolve().parents[2] / "conf")
+
+class TestStorageProfiles:
+    """Test class for the storage profiles."""
+
+    def setup_method(self):
+        """Load the project configuration."""
+        self.config = OmegaConfigLoader(CONF_SOURCE, base_env="base", default_run_env="local")
+
+    def test_catalog_uses_layer_profiles(self):
+        """Test that every ParquetDataset entry resolves the save_args of its layer."""
+        catalog = self.config["catalog"]
+        storage = self.config["globals"]["storage"]
+        layers = {"01": "raw", "02": "intermediate", "03": "primary", "04": "feature"}
+
+        for name, entry in catalog.items():
+            if entry.get("dataset", {}).get("type") == "pandas.ParquetDataset":
+                assert entry["dataset"]["save_args"] == storage[layers[name[:2]]]
+
+    @pytest.mark.parametrize("profile", ["default", "fast_write", "balanced", "archival"])
+    def test_profiles_round_trip(self, tmp_path, fake_stock, profile):
+        """Test that every profile is accepted by pandas/pyarrow and keeps the data."""
+        save_args = self.config["globals"]["storage_profiles"][profile]
+        fake_stock.to_parquet(tmp_path / "stock.parquet", **save_args)
+
+        pd.testing.assert_frame_equal(pd.read_parquet(tmp_path / "stock.parquet"), fake_stock)
+
+    @pytest.mark.parametrize("profile", ["balanced", "archival"])
+    def test_dictionary_columns(self, tmp_path, fake_news, profile):
+        """Test that only the listed text columns are dictionary-encoded."""
+        save_args = self.config["globals"]["storage_profiles"][profile]
+        fake_news.to_parquet(tmp_path / "news.parquet", **save_args)
+
+        row_group = pq.ParquetFile(tmp_path / "news.parquet").metadata.row_group(0)
+        encoded = {
+            row_group.column(i).path_in_schema
+            for i in range(row_group.num_columns)
+            if row_group.column(i).dictionary_page_offset is not None
+        }
+        assert encoded == set(save_args["use_dictionary"]) & set(fake_news.columns)
@@ -1,15 +1,19 @@
+import threading
 from unittest.mock import MagicMock, patch
 
 import pandas as pd
 import requests
 
 from project001.config.logging_config import get_test_logging_config
+from project001.datasets import ManifestPartitionedDataset
 from project001.pipelines._01_raw.nodes import (
     IngestConfig,
     _get_news_data,
     _get_stock_data,
+    _get_stock_data_batch,
     ingest_raw_data,
 )
+from project001.utils.http import build_session
 
 logger = get_test_logging_config(test_name="test_pipeline_01_raw")
 
@@ -157,3 +161,244 @@ class TestRawPipeline:
         assert news_data == {}
         assert set(stock_data.keys()) == {"EMBR3_SA", "PETR4_SA"}
         assert all(df.empty for df in stock_data.values())
+
+    def test_ingest_raw_data_concurrent_fetches(self, fake_stock):
+        config = IngestConfig(
+            language="pt", days_back=1, api_key="api_key", period="1d", max_workers=2
+        )
+        barrier = threading.Barrier(2, timeout=5)
+
+        def blocking_stock_fetcher(ticker, period):
+            barrier.wait() # Only passes if both tickers are fetched at the same time
+            return fake_stock.copy()
+
+        stock_data, news_data = ingest_raw_data(
+            tickers=self.tickers,
+            config=config,
+            stock_fetcher=blocking_stock_fetcher,
+            news_fetcher=lambda *args, **kwargs: pd.DataFrame()
+        )
+
+        assert set(stock_data.keys()) == {"EMBR3_SA", "PETR4_SA"}
+        assert set(news_data.keys()) == {"EMBR3_SA", "PETR4_SA"}
+
+    def test_ingest_raw_data_concurrent_error_isolation(self, fake_stock):
+        config = IngestConfig(
+            language="pt", days_back=1, api_key="api_key", period="1d", max_workers=4
+        )
+
+        def partially_failing_stock_fetcher(ticker, period):
+            if ticker == "PETR4.SA":
+                raise Exception("Stock fetcher failed")
+            return fake_stock.copy()
+
+        stock_data, _ = ingest_raw_data(
+            tickers=self.tickers,
+            config=config,
+            stock_fetcher=partially_failing_stock_fetcher,
+            news_fetcher=lambda *args, **kwargs: pd.DataFrame()
+        )
+
+        assert set(stock_data.keys()) == {"EMBR3_SA"}
+
+    @patch("project001.pipelines._01_raw.nodes.yf.download")
+    def test_get_stock_data_batch(self, mock_download, fake_stock):
+        history = fake_stock.drop(columns="ticker").set_index("Date")
+        wide = pd.concat({ticker: history for ticker in self.tickers}, axis=1)
+        mock_download.return_value = wide
+
+        result = _get_stock_data_batch(list(self.tickers), self.config.period)
+
+        mock_download.assert_called_once()
+        assert set(result.keys()) == {"EMBR3_SA", "PETR4_SA"}
+        for ticker, df in zip(self.tickers, result.values()):
+            assert {"Date", "Open", "Close", "Volume", "ticker"}.issubset(df.columns)
+            assert (df["ticker"] == ticker).all()
+            assert len(df) == len(fake_stock)
+
+    def test_ingest_raw_data_batches_stock_requests(self, fake_stock):
+        config = IngestConfig(
+            language="pt", days_back=1, api_key="api_key", period="1d", stock_batch_size=2
+        )
+        tickers = {"EMBR3.SA": "Embraer", "PETR4.SA": "Petrobras", "VALE3.SA": "Vale"}
+        requested_chunks = []
+
+        def batch_stock_fetcher(chunk, period):
+            requested_chunks.append(chunk)
+            return {ticker.replace(".", "_"): fake_stock.copy() for ticker in chunk}
+
+        stock_data, _ = ingest_raw_data(
+            tickers=tickers,
+            config=config,
+            news_fetcher=lambda *args, **kwargs: pd.DataFrame(),
+            batch_stock_fetcher=batch_stock_fetcher,
+        )
+
+        assert sorted(map(len, requested_chunks)) == [1, 2]
+        assert set(stock_data.keys()) == {"EMBR3_SA", "PETR4_SA", "VALE3_SA"}
+
+    @staticmethod
+    def _stored(path):
+        return ManifestPartitionedDataset(
+            path=str(path), dataset="pandas.ParquetDataset", filename_suffix=".parquet", allow_empty=True
+        )
+
+    def test_ingest_raw_data_incremental_stock(self, tmp_path, fake_stock):
+        stored = fake_stock.iloc[:2]
+        stored.to_parquet(tmp_path / "EMBR3_SA.parquet", index=False)
+        config = IngestConfig(
+            language="pt", days_back=1, api_key="api_key", period="1y", incremental=True,
+        )
+        requests_made = {}
+
+        def stock_fetcher(ticker, period, start=None):
+            requests_made[ticker] = start
+            if start is None:
+                return fake_stock.copy()
+            return fake_stock[fake_stock["Date"] >= pd.Timestamp(start)].reset_index(drop=True)
+
+        stock_data, _ = ingest_raw_data(
+            tickers=self.tickers,
+            config=config,
+            stock_fetcher=stock_fetcher,
+            news_fetcher=lambda *args, **kwargs: pd.DataFrame(),
+            stored_stock=self._stored(tmp_path).load(),
+        )
+
+        # Stored ticker is fetched from its last stored date, new ticker gets the full period
+        assert requests_made["EMBR3.SA"] == stored["Date"].max().strftime("%Y-%m-%d")
+        assert requests_made["PETR4.SA"] is None
+
+        merged = stock_data["EMBR3_SA"]
+        assert len(merged) == len(fake_stock)
+        assert not merged["Date"].duplicated().any()
+        assert merged["Date"].is_monotonic_increasing
+
+    @staticmethod
+    def _news_page(start, count, total):
+        response = MagicMock()
+        response.raise_for_status.return_value = None
+        response.json.return_value = {
+            "totalResults": total,
+            "articles": [
+                {
+                    "title": f"News {i}",
+                    "description": f"Desc {i}",
+                    "url": f"URL {i}",
+                    "publishedAt": "2024-01-01T00:00:00Z",
+                    "source": {"name": "Source"},
+                    "content": f"Content {i}",
+                }
+                for i in range(start, start + count)
+            ],
+        }
+        return response
+
+    def test_get_news_data_paginates(self):
+        pages = [self._news_page(0, 100, 150), self._news_page(100, 50, 150)]
+
+        with patch("requests.get", side_effect=pages) as mock_get:
+            result = _get_news_data(self.company, self.config.language, self.config.days_back, self.config.api_key)
+
+        assert mock_get.call_count == 2
+        assert [call.kwargs["params"]["page"] for call in mock_get.call_args_list] == [1, 2]
+        assert len(result) == 150
+        assert result["url"].is_unique
+
+    def test_get_news_data_keeps_pages_before_error(self):
+        failing_page = MagicMock()
+        failing_page.raise_for_status.side_effect = requests.exceptions.HTTPError("426 Upgrade Required")
+        pages = [self._news_page(0, 100, 500), failing_page]
+
+        with patch("requests.get", side_effect=pages):
+            result = _get_news_data(self.company, self.config.language, self.config.days_back, self.config.api_key)
+
+        assert len(result) == 100
+
+    def test_ingest_raw_data_incremental_news(self, tmp_path, fake_news):
+        stored = fake_news.dropna().iloc[:1]
+        stored.to_parquet(tmp_path / "EMBR3_SA.parquet", index=False)
+        config = IngestConfig(
+            language="pt", days_back=1, api_key="api_key", period="1d", incremental=True,
+        )
+        requests_made = {}
+
+        def news_fetcher(company, language, days_back, api_key, since=None):
+            requests_made[company] = since
+            return fake_news.dropna().reset_index(drop=True)
+
+        _, news_data = ingest_raw_data(
+            tickers=self.tickers,
+            config=config,
+            stock_fetcher=lambda *args, **kwargs: pd.DataFrame(),
+            news_fetcher=news_fetcher,
+            stored_stock=self._stored(tmp_path / "stock").load(),
+            stored_news=self._stored(tmp_path).load(),
+        )
+
+        assert requests_made["Embraer"] == stored["publishedAt"].max().strftime("%Y-%m-%dT%H:%M:%S")
+        assert requests_made["Petrobras"] is None
+
+        merged = news_data["EMBR3_SA"]
+        assert merged["url"].is_unique
+        assert len(merged) == len(fake_news.dropna())
+        assert merged["publishedAt"].is_monotonic_increasing
+
+    def test_ingest_raw_data_incremental_news_without_url(self, tmp_path, fake_news):
+        stored = fake_news.dropna().assign(url=None)
+        stored.to_parquet(tmp_path / "EMBR3_SA.parquet", index=False)
+        fetched = pd.concat([
+            stored.iloc[1:], # Fetched again
+            stored.iloc[:1].assign(title="News 4", publishedAt=pd.Timestamp.now()), # New article without url
+        ], ignore_index=True)
+        config = IngestConfig(
+            language="pt", days_back=1, api_key="api_key", period="1d", incremental=True,
+        )
+
+        _, news_data = ingest_raw_data(
+            tickers={"EMBR3.SA": "Embraer"},
+            config=config,
+            stock_fetcher=lambda *args, **kwargs: pd.DataFrame(),
+            news_fetcher=lambda *args, **kwargs: fetched.copy(),
+            stored_news=self._stored(tmp_path).load(),
+        )
+
+        assert news_data["EMBR3_SA"]["title"].tolist() == ["News 1", "News 3", "News 4"]
+
+    def test_get_news_data_with_session_retries(self, stub_http_server, fake_news):
+        articles = fake_news.dropna().astype({"publishedAt": str}).to_dict(orient="records")
+        for article in articles:
+            article["source"] = {"name": article["source"]}
+        stub_http_server.queue(429, {"status": "error"}, {"Retry-After": "0"})
+        stub_http_server.queue(200, {"totalResults": len(articles), "articles": articles})
+
+        with build_session(retries=2, backoff_factor=0.01, rate_limit=10, burst=1) as session:
+            result = _get_news_data(
+                self.company, self.config.language, self.config.days_back, self.config.api_key,
+                session=session, url=stub_http_server.url,
+            )
+
+        assert len(stub_http_server.requests) == 2
+        assert len(result) == len(articles)
+
+    def test_ingest_raw_data_with_cache(self, tmp_path, fake_stock, fake_news):
+        config = IngestConfig(
+            language="pt", days_back=1, api_key="api_key", period="1d",
+            cache_enabled=True, cache_dir=str(tmp_path),
+        )
+        mock_stock = MagicMock(return_value=fake_stock)
+        mock_news = MagicMock(return_value=fake_news)
+
+        for _ in range(2):
+            stock_data, news_data = ingest_raw_data(
+                tickers=self.tickers,
+                config=config,
+                stock_fetcher=mock_stock,
+                news_fetcher=mock_news,
+            )
+
+        # The second run is served from the cache
+        assert mock_stock.call_count == len(self.tickers)
+        assert mock_news.call_count == len(self.tickers)
+        assert set(stock_data.keys()) == {"EMBR3_SA", "PETR4_SA"}
+        assert set(news_data.keys()) == {"EMBR3_SA", "PETR4_SA"}
@@ -1,11 +1,28 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+
+import numpy as np
 import pandas as pd
+import pytest
+from kedro.config import OmegaConfigLoader
+from kedro.io import DataCatalog
+from kedro.runner import SequentialRunner
 
 from project001.config.logging_config import get_test_logging_config
+from project001.config.transform_config import TransformConfig
 from project001.pipelines._02_intermediate.nodes import (
+    _drop_duplicates_and_nulls,
+    _normalize_column_names,
+    _normalize_columns,
     _to_snake_case,
     _transform_data,
+    _transform_data_polars,
     ingest_transformed_data,
 )
+from project001.datasets import ManifestPartitionedDataset, PartitionManifestDataset
+from project001.pipelines._02_intermediate.pipeline import create_pipeline
+from project001.utils import parallel
 
 logger = get_test_logging_config(test_name="test_pipeline_02_intermediate")
 
@@ -123,3 +140,307 @@ class TestIntermediatePipeline:
         assert isinstance(news_data, dict)
         assert len(stock_data) == 0
         assert not news_data[self.ticker_key.replace(".", "_")].empty
+
+    def test_ingest_transformed_data_only_changed(self, tmp_path, fake_stock: pd.DataFrame, fake_news: pd.DataFrame):
+        """
+        Test that only partitions whose upstream hash changed since they were saved are transformed again.
+
+        Args:
+            tmp_path (Path): Temporary directory for the outputs.
+            fake_stock (pd.DataFrame): Fake stock data.
+            fake_news (pd.DataFrame): Fake news data.
+        """
+        config = TransformConfig(only_changed=True)
+        raw_stock = {"EMBR3_SA": lambda: fake_stock, "PETR4_SA": lambda: fake_stock}
+        raw_news = {"EMBR3_SA": lambda: fake_news}
+        manifests = {
+            "raw_stock_manifest": {"EMBR3_SA": "stock-1", "PETR4_SA": "stock-1"},
+            "raw_news_manifest": {"EMBR3_SA": "news-1"},
+        }
+        outputs = {kind: ManifestPartitionedDataset(path=str(tmp_path / kind), dataset="pandas.ParquetDataset") for kind in ("stock", "news")}
+
+        def run() -> tuple:
+            sources = {
+                f"{kind}_sources": PartitionManifestDataset(path=str(tmp_path / kind), field="source").load()
+                for kind in outputs
+            }
+            return ingest_transformed_data(
+                tickers=self.tickers, raw_stock=raw_stock, raw_news=raw_news, config=config, **manifests, **sources
+            )
+
+        stock_data, news_data = run()
+        assert set(stock_data) == {"EMBR3_SA", "PETR4_SA"}
+        assert set(news_data) == {"EMBR3_SA"}
+        outputs["stock"].save(stock_data) # Records the raw hash of every saved partition
+        outputs["news"].save(news_data)
+
+        manifests["raw_stock_manifest"]["PETR4_SA"] = "stock-2"
+        stock_data, news_data = run()
+        assert set(stock_data) == {"PETR4_SA"}
+        assert news_data == {}
+
+    def test_ingest_transformed_data_process_pool(self, tmp_path, fake_stock: pd.DataFrame, fake_news: pd.DataFrame):
+        """
+        Test that the process pool returns the same partitions as the serial run.
+
+        Args:
+            tmp_path (Path): Temporary directory for the partitions.
+            fake_stock (pd.DataFrame): Fake stock data.
+            fake_news (pd.DataFrame): Fake news data.
+        """
+        raw_stock, raw_news = {}, {}
+        for ticker_name in ["EMBR3_SA", "PETR4_SA"]:
+            fake_stock.to_parquet(tmp_path / f"stock_{ticker_name}.parquet", index=False)
+            fake_news.to_parquet(tmp_path / f"news_{ticker_name}.parquet", index=False)
+            raw_stock[ticker_name] = partial(pd.read_parquet, tmp_path / f"stock_{ticker_name}.parquet")
+            raw_news[ticker_name] = partial(pd.read_parquet, tmp_path / f"news_{ticker_name}.parquet")
+
+        serial = ingest_transformed_data(tickers=self.tickers, raw_stock=raw_stock, raw_news=raw_news)
+        parallel = ingest_transformed_data(
+            tickers=self.tickers, raw_stock=raw_stock, raw_news=raw_news, config=TransformConfig(max_workers=2)
+        )
+
+        for serial_data, parallel_data in zip(serial, parallel):
+            assert set(serial_data) == set(parallel_data) == {"EMBR3_SA", "PETR4_SA"}
+            for ticker_name in serial_data:
+                pd.testing.assert_frame_equal(serial_data[ticker_name], parallel_data[ticker_name])
+
+    def test_ingest_transformed_data_process_pool_error_isolation(self, fake_news: pd.DataFrame):
+        """
+        Test that failing and unpicklable loaders are isolated in the process pool.
+
+        Args:
+            fake_news (pd.DataFrame): Fake news data.
+        """
+        def failing_loader():
+            raise ValueError("Failed to load data")
+        raw_stock = {"EMBR3_SA": failing_loader}
+        raw_news = {"EMBR3_SA": lambda: fake_news, "PETR4_SA": lambda: fake_news}
+        stock_data, news_data = ingest_transformed_data(
+            tickers=self.tickers, raw_stock=raw_stock, raw_news=raw_news, config=TransformConfig(max_workers=2)
+        )
+        assert len(stock_data) == 0
+        assert set(news_data) == {"EMBR3_SA", "PETR4_SA"}
+
+    def test_ingest_transformed_data_lazy(self, tmp_path, fake_stock: pd.DataFrame, fake_news: pd.DataFrame):
+        """
+        Test that lazy mode defers loading until the partitions are saved.
+
+        Args:
+            tmp_path (Path): Temporary directory for the saved partitions.
+            fake_stock (pd.DataFrame): Fake stock data.
+            fake_news (pd.DataFrame): Fake news data.
+        """
+        loaded = []
+
+        def loader(df, name):
+            def load():
+                loaded.append(name)
+                return df
+            return load
+
+        def failing_loader():
+            raise ValueError("Failed to load data")
+
+        raw_stock = {"EMBR3_SA": loader(fake_stock, "EMBR3_SA"), "PETR4_SA": failing_loader}
+        raw_news = {"EMBR3_SA": loader(fake_news, "EMBR3_SA")}
+        stock_data, news_data = ingest_transformed_data(
+            tickers=self.tickers, raw_stock=raw_stock, raw_news=raw_news, config=TransformConfig(lazy=True)
+        )
+        assert loaded == []
+        assert all(callable(partition) for partition in stock_data.values())
+
+        dataset = ManifestPartitionedDataset(
+            path=str(tmp_path), dataset="pandas.ParquetDataset", filename_suffix=".parquet"
+        )
+        dataset.save(stock_data)
+
+        # The failing partition is skipped, the other is transformed and written
+        assert loaded == ["EMBR3_SA"]
+        saved = dataset.load()
+        assert set(saved) == {"EMBR3_SA"}
+        assert not saved["EMBR3_SA"]().isnull().any().any()
+
+    def test_pipeline_with_catalog_params(self, tmp_path, monkeypatch, fake_stock: pd.DataFrame, fake_news: pd.DataFrame):
+        """
+        Test that the pipeline, run with the project catalog and parameters, transforms the partitions in the process pool.
+
+        Args:
+            tmp_path (Path): Working directory of the catalog paths.
+            monkeypatch (pytest.MonkeyPatch): Records the process pools.
+            fake_stock (pd.DataFrame): Fake stock data.
+            fake_news (pd.DataFrame): Fake news data.
+        """
+        conf = OmegaConfigLoader(conf_source=str(Path(__file__).parents[3] / "conf"), base_env="base", default_run_env="local")
+        params = conf["parameters"]
+        pools, start_methods = [], []
+
+        class RecordingExecutor(ProcessPoolExecutor):
+            def __init__(self, max_workers: int, mp_context=None):
+                pools.append(max_workers)
+                start_methods.append(mp_context.get_start_method())
+                super().__init__(max_workers=max_workers, mp_context=mp_context)
+
+        monkeypatch.setattr(parallel, "ProcessPoolExecutor", RecordingExecutor)
+        monkeypatch.chdir(tmp_path) # Relative catalog paths resolve in the temporary directory
+        catalog = DataCatalog.from_config(conf["catalog"])
+        for name, value in params.items():
+            catalog[f"params:{name}"] = value
+        ticker_names = [ticker.replace(".", "_") for ticker in params["tickers"]]
+        catalog.save("01_raw_stock", {ticker_name: fake_stock for ticker_name in ticker_names})
+        catalog.save("01_raw_news", {ticker_name: fake_news for ticker_name in ticker_names})
+
+        SequentialRunner().run(create_pipeline(), catalog)
+
+        assert params["lazy_save"] and pools == [params["transform_workers"]] > [1]
+        assert "fork" not in start_methods
+        assert set(catalog.load("02_intermediate_stock")) == set(ticker_names)
+        assert set(catalog.load("02_intermediate_news")) == set(ticker_names)
+
+    def test_normalize_column_names(self, fake_stock: pd.DataFrame):
+        """
+        Test that columns are renamed once per header and without copying the data.
+
+        Args:
+            fake_stock (pd.DataFrame): Fake stock data.
+        """
+        _normalize_columns.cache_clear()
+        original_columns = list(fake_stock.columns)
+
+        first = _normalize_column_names(fake_stock)
+        second = _normalize_column_names(fake_stock.copy())
+
+        assert list(first.columns) == [_to_snake_case(col) for col in original_columns]
+        assert list(fake_stock.columns) == original_columns # Input is not renamed
+        assert _normalize_columns.cache_info().hits == 1
+        assert second.columns.equals(first.columns)
+
+        first.loc[0, "volume"] = -1 # Shared data: the rename did not copy the blocks
+        assert fake_stock.loc[0, "Volume"] == -1
+
+    def test_drop_duplicates_and_nulls(self):
+        """
+        Test that the fused cleaning matches drop_duplicates().dropna() and its counts.
+        """
+        df = pd.DataFrame({
+            "date": [1, 2, 2, 3, 3, 4],
+            "close": [10.0, 20.0, 20.0, None, None, 40.0],
+            "title": ["a", "b", "b", "c", "c", None],
+        })
+
+        cleaned, qt_duplicated, qt_null = _drop_duplicates_and_nulls(df)
+
+        pd.testing.assert_frame_equal(cleaned, df.drop_duplicates().dropna())
+        assert qt_duplicated == df.duplicated().sum() == 2
+        assert qt_null == df.isnull().sum().sum() == 3
+
+    def test_ingest_transformed_data_arrow_strings(self, fake_stock: pd.DataFrame, fake_news: pd.DataFrame):
+        """
+        Test that text columns are loaded as Arrow-backed strings when arrow_strings is set.
+
+        Args:
+            fake_stock (pd.DataFrame): Fake stock data.
+            fake_news (pd.DataFrame): Fake news data.
+        """
+        tickers = {"TICK1.SA": "Test Company"}
+        stock, news = ingest_transformed_data(
+            tickers,
+            {"TICK1_SA": lambda: fake_stock.copy()},
+            {"TICK1_SA": lambda: fake_news.copy()},
+            config=TransformConfig(arrow_strings=True),
+        )
+        expected_stock, expected_news = ingest_transformed_data(
+            tickers, {"TICK1_SA": lambda: fake_stock.copy()}, {"TICK1_SA": lambda: fake_news.copy()})
+
+        assert str(news["TICK1_SA"]["title"].dtype) == "string"
+        assert news["TICK1_SA"]["title"].dtype.storage == "pyarrow"
+        pd.testing.assert_frame_equal(news["TICK1_SA"].astype(object), expected_news["TICK1_SA"].astype(object))
+        pd.testing.assert_frame_equal(stock["TICK1_SA"].astype(object), expected_stock["TICK1_SA"].astype(object))
+
+    def test_transform_data_polars(self, fake_stock: pd.DataFrame, fake_news: pd.DataFrame):
+        """
+        Test that the Polars transformer gives the same output as the pandas one.
+
+        Args:
+            fake_stock (pd.DataFrame): Fake stock data.
+            fake_news (pd.DataFrame): Fake news data.
+        """
+        pytest.importorskip("polars")
+        shuffled_news = pd.concat([fake_news] * 3, ignore_index=True).sample(frac=1, random_state=0)
+
+        for df in (fake_stock, fake_news, shuffled_news):
+            pd.testing.assert_frame_equal(_transform_data_polars(df, "TICK1.SA"), _transform_data(df, "TICK1.SA"))
+
+    def test_ingest_transformed_data_polars_backend(self, fake_stock: pd.DataFrame, fake_news: pd.DataFrame):
+        """
+        Test that the polars backend gives the same partitions as the pandas backend.
+
+        Args:
+            fake_stock (pd.DataFrame): Fake stock data.
+            fake_news (pd.DataFrame): Fake news data.
+        """
+        pytest.importorskip("polars")
+        tickers = {"TICK1.SA": "Test Company"}
+        raw_stock = {"TICK1_SA": lambda: fake_stock.copy()}
+        raw_news = {"TICK1_SA": lambda: fake_news.copy()}
+
+        expected = ingest_transformed_data(tickers, raw_stock, raw_news)
+        result = ingest_transformed_data(tickers, raw_stock, raw_news, config=TransformConfig(backend="polars", max_workers=2))
+
+        for expected_data, data in zip(expected, result):
+            assert data.keys() == expected_data.keys()
+            for name in data:
+                pd.testing.assert_frame_equal(data[name], expected_data[name])
+
+    def test_ingest_transformed_data_chunked(self, tmp_path, fake_news: pd.DataFrame):
+        """
+        Test that streaming in chunks writes the same data as transforming whole partitions,
+        with duplicates spread across chunks and dates out of order.
+
+        Args:
+            tmp_path (Path): Temporary directory for the raw and transformed partitions.
+            fake_news (pd.DataFrame): Fake news data.
+        """
+        rng = np.random.default_rng(0)
+        dates = pd.date_range("2000-01-03", periods=60, freq="B", tz="America/Sao_Paulo")
+        raw = pd.DataFrame({
+            "Date": dates,
+            "Close": rng.random(60).round(2),
+            "Stock Splits": 0.0,
+        }).iloc[rng.permutation(60)]
+        raw.loc[raw.index[:3], "Close"] = np.nan
+        raw = pd.concat([raw, raw.iloc[10:25]], ignore_index=True) # Repeated in later chunks
+
+        raw_stock = ManifestPartitionedDataset(
+            path=str(tmp_path / "raw"), dataset="pandas.ParquetDataset", filename_suffix=".parquet"
+        )
+        raw_stock.save({"EMBR3_SA": raw})
+
+        def failing_loader():
+            raise ValueError("Failed to load data")
+
+        stock_data, news_data = ingest_transformed_data(
+            tickers=self.tickers,
+            raw_stock={**raw_stock.load(), "PETR4_SA": failing_loader},
+            raw_news={"EMBR3_SA": lambda: fake_news},
+            config=TransformConfig(chunk_size=7),
+        )
+        output = ManifestPartitionedDataset(
+            path=str(tmp_path / "out"), dataset="pandas.ParquetDataset", filename_suffix=".parquet"
+        )
+        output.save(stock_data)
+        output.save({f"news_{name}": partition for name, partition in news_data.items()})
+
+        saved = output.load()
+        assert set(saved) == {"EMBR3_SA", "news_EMBR3_SA"}
+        expected = _transform_data(raw, "EMBR3.SA").reset_index(drop=True)
+        pd.testing.assert_frame_equal(saved["EMBR3_SA"](), expected)
+        expected = _transform_data(fake_news, "EMBR3.SA").reset_index(drop=True)
+        pd.testing.assert_frame_equal(saved["news_EMBR3_SA"](), expected)
+
+    def test_transform_config_unknown_backend(self):
+        """Test that an unknown backend is rejected."""
+        with pytest.raises(ValueError, match="Unknown backend"):
+            TransformConfig(backend="spark")
+        with pytest.raises(ValueError, match="chunk_size"):
+            TransformConfig(chunk_size=0)
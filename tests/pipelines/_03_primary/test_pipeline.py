@@ -1,8 +1,24 @@
 """Tests for the primary pipeline."""
+from datetime import date
+
+import numpy as np
 import pandas as pd
+import pytest
 
 from project001.config.logging_config import get_test_logging_config
+from project001.config.transform_config import TransformConfig
+from project001.datasets import ManifestPartitionedDataset, PartitionManifestDataset
 from project001.pipelines._03_primary import nodes as primary_pipeline
+from project001.pipelines._03_primary.plan import (
+    DATE32,
+    POLARS_STEPS,
+    STEPS,
+    TransformerPlan,
+    build_transformer_plans,
+    default_plans,
+    round_half_to_even,
+)
+from project001.utils.arrow import ARROW_STRING, to_arrow_strings
 
 logger = get_test_logging_config(test_name="test_pipeline_03_primary")
 
@@ -15,61 +31,40 @@ class TestPrimaryPipeline:
 
     def test_remove_columns(self, fake_stock):
         """Test removing columns from DataFrame."""
-        # Add a ticker column to test its removal
         df = fake_stock.copy()
 
-        # Create and apply the transformer
-        remove_ticker = self.pipeline._remove_columns(['ticker'])
-        result = remove_ticker(df)
+        result = TransformerPlan(drop=('ticker',)).apply(df)
 
         assert 'ticker' not in result.columns
         assert len(result.columns) == len(df.columns) - 1
 
     def test_lower_case_text_columns(self, fake_news):
         """Test converting text columns to lowercase."""
-        # Create test data with mixed case
-        df = fake_news.copy()
-
-        result = self.pipeline._lower_case_text_columns(df)
+        result = TransformerPlan().apply(fake_news)
 
         # Check if text columns are lowercase
         assert result['title'].str.islower().all()
-        assert result['description'].str.islower().all()
+        assert result['description'].dropna().str.islower().all()
 
     def test_round_numeric_columns(self, fake_stock):
         """Test rounding numeric columns."""
-        df = fake_stock.copy()
-
-        result = self.pipeline._round_numeric_columns(df)
+        result = TransformerPlan(round_decimals=2).apply(fake_stock)
 
         # Check if numeric columns are rounded to 2 decimal places
         assert (result['High'] == result['High'].round(2)).all()
 
     def test_format_date_columns(self, fake_stock, fake_news):
         """Test formatting date columns."""
-        # Test with stock data
-        stock_result = self.pipeline._format_date_columns(fake_stock.copy())
-        assert pd.to_datetime(stock_result['Date']).dt.strftime('%Y-%m-%d').notna().all()
+        stock_result = TransformerPlan(date_columns=('Date',)).apply(fake_stock)
+        assert stock_result['Date'].str.fullmatch(r'\d{4}-\d{2}-\d{2}').all()
 
-        # Test with news data
-        news_result = self.pipeline._format_date_columns(fake_news.copy())
-        assert pd.to_datetime(news_result['publishedAt']).dt.strftime('%Y-%m-%d').notna().all()
+        news_result = TransformerPlan(date_columns=('publishedAt',)).apply(fake_news)
+        assert news_result['publishedAt'].str.fullmatch(r'\d{4}-\d{2}-\d{2}').all()
 
     def test_transformers_data_stock(self, fake_stock):
-        """Test that the stock data is transformed correctly."""
-        # Add ticker column to test data
-        df = fake_stock.copy()
-
-        # Define transformers
-        transformers = [
-            self.pipeline._remove_columns(['ticker']),
-            self.pipeline._lower_case_text_columns,
-            self.pipeline._round_numeric_columns,
-            self.pipeline._format_date_columns,
-        ]
-
-        # Apply transformers
-        result = self.pipeline._apply_transformers(df, transformers)
+        """Test that the default stock plan transforms the data correctly."""
+        plan = default_plans()['stock']
+        result = plan.apply(fake_stock)
 
         # Check transformations
         assert 'ticker' not in result.columns
@@ -77,26 +72,16 @@ class TestPrimaryPipeline:
         assert result['High'].round(2).equals(result['High'])
         assert result['Low'].round(2).equals(result['Low'])
         assert result['Close'].round(2).equals(result['Close'])
+        # Every call builds new plans, so selections and timings are not shared
+        assert plan.timings and not default_plans()['stock'].timings
 
     def test_transformers_data_news(self, fake_news):
-        """Test that the news data is transformed correctly."""
-        # Add url column to test data
-        df = fake_news.copy()
-
-        # Define transformers
-        transformers = [
-            self.pipeline._remove_columns(['url']),
-            self.pipeline._lower_case_text_columns,
-            self.pipeline._format_date_columns,
-        ]
-
-        # Apply transformers
-        result = self.pipeline._apply_transformers(df, transformers)
+        """Test that the default news plan transforms the data correctly."""
+        result = default_plans()['news'].apply(fake_news)
 
         # Check transformations
         assert 'url' not in result.columns
         assert result['title'].str.islower().all()
-        assert pd.to_datetime(result['publishedAt']).dt.strftime('%Y-%m-%d').notna().all()
 
     def test_ingest_transformed_data_success(self, fake_stock, fake_news):
         """Test successful transformation of stock and news data."""
@@ -125,3 +110,202 @@ class TestPrimaryPipeline:
         assert 'url' not in news_data['TICK1_SA'].columns
         assert news_data['TICK1_SA']['title'].str.islower().all()
         assert pd.to_datetime(news_data['TICK1_SA']['publishedAt']).dt.strftime('%Y-%m-%d').notna().all()
+
+    def test_ingest_transformed_data_only_changed(self, tmp_path, fake_stock, fake_news):
+        """Test that intermediate partitions unchanged since their output was saved are skipped."""
+        config = TransformConfig(only_changed=True)
+        tickers = {'TICK1.SA': 'Test Company'}
+        intermediate_stock = {'TICK1_SA': lambda: fake_stock.copy()}
+        intermediate_news = {'TICK1_SA': lambda: fake_news.copy()}
+        stock_manifest = {'TICK1_SA': 'stock-1'}
+        news_manifest = {'TICK1_SA': 'news-1'}
+        stock_output = ManifestPartitionedDataset(path=str(tmp_path / "stock"), dataset="pandas.ParquetDataset")
+        news_output = ManifestPartitionedDataset(path=str(tmp_path / "news"), dataset="pandas.ParquetDataset")
+
+        stock_data, news_data = self.pipeline.ingest_transformed_data(
+            tickers, intermediate_stock, intermediate_news, config, stock_manifest, news_manifest)
+        stock_output.save(stock_data)
+        news_output.save(news_data)
+
+        news_manifest['TICK1_SA'] = 'news-2'
+        stock_data, news_data = self.pipeline.ingest_transformed_data(
+            tickers, intermediate_stock, intermediate_news, config, stock_manifest, news_manifest,
+            stock_sources=PartitionManifestDataset(str(tmp_path / "stock"), field="source").load(),
+            news_sources=PartitionManifestDataset(str(tmp_path / "news"), field="source").load())
+
+        assert stock_data == {}
+        assert 'TICK1_SA' in news_data
+
+    def test_ingest_transformed_data_process_pool(self, fake_stock, fake_news):
+        """Test that the process pool returns the same partitions as the serial run."""
+        tickers = {'TICK1.SA': 'Test Company', 'TICK2.SA': 'Other Company'}
+        intermediate_stock = {'TICK1_SA': lambda: fake_stock.copy(), 'TICK2_SA': lambda: fake_stock.copy()}
+        intermediate_news = {'TICK1_SA': lambda: fake_news.copy()}
+
+        serial = self.pipeline.ingest_transformed_data(tickers, intermediate_stock, intermediate_news)
+        parallel = self.pipeline.ingest_transformed_data(
+            tickers, intermediate_stock, intermediate_news, TransformConfig(max_workers=2))
+
+        for serial_data, parallel_data in zip(serial, parallel):
+            assert set(serial_data) == set(parallel_data)
+            for ticker_name in serial_data:
+                pd.testing.assert_frame_equal(serial_data[ticker_name], parallel_data[ticker_name])
+
+    def test_ingest_transformed_data_lazy_process_pool(self, tmp_path, fake_stock, fake_news):
+        """Test that lazy partitions transformed ahead in the process pool are saved like the serial run."""
+        tickers = {'TICK1.SA': 'Test Company', 'TICK2.SA': 'Other Company', 'TICK3.SA': 'Third Company'}
+        intermediate_stock = {name: lambda: fake_stock.copy() for name in ['TICK1_SA', 'TICK2_SA', 'TICK3_SA']}
+        intermediate_news = {'TICK1_SA': lambda: fake_news.copy()}
+
+        serial_stock, _ = self.pipeline.ingest_transformed_data(tickers, intermediate_stock, intermediate_news)
+        lazy_stock, lazy_news = self.pipeline.ingest_transformed_data(
+            tickers, intermediate_stock, intermediate_news, TransformConfig(lazy=True, max_workers=2))
+        assert all(callable(partition) for partition in lazy_stock.values())
+
+        dataset = ManifestPartitionedDataset(path=str(tmp_path), dataset="pandas.ParquetDataset", filename_suffix=".parquet")
+        dataset.save(lazy_stock)
+
+        saved = dataset.load()
+        assert set(saved) == set(serial_stock)
+        for ticker_name, df in serial_stock.items():
+            pd.testing.assert_frame_equal(saved[ticker_name](), df)
+        assert lazy_news['TICK1_SA']() is not None # Requested again after the pool shut down
+
+    def test_transformer_plan_matches_pandas_reference(self, fake_stock, fake_news):
+        """Test that the transformer plan gives the same output as the equivalent pandas operations."""
+        plans = build_transformer_plans({
+            "stock": {"drop": ["ticker"], "round_decimals": 2},
+            "news": {"drop": ["url"], "date_columns": ["publishedAt"]},
+        })
+        expected_stock = fake_stock.drop(columns=['ticker'])
+        floats = expected_stock.select_dtypes(include=['float64']).columns
+        expected_stock[floats] = expected_stock[floats].round(2)
+        expected_news = fake_news.drop(columns=['url'])
+        text = expected_news.select_dtypes(include=['object']).columns
+        expected_news[text] = expected_news[text].apply(lambda x: x.str.lower())
+        expected_news['publishedAt'] = pd.to_datetime(expected_news['publishedAt']).dt.strftime('%Y-%m-%d')
+
+        pd.testing.assert_frame_equal(plans["stock"].apply(fake_stock), expected_stock)
+        pd.testing.assert_frame_equal(plans["news"].apply(fake_news), expected_news)
+        assert 'ticker' in fake_stock.columns # Input is not modified
+
+    def test_transformer_plan_schema_cache_and_timings(self, fake_stock):
+        """Test that column selections are resolved once per schema and every step is timed."""
+        plan = TransformerPlan(drop=("ticker",), round_decimals=2)
+
+        plan.apply(fake_stock)
+        plan.apply(fake_stock.copy())
+        plan.apply(fake_stock.drop(columns=["Volume"]))
+
+        assert len(plan._selections) == 2
+        assert set(plan.timings) == set(STEPS)
+
+    def test_transformer_plan_missing_drop_column(self, fake_news):
+        """Test that a partition missing a dropped column fails and is skipped."""
+        tickers = {'TICK1.SA': 'Test Company'}
+        plans = {"news": TransformerPlan(drop=("missing",))}
+
+        _, news_data = self.pipeline.ingest_transformed_data(
+            tickers, {}, {'TICK1_SA': lambda: fake_news.copy()}, plans=plans)
+
+        assert news_data == {}
+
+    def test_lower_case_arrow_string_columns(self, fake_news):
+        """Test that Arrow-backed string columns are lowercased by the plan and keep their dtype."""
+        df = to_arrow_strings(fake_news)
+
+        plan_result = TransformerPlan(drop=("url",), date_columns=("publishedAt",)).apply(df)
+
+        assert plan_result['title'].dtype == ARROW_STRING
+        assert plan_result['title'].dropna().str.islower().all()
+        assert plan_result['description'].dropna().tolist() == ['desc 1', 'desc 3']
+
+    def test_typed_dates(self, tmp_path, fake_stock, fake_news):
+        """Test that typed dates keep the formatted values and support parquet date filters."""
+        stock = fake_stock.rename(columns={'Date': 'date'}).assign(
+            date=lambda df: df['date'].dt.tz_localize('America/Sao_Paulo'))
+        news = fake_news.rename(columns={'publishedAt': 'published_at'})
+
+        typed_stock = TransformerPlan(drop=('ticker',), typed_dates=True).apply(stock)
+        typed_news = TransformerPlan(drop=('url',), typed_dates=True).apply(news)
+        day_news = TransformerPlan(drop=('url',), typed_dates=True, timestamp_columns=()).apply(news)
+        text_stock = TransformerPlan(drop=('ticker',)).apply(stock)
+        text_news = TransformerPlan(drop=('url',)).apply(news)
+
+        assert typed_stock['date'].dtype == DATE32
+        assert str(typed_news['published_at'].dtype) == 'datetime64[ns, UTC]'
+        assert typed_stock['date'].astype(str).tolist() == text_stock['date'].tolist()
+        # Without timestamp columns, the granularity is the one of the text format
+        assert day_news['published_at'].dtype == DATE32
+        assert day_news['published_at'].astype(str).tolist() == text_news['published_at'].tolist()
+
+        path = tmp_path / 'stock.parquet'
+        typed_stock.to_parquet(path, index=False)
+        first_day = typed_stock['date'].iloc[0]
+        filtered = pd.read_parquet(path, filters=[('date', '>', first_day)])
+        assert len(filtered) == len(typed_stock) - 1
+        assert isinstance(first_day, date)
+
+    @pytest.mark.parametrize("typed_dates", [False, True])
+    def test_transformer_plan_polars(self, fake_stock, fake_news, typed_dates):
+        """Test that the Polars execution of a plan gives the same output as pandas."""
+        pytest.importorskip("polars")
+        stock = fake_stock.rename(columns={'Date': 'date'}).assign(
+            date=lambda df: df['date'].dt.tz_localize('America/Sao_Paulo'))
+        news = fake_news.rename(columns={'publishedAt': 'published_at'})
+        text_news = news.assign(published_at=news['published_at'].dt.strftime('%Y-%m-%dT%H:%M:%SZ'))
+        cases = [
+            (TransformerPlan(drop=('ticker',), round_decimals=2, typed_dates=typed_dates), stock),
+            (TransformerPlan(drop=('url',), typed_dates=typed_dates), news),
+            (TransformerPlan(drop=('url',), typed_dates=typed_dates), text_news),
+            (TransformerPlan(drop=('url',), typed_dates=typed_dates), to_arrow_strings(news)),
+        ]
+
+        for plan, df in cases:
+            pd.testing.assert_frame_equal(plan.apply_polars(df), plan.apply(df), check_exact=True)
+            assert set(POLARS_STEPS) <= set(plan.timings)
+
+    @pytest.mark.parametrize("decimals", [0, 2, -1])
+    def test_round_half_to_even(self, decimals):
+        """Test that the Polars rounding gives the same values as numpy, ties included."""
+        pl = pytest.importorskip("polars")
+        rng = np.random.default_rng(0)
+        values = np.concatenate([rng.normal(0, 1000, 10_000), np.arange(-20, 20) / 8, [0.125, 2.675, np.nan, np.inf]])
+
+        result = pl.DataFrame({"x": values}).select(round_half_to_even(pl.col("x"), decimals))["x"].to_numpy()
+
+        np.testing.assert_array_equal(result, np.round(values, decimals))
+
+    def test_ingest_transformed_data_polars_backend(self, fake_stock, fake_news):
+        """Test that the polars backend gives the same partitions as the pandas backend."""
+        pytest.importorskip("polars")
+        tickers = {'TICK1.SA': 'Test Company'}
+        intermediate_stock = {'TICK1_SA': lambda: fake_stock.rename(columns={'Date': 'date'})}
+        intermediate_news = {'TICK1_SA': lambda: fake_news.rename(columns={'publishedAt': 'published_at'})}
+
+        expected = self.pipeline.ingest_transformed_data(tickers, intermediate_stock, intermediate_news)
+        result = self.pipeline.ingest_transformed_data(
+            tickers, intermediate_stock, intermediate_news, config=TransformConfig(backend="polars"))
+
+        for expected_data, data in zip(expected, result):
+            assert data.keys() == expected_data.keys() == {'TICK1_SA'}
+            pd.testing.assert_frame_equal(data['TICK1_SA'], expected_data['TICK1_SA'])
+
+    def test_ingest_transformed_data_chunked(self, tmp_path, fake_stock, fake_news):
+        """Test that streaming in chunks gives the same partitions as transforming them whole."""
+        tickers = {'TICK1.SA': 'Test Company'}
+        dataset = ManifestPartitionedDataset(
+            path=str(tmp_path), dataset="pandas.ParquetDataset", filename_suffix=".parquet")
+        dataset.save({'TICK1_SA': fake_stock.rename(columns={'Date': 'date'})})
+        intermediate_stock = dataset.load()
+        intermediate_news = {'TICK1_SA': lambda: fake_news.rename(columns={'publishedAt': 'published_at'})}
+
+        expected = self.pipeline.ingest_transformed_data(tickers, intermediate_stock, intermediate_news)
+        result = self.pipeline.ingest_transformed_data(
+            tickers, intermediate_stock, intermediate_news, config=TransformConfig(chunk_size=2))
+
+        for expected_data, data in zip(expected, result):
+            assert data.keys() == expected_data.keys() == {'TICK1_SA'}
+            chunks = list(data['TICK1_SA']())
+            assert [len(chunk) for chunk in chunks] == [2, 1]
+            pd.testing.assert_frame_equal(pd.concat(chunks), expected_data['TICK1_SA'])
@@ -1,10 +1,364 @@
-"""
-This is a boilerplate test file for pipeline '_04_feature'
-generated using Kedro 1.0.0.
-Please add your pipeline tests here.
-
-Kedro recommends using `pytest` framework, more info about it can be found
-in the official documentation:
-https://docs.pytest.org/en/latest/getting-started.html
-"""
-# TODO: Create tests to the pipeline
\ No newline at end of file
+"""Tests for the feature pipeline."""
+import json
+import re
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from project001.config.logging_config import get_test_logging_config
+from project001.pipelines._04_feature import nodes as feature_pipeline
+from project001.pipelines._04_feature import merge, sentiment
+from project001.pipelines._04_feature.merge import NewsMergeConfig
+from project001.pipelines._04_feature.nodes import TICKER_COLUMN, IndicatorConfig
+from project001.pipelines._04_feature.sentiment import (
+    SCORE_COLUMN,
+    SentimentCache,
+    SentimentConfig,
+    SentimentScorer,
+    hash_text,
+)
+from project001.utils.parallel import worker_context
+
+logger = get_test_logging_config(test_name="test_pipeline_04_feature")
+
+
+def make_primary_stock(rows: int, seed: int) -> pd.DataFrame:
+    """OHLCV data with the schema of pipeline 03_primary."""
+    rng = np.random.default_rng(seed)
+    close = 50 * np.exp(np.cumsum(rng.normal(0, 0.02, rows)))
+    spread = close * rng.uniform(0, 0.03, rows)
+    return pd.DataFrame({
+        "date": pd.bdate_range("2024-01-01", periods=rows).strftime("%Y-%m-%d"),
+        "open": (close + rng.normal(0, 0.5, rows) * spread).round(2),
+        "high": (close + spread).round(2),
+        "low": (close - spread).round(2),
+        "close": close.round(2),
+        "volume": rng.integers(1_000, 1_000_000, rows),
+    })
+
+@pytest.fixture(scope="module")
+def tiny_model(tmp_path_factory):
+    """Randomly initialized BERT classifier with a small vocabulary, saved to a local directory."""
+    torch = pytest.importorskip("torch")
+    transformers = pytest.importorskip("transformers")
+    directory = tmp_path_factory.mktemp("tiny_model")
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", ".", "embraer", "vale", "lucro", "queda", "alta", "mercado"]
+    (directory / "vocab.txt").write_text("\n".join(vocab))
+    labels = {0: "POSITIVE", 1: "NEGATIVE", 2: "NEUTRAL"}
+    config = transformers.BertConfig(
+        vocab_size=len(vocab), hidden_size=8, num_hidden_layers=1, num_attention_heads=2, intermediate_size=16,
+        max_position_embeddings=64, num_labels=3, id2label=labels, label2id={v: k for k, v in labels.items()},
+    )
+    torch.manual_seed(0)
+    transformers.BertForSequenceClassification(config).save_pretrained(directory)
+    transformers.BertTokenizerFast(str(directory / "vocab.txt")).save_pretrained(directory)
+    return str(directory)
+
+class TestFeaturePipeline:
+    """Test class for feature pipeline."""
+
+    def setup_method(self):
+        """Set up test fixtures before each test method."""
+        self.pipeline = feature_pipeline
+        self.config = IndicatorConfig()
+        self.stock = {"EMBR3_SA": make_primary_stock(120, 0), "VALE3_SA": make_primary_stock(80, 1)}
+
+    def test_compute_technical_indicators_matches_per_ticker(self):
+        """Test that indicators of stacked tickers equal the per-ticker indicators."""
+        result = self.pipeline.compute_technical_indicators(self.stock, self.config)
+
+        assert set(result) == set(self.stock)
+        for ticker, df in self.stock.items():
+            expected = self.pipeline._compute_indicators(
+                df.assign(**{TICKER_COLUMN: ticker}), self.config).drop(columns=TICKER_COLUMN)
+            pd.testing.assert_frame_equal(result[ticker], expected)
+            assert TICKER_COLUMN not in result[ticker].columns
+
+    def test_indicator_values(self):
+        """Test indicator values against direct per-ticker pandas computations."""
+        result = self.pipeline.compute_technical_indicators(self.stock, self.config)
+
+        df, features = self.stock["VALE3_SA"], result["VALE3_SA"]
+        pd.testing.assert_series_equal(features["sma_20"], df["close"].rolling(20).mean(), check_names=False)
+        pd.testing.assert_series_equal(
+            features["return_1d"], df["close"].pct_change(), check_names=False)
+        assert features["sma_50"].iloc[:49].isna().all() and features["sma_50"].iloc[49:].notna().all()
+        assert features["rsi_14"].dropna().between(0, 100).all()
+        assert features["obv"].iloc[0] == 0
+
+    def test_compute_technical_indicators_inputs(self):
+        """Test that loaders, DataFrames and a stacked DataFrame give the same result."""
+        from_frames = self.pipeline.compute_technical_indicators(self.stock, self.config)
+        loaders = {ticker: (lambda df=df: df) for ticker, df in self.stock.items()}
+        loaders["PETR4_SA"] = lambda: None
+        from_loaders = self.pipeline.compute_technical_indicators(loaders, self.config)
+        stacked = pd.concat(
+            [df.assign(**{TICKER_COLUMN: ticker}) for ticker, df in self.stock.items()], ignore_index=True)
+        from_stacked = self.pipeline.compute_technical_indicators(stacked.sample(frac=1, random_state=0), self.config)
+
+        for ticker in self.stock:
+            pd.testing.assert_frame_equal(from_loaders[ticker], from_frames[ticker])
+            pd.testing.assert_frame_equal(from_stacked[ticker], from_frames[ticker])
+        assert "PETR4_SA" not in from_loaders
+
+    def test_compute_technical_indicators_missing_columns(self):
+        """Test that stock data without the price columns raises KeyError."""
+        with pytest.raises(KeyError):
+            self.pipeline.compute_technical_indicators({"EMBR3_SA": self.stock["EMBR3_SA"].drop(columns="volume")}, self.config)
+
+    def test_compute_technical_indicators_empty(self):
+        """Test that no stock data returns no partitions."""
+        assert self.pipeline.compute_technical_indicators({"EMBR3_SA": lambda: None}, self.config) == {}
+
+class TestSentiment:
+    """Test class for the news sentiment scoring."""
+
+    def setup_method(self):
+        """Set up test fixtures before each test method."""
+        self.news = {
+            "EMBR3_SA": pd.DataFrame({
+                "title": ["embraer lucro alta", "mercado queda", None],
+                "description": ["mercado alta mercado lucro embraer alta", None, None],
+                "published_at": ["2025-01-01", "2025-01-02", "2025-01-03"],
+            }),
+            "VALE3_SA": pd.DataFrame({
+                "title": ["vale queda", "mercado queda"],
+                "description": ["vale", None],
+                "published_at": ["2025-01-01", "2025-01-02"],
+            }),
+        }
+
+    def test_scorer_batches_match_single_texts(self, tiny_model):
+        """Test that length-sorted, dynamically padded batches give the scores of unbatched texts."""
+        texts = ["embraer lucro alta. mercado alta mercado lucro", "vale", "mercado queda", "vale queda. vale"]
+        batched = SentimentScorer(tiny_model, batch_size=3, max_length=32).score(texts)
+        single = SentimentScorer(tiny_model, batch_size=1, max_length=32).score(texts)
+
+        np.testing.assert_allclose(batched, single, atol=1e-5)
+        np.testing.assert_allclose(batched.sum(axis=1), 1, rtol=1e-5)
+
+    def test_score_news_sentiment(self, tiny_model, tmp_path):
+        """Test the sentiment columns, null scores of articles without text and shared texts."""
+        config = SentimentConfig(model_name=tiny_model, batch_size=2, max_length=32, cache_dir=str(tmp_path))
+        result = sentiment.score_news_sentiment(self.news, config)
+
+        embraer, vale = result["EMBR3_SA"], result["VALE3_SA"]
+        for col in ["sentiment_positive", "sentiment_negative", "sentiment_neutral", SCORE_COLUMN]:
+            assert col in embraer.columns
+        pd.testing.assert_frame_equal(embraer[list(self.news["EMBR3_SA"].columns)], self.news["EMBR3_SA"])
+        assert pd.isna(embraer.iloc[2][SCORE_COLUMN]) # No text
+        assert embraer.iloc[1][SCORE_COLUMN] == vale.iloc[1][SCORE_COLUMN] # Same text in both tickers
+        np.testing.assert_allclose(
+            embraer[SCORE_COLUMN].iloc[:2], (embraer["sentiment_positive"] - embraer["sentiment_negative"]).iloc[:2])
+
+    def test_score_news_sentiment_cache(self, tiny_model, tmp_path, monkeypatch):
+        """Test that cached articles are not inferred again."""
+        config = SentimentConfig(model_name=tiny_model, batch_size=2, max_length=32, cache_dir=str(tmp_path))
+        first = sentiment.score_news_sentiment(self.news, config)
+
+        scored = []
+        original = SentimentScorer.score
+        monkeypatch.setattr(SentimentScorer, "score", lambda self, texts: scored.extend(texts) or original(self, texts))
+        news = dict(self.news, PETR4_SA=pd.DataFrame({"title": ["petrobras lucro"], "description": [None]}))
+        second = sentiment.score_news_sentiment(news, config)
+
+        assert scored == ["petrobras lucro"]
+        for ticker in self.news:
+            pd.testing.assert_frame_equal(second[ticker], first[ticker])
+
+        scored.clear()
+        sentiment.score_news_sentiment(self.news, config)
+        assert scored == []
+
+    def test_sentiment_cache_compaction(self, tmp_path):
+        """Test that repeated updates keep a bounded number of segments and every score."""
+        cache = SentimentCache(str(tmp_path), "model", max_segments=3)
+        for i in range(10):
+            scores = pd.DataFrame({"sentiment_positive": [i / 10, 0.5]}, index=[f"hash{i}", "shared"])
+            cache.update(scores)
+            assert len(list(cache.directory.glob("*.parquet"))) <= 3
+
+        loaded = cache.load()
+        assert len(loaded) == 11
+        assert loaded.loc["hash7", "sentiment_positive"] == 0.7
+        assert not list(cache.directory.glob("*.tmp"))
+
+    def test_score_news_sentiment_missing_text_columns(self, tmp_path):
+        """Test that news without any text column raises KeyError."""
+        config = SentimentConfig(cache_dir=str(tmp_path))
+        with pytest.raises(KeyError):
+            sentiment.score_news_sentiment({"EMBR3_SA": pd.DataFrame({"url": ["a"]})}, config)
+
+    def test_score_news_sentiment_without_texts(self, tmp_path, monkeypatch):
+        """Test that the model is not loaded when no article has text."""
+        monkeypatch.setattr(sentiment, "SentimentScorer", lambda *args: pytest.fail("The model was loaded"))
+        news = {"EMBR3_SA": pd.DataFrame({"title": [None, " "], "description": [None, None]})}
+
+        result = sentiment.score_news_sentiment(news, SentimentConfig(cache_dir=str(tmp_path)))
+
+        assert result["EMBR3_SA"][SCORE_COLUMN].isna().all()
+
+    def test_scorer_warns_without_polarity_labels(self, tiny_model, tmp_path, monkeypatch):
+        """Test that a model without positive and negative labels is reported."""
+        directory = shutil.copytree(tiny_model, tmp_path / "generic_labels")
+        config = json.loads((directory / "config.json").read_text())
+        config["id2label"] = {str(i): f"LABEL_{i}" for i in range(3)}
+        config["label2id"] = {f"LABEL_{i}": i for i in range(3)}
+        (directory / "config.json").write_text(json.dumps(config))
+        warnings = []
+        monkeypatch.setattr(sentiment.logger, "warning", warnings.append)
+
+        assert SentimentScorer(tiny_model).labels == ["positive", "negative", "neutral"]
+        assert warnings == []
+        assert SentimentScorer(str(directory)).labels == ["label_0", "label_1", "label_2"]
+        assert len(warnings) == 1 and SCORE_COLUMN in warnings[0]
+
+    @pytest.mark.parametrize("backend", ["torch_int8", "onnx", "onnx_int8"])
+    def test_scorer_backends(self, tiny_model, tmp_path, backend):
+        """Test that the quantized and ONNX backends stay close to the fp32 torch scores."""
+        if backend.startswith("onnx"):
+            pytest.importorskip("onnxruntime")
+            pytest.importorskip("onnx")
+        texts = ["embraer lucro alta. mercado alta mercado lucro", "vale", "mercado queda", "vale queda. vale"]
+        reference = SentimentScorer(tiny_model, batch_size=2, max_length=32).score(texts)
+        scorer = SentimentScorer(tiny_model, batch_size=2, max_length=32, backend=backend, onnx_dir=str(tmp_path))
+        result = scorer.score(texts)
+
+        np.testing.assert_allclose(result, reference, atol=1e-5 if backend == "onnx" else 2e-2)
+        if backend.startswith("onnx"):
+            assert any(tmp_path.rglob("*.onnx"))
+            # The exported model is reused
+            again = SentimentScorer(tiny_model, batch_size=2, max_length=32, backend=backend, onnx_dir=str(tmp_path))
+            np.testing.assert_allclose(again.score(texts), result)
+
+    def test_sentiment_backend_validation(self):
+        """Test that unknown backends are rejected and that backends do not share cache keys."""
+        with pytest.raises(ValueError):
+            SentimentConfig(backend="tensorrt")
+        assert hash_text("vale", "model", 128) != hash_text("vale", "model", 128, "onnx_int8")
+
+    def test_shard_by_ticker(self):
+        """Test that shards hold whole tickers and are balanced."""
+        keys_by_ticker = {"A": ["a1", "a2", "a3"], "B": ["b1", "b2"], "C": ["c1", "c2"], "D": ["d1"]}
+        shards = sentiment._shard_by_ticker(keys_by_ticker, 2)
+
+        assert sorted(map(len, shards)) == [4, 4]
+        for keys in keys_by_ticker.values():
+            assert any(set(keys) <= set(shard) for shard in shards)
+        assert len(sentiment._shard_by_ticker({"A": ["a1"]}, 4)) == 1
+
+    def test_score_news_sentiment_workers(self, tiny_model, tmp_path):
+        """Test that worker processes give the same partitions as the current process."""
+        serial = sentiment.score_news_sentiment(
+            self.news, SentimentConfig(model_name=tiny_model, max_length=32, cache_dir=None))
+        workers = sentiment.score_news_sentiment(
+            self.news, SentimentConfig(model_name=tiny_model, max_length=32, cache_dir=None, num_workers=2, num_threads=1))
+
+        assert set(workers) == set(serial)
+        for ticker in serial:
+            pd.testing.assert_frame_equal(workers[ticker], serial[ticker], atol=1e-6)
+
+    @pytest.mark.skipif(not Path("/proc/self/status").exists(), reason="Reads the worker memory from /proc")
+    def test_workers_share_model_weights(self, tiny_model, tmp_path):
+        """Test that the workers map the weights loaded by the parent instead of copying them."""
+        transformers = pytest.importorskip("transformers")
+        # Wide feed-forward layers, so the weights dominate the shared memory of a worker
+        directory = tmp_path / "wide_model"
+        shutil.copytree(tiny_model, directory)
+        config = transformers.AutoConfig.from_pretrained(directory)
+        config.hidden_size, config.intermediate_size = 64, 100_000
+        transformers.BertForSequenceClassification(config).save_pretrained(directory)
+        scorer = SentimentScorer(str(directory), max_length=32).share_memory()
+        weights = sum(param.numel() * param.element_size() for param in scorer.model.parameters())
+        texts = ["vale lucro alta", "embraer queda", "mercado"]
+
+        assert sentiment.model_labels(str(directory)) == scorer.labels == ["positive", "negative", "neutral"]
+        with ProcessPoolExecutor(
+            max_workers=1, mp_context=worker_context(), initializer=sentiment._init_worker, initargs=(scorer, 1)
+        ) as executor:
+            probabilities, shares_weights = executor.submit(sentiment._score_shard, texts).result()
+            status = Path(f"/proc/{next(iter(executor._processes))}/status").read_text()
+        shared_kb = int(re.search(r"RssShmem:\s+(\d+) kB", status).group(1))
+
+        assert shares_weights
+        np.testing.assert_allclose(probabilities, scorer.score(texts), atol=1e-6)
+        assert shared_kb * 1024 >= 0.9 * weights
+
+class TestNewsMerge:
+    """Test class for the merge of the stock features with the news sentiment."""
+
+    def setup_method(self):
+        """Set up test fixtures before each test method."""
+        rng = np.random.default_rng(0)
+        dates = pd.bdate_range("2025-01-01", periods=30)
+        self.stock = {
+            ticker: pd.DataFrame({"date": dates.strftime("%Y-%m-%d"), "close": rng.random(len(dates))})
+            for ticker in ["EMBR3_SA", "VALE3_SA", "PETR4_SA"]
+        }
+        self.news = {}
+        for ticker, count in [("EMBR3_SA", 60), ("VALE3_SA", 5), ("ITUB4_SA", 10)]:
+            published = dates[0] - pd.Timedelta("2D") + pd.to_timedelta(rng.random(count) * 45 * 86400, unit="s")
+            self.news[ticker] = pd.DataFrame({
+                "published_at": published.tz_localize("UTC"),
+                "sentiment_score": rng.uniform(-1, 1, count),
+            })
+        self.news["VALE3_SA"].loc[0, "sentiment_score"] = np.nan
+
+    def reference(self, ticker: str, config: NewsMergeConfig) -> pd.DataFrame:
+        """Per-row lookup of the articles published in every window."""
+        df = self.stock[ticker]
+        asof = pd.to_datetime(df["date"], utc=True) + pd.Timedelta(config.cutoff)
+        articles = self.news.get(ticker, pd.DataFrame({"published_at": pd.to_datetime([], utc=True), "sentiment_score": []}))
+        articles = articles.dropna()
+        features = {}
+        for window in config.windows:
+            counts, means = [], []
+            for row in range(len(df)):
+                start = asof.iloc[row - window] if row >= window else pd.Timestamp.min.tz_localize("UTC")
+                published = articles["published_at"]
+                scores = articles["sentiment_score"][(published >= start) & (published < asof.iloc[row])]
+                counts.append(len(scores))
+                means.append(scores.mean() if len(scores) else np.nan)
+            features[f"news_count_{window}d"] = counts
+            features[f"sentiment_mean_{window}d"] = means
+        return pd.concat([df, pd.DataFrame(features)], axis=1)
+
+    @pytest.mark.parametrize("cutoff", ["0h", "20h"])
+    def test_merge_news_features_matches_per_row_lookup(self, cutoff):
+        """Test the vectorized as-of merge against a per-row lookup, for every ticker."""
+        config = NewsMergeConfig(windows=(1, 5, 20), cutoff=cutoff)
+        result = merge.merge_news_features(self.stock, self.news, config)
+
+        assert set(result) == set(self.stock)
+        for ticker in self.stock:
+            pd.testing.assert_frame_equal(result[ticker], self.reference(ticker, config), check_dtype=False)
+        assert (result["PETR4_SA"]["news_count_20d"] == 0).all()
+
+    def test_merge_news_features_no_look_ahead(self):
+        """Test that news published on a trading day are only used from the next trading day."""
+        stock = {"EMBR3_SA": pd.DataFrame({"date": ["2025-01-02", "2025-01-03", "2025-01-06"]})}
+        news = {"EMBR3_SA": pd.DataFrame({
+            "published_at": ["2025-01-02", "2025-01-03T10:00:00-03:00", "2025-01-04", "2025-01-07"],
+            "sentiment_score": [1.0, -1.0, 0.5, 0.2],
+        })}
+        result = merge.merge_news_features(stock, news, NewsMergeConfig(windows=(1, 2)))["EMBR3_SA"]
+
+        assert result["news_count_1d"].tolist() == [0, 1, 2]
+        assert result["sentiment_mean_2d"].tolist()[1:] == [1.0, (1.0 - 1.0 + 0.5) / 3]
+
+    def test_merge_news_features_unsorted_and_typed_dates(self):
+        """Test that shuffled stock rows and date32 dates give the same features in the input order."""
+        config = NewsMergeConfig(windows=(1, 5))
+        expected = merge.merge_news_features(self.stock, self.news, config)
+        shuffled = {ticker: df.sample(frac=1, random_state=0) for ticker, df in self.stock.items()}
+        shuffled["EMBR3_SA"]["date"] = pd.to_datetime(shuffled["EMBR3_SA"]["date"]).dt.date.astype("date32[pyarrow]")
+        result = merge.merge_news_features(shuffled, self.news, config)
+
+        columns = ["news_count_1d", "sentiment_mean_1d", "news_count_5d", "sentiment_mean_5d"]
+        for ticker, df in shuffled.items():
+            pd.testing.assert_frame_equal(
+                result[ticker][columns].set_axis(df.index), expected[ticker][columns].loc[df.index])
@@ -0,0 +1,29 @@
+"""Tests for the Arrow-backed string helpers."""
+import pandas as pd
+
+from project001.config.logging_config import get_test_logging_config
+from project001.utils.arrow import ARROW_STRING, is_text_dtype, to_arrow_strings
+
+logger = get_test_logging_config(test_name="test_arrow")
+
+class TestArrowStrings:
+    """Test class for the Arrow string helpers."""
+
+    def test_to_arrow_strings(self, fake_news):
+        """Test that only text columns are converted and values are kept."""
+        df = fake_news.assign(mixed=[1, "a", None])
+
+        result = to_arrow_strings(df)
+
+        assert result["title"].dtype == ARROW_STRING
+        assert result["mixed"].dtype == object
+        assert result["publishedAt"].dtype == df["publishedAt"].dtype
+        assert result["title"].isna().tolist() == df["title"].isna().tolist()
+        assert df["title"].dtype == object # Input is not modified
+
+    def test_is_text_dtype(self):
+        """Test that object and string dtypes are recognized as text."""
+        assert is_text_dtype(pd.Series(["a"], dtype=object).dtype)
+        assert is_text_dtype(ARROW_STRING)
+        assert is_text_dtype(pd.StringDtype("python"))
+        assert not is_text_dtype(pd.Series([1.0]).dtype)
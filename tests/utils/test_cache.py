@@ -0,0 +1,78 @@
+"""Tests for the on-disk response cache."""
+import os
+import time
+
+import pandas as pd
+
+from project001.config.logging_config import get_test_logging_config
+from project001.utils.cache import ResponseCache
+
+logger = get_test_logging_config(test_name="test_cache")
+
+class TestResponseCache:
+    """Test class for the response cache."""
+
+    def test_wrap_serves_repeated_requests(self, tmp_path, fake_stock):
+        """Test that an identical request is served from the cache."""
+        cache = ResponseCache(str(tmp_path), ttl_seconds=60, max_bytes=10 ** 7)
+        calls = []
+
+        def stock_fetcher(ticker, period):
+            calls.append(ticker)
+            return fake_stock.copy()
+
+        cached_fetcher = cache.wrap(stock_fetcher, "stock")
+        first = cached_fetcher("EMBR3.SA", period="1mo")
+        second = cached_fetcher("EMBR3.SA", period="1mo")
+        cached_fetcher("EMBR3.SA", period="1y") # Different window, different key
+
+        assert calls == ["EMBR3.SA", "EMBR3.SA"]
+        pd.testing.assert_frame_equal(first, second)
+
+    def test_failed_fetch_is_not_cached(self, tmp_path):
+        """Test that None responses are not stored."""
+        cache = ResponseCache(str(tmp_path), ttl_seconds=60, max_bytes=10 ** 7)
+        cached_fetcher = cache.wrap(lambda ticker, period: None, "stock")
+
+        assert cached_fetcher("EMBR3.SA", period="1mo") is None
+        assert not list(tmp_path.glob("*.parquet"))
+
+    def test_expired_entry_is_refetched(self, tmp_path, fake_news):
+        """Test that entries older than the TTL are discarded."""
+        cache = ResponseCache(str(tmp_path), ttl_seconds=60, max_bytes=10 ** 7)
+        key = cache.make_key("news", "Embraer")
+        cache.set(key, fake_news)
+        path = tmp_path / f"{key}.parquet"
+        old = time.time() - 120
+        os.utime(path, (old, old))
+
+        assert cache.get(key) is None
+        assert not path.exists()
+
+    def test_lru_eviction_by_size(self, tmp_path, fake_stock):
+        """Test that the least recently used entries are evicted beyond max_bytes."""
+        cache = ResponseCache(str(tmp_path), ttl_seconds=3600, max_bytes=10 ** 7)
+        cache.set("a", fake_stock)
+        entry_size = (tmp_path / "a.parquet").stat().st_size
+        cache.max_bytes = int(entry_size * 2.5)
+
+        now = time.time()
+        cache.set("b", fake_stock)
+        os.utime(tmp_path / "a.parquet", (now - 20, now - 20))
+        os.utime(tmp_path / "b.parquet", (now - 10, now - 10))
+        cache.get("a") # "a" becomes the most recently used entry
+        cache.set("c", fake_stock)
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.get("c") is not None
+
+    def test_dict_responses_round_trip(self, tmp_path, fake_stock):
+        """Test that batched responses keep their partition keys."""
+        cache = ResponseCache(str(tmp_path), ttl_seconds=60, max_bytes=10 ** 7)
+        cache.set("batch", {"EMBR3_SA": fake_stock, "VALE3_SA": fake_stock.iloc[:1]})
+
+        result = cache.get("batch")
+        assert set(result.keys()) == {"EMBR3_SA", "VALE3_SA"}
+        assert len(result["VALE3_SA"]) == 1
+        assert list(result["EMBR3_SA"].columns) == list(fake_stock.columns)
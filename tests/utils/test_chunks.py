@@ -0,0 +1,94 @@
+"""Tests for the chunked processing helpers."""
+from functools import partial
+
+import fsspec
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from project001.config.logging_config import get_test_logging_config
+from project001.utils.arrow import ARROW_STRING, to_arrow_strings
+from project001.utils.chunks import (
+    ChunkedParquetLoader,
+    RowDeduplicator,
+    external_sort,
+    load_partition,
+    partition_chunks,
+    write_parquet_chunks,
+)
+
+logger = get_test_logging_config(test_name="test_chunks")
+
+class TestChunks:
+    """Test class for the chunked processing helpers."""
+
+    def _chunks(self, df: pd.DataFrame, size: int) -> list[pd.DataFrame]:
+        return list(partition_chunks(lambda: df, size))
+
+    def test_partition_chunks(self, fake_stock):
+        """Test that loaders without `iter_chunks` are sliced in order."""
+        chunks = self._chunks(fake_stock, 2)
+
+        assert [len(chunk) for chunk in chunks] == [2, 1]
+        pd.testing.assert_frame_equal(pd.concat(chunks), fake_stock)
+
+    def test_row_deduplicator(self):
+        """Test that rows repeated across chunks are dropped, keeping the first one."""
+        deduplicator = RowDeduplicator()
+        first, dropped_first = deduplicator.filter(pd.DataFrame({"a": [1, 2], "b": ["x", "y"]}))
+        second, dropped_second = deduplicator.filter(pd.DataFrame({"a": [2, 3], "b": ["y", "y"]}))
+
+        assert (len(first), dropped_first) == (2, 0)
+        assert second.to_dict("list") == {"a": [3], "b": ["y"]}
+        assert dropped_second == 1
+
+    def test_row_deduplicator_sorted_key(self):
+        """Test that sorted chunks are deduplicated across chunks holding only the hashes of the last key."""
+        rng = np.random.default_rng(0)
+        df = pd.DataFrame({"key": np.sort(rng.integers(0, 50, 2000)), "value": rng.integers(0, 3, 2000)})
+        deduplicator = RowDeduplicator("key")
+
+        chunks = [deduplicator.filter(chunk) for chunk in self._chunks(df, 70)]
+
+        result = pd.concat([chunk for chunk, _ in chunks])
+        pd.testing.assert_frame_equal(result, df.drop_duplicates())
+        assert sum(dropped for _, dropped in chunks) == len(df) - len(result)
+        assert len(deduplicator._seen) <= df.drop_duplicates()["key"].value_counts().max()
+
+    def test_external_sort(self):
+        """Test that out-of-order and in-order chunks are sorted across chunks."""
+        rng = np.random.default_rng(0)
+        df = pd.DataFrame({"key": rng.permutation(5000), "value": rng.random(5000)})
+
+        for data in (df, df.sort_values("key")):
+            result = pd.concat(external_sort(self._chunks(data, 700), "key", 700))
+            pd.testing.assert_frame_equal(result, data.sort_values("key"))
+
+    def test_write_parquet_chunks(self, tmp_path, fake_news):
+        """Test that chunks are written to one file with the schema of the first chunk."""
+        path = tmp_path / "news.parquet"
+        chunks = [fake_news.iloc[:1], fake_news.iloc[1:2], fake_news.iloc[2:]] # The middle one is all null
+
+        rows = write_parquet_chunks(chunks, str(path), {"index": False, "row_group_size": 1, "compression": "zstd"})
+
+        assert rows == 3
+        assert pq.ParquetFile(path).metadata.num_row_groups == 3
+        result = pd.read_parquet(path)
+        pd.testing.assert_frame_equal(result.isna(), fake_news.isna())
+        pd.testing.assert_frame_equal(result.dropna(), fake_news.dropna())
+
+    def test_arrow_strings_on_read(self, tmp_path, fake_news):
+        """Test that parquet loaders read text as 'string[pyarrow]' and other loaders are converted after loading."""
+        path = tmp_path / "news.parquet"
+        fake_news.to_parquet(path, index=False)
+        loader = ChunkedParquetLoader(partial(pd.read_parquet, path), str(path), fsspec.filesystem("file"))
+        expected = to_arrow_strings(pd.read_parquet(path))
+
+        result = load_partition(loader, arrow_strings=True)
+        chunks = list(partition_chunks(loader, 2, arrow_strings=True))
+
+        assert result["title"].dtype == ARROW_STRING
+        assert result["publishedAt"].dtype == expected["publishedAt"].dtype
+        pd.testing.assert_frame_equal(result, expected)
+        pd.testing.assert_frame_equal(pd.concat(chunks), expected)
+        pd.testing.assert_frame_equal(load_partition(lambda: fake_news, arrow_strings=True), to_arrow_strings(fake_news))
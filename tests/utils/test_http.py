@@ -0,0 +1,52 @@
+"""Tests for the shared HTTP session layer."""
+import time
+
+import pytest
+
+from project001.config.logging_config import get_test_logging_config
+from project001.utils.http import TokenBucket, build_session
+
+logger = get_test_logging_config(test_name="test_http")
+
+class TestHttpSession:
+    """Test class for the pooled HTTP session."""
+
+    def test_session_retries_transient_errors(self, stub_http_server):
+        """Test that 429 and 5xx responses are retried until a success."""
+        stub_http_server.queue(429, {"status": "error"}, {"Retry-After": "0"})
+        stub_http_server.queue(503, {"status": "error"})
+        stub_http_server.queue(200, {"status": "ok"})
+
+        with build_session(retries=3, backoff_factor=0.01) as session:
+            response = session.get(stub_http_server.url)
+
+        assert response.status_code == 200
+        assert len(stub_http_server.requests) == 3
+
+    def test_session_gives_up_after_retries(self, stub_http_server):
+        """Test that the last error response is returned once retries are exhausted."""
+        stub_http_server.queue(500, {"status": "error"})
+
+        with build_session(retries=2, backoff_factor=0.01) as session:
+            response = session.get(stub_http_server.url)
+
+        assert response.status_code == 500
+        assert len(stub_http_server.requests) == 3 # First attempt + 2 retries
+
+    def test_session_rate_limit(self, stub_http_server):
+        """Test that requests beyond the burst are spaced by the rate limit."""
+        stub_http_server.queue(200, {"status": "ok"})
+
+        with build_session(rate_limit=20, burst=2) as session:
+            start = time.monotonic()
+            for _ in range(4):
+                session.get(stub_http_server.url)
+            elapsed = time.monotonic() - start
+
+        # 2 requests from the burst, the other 2 wait 1/20s each
+        assert elapsed >= 0.09
+
+    def test_token_bucket_invalid_arguments(self):
+        """Test that a non-positive rate is rejected."""
+        with pytest.raises(ValueError):
+            TokenBucket(rate=0, capacity=1)